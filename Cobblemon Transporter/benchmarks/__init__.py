@@ -0,0 +1,14 @@
+"""
+Throughput benchmarks for the importer and exporter.
+
+Run from the Cobblemon Transporter folder:
+    python -m benchmarks.corpus --out bench_corpus          # just generate .dat files
+    python -m benchmarks.bench --boxes 6 40                 # generate, import and export, print a report
+"""
+import os
+import sys
+
+# The importer/exporter and their helpers are plain scripts in the modules folder
+MODULES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "modules")
+if MODULES_DIR not in sys.path:
+    sys.path.insert(0, MODULES_DIR)
@@ -0,0 +1,155 @@
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+from benchmarks import MODULES_DIR
+from benchmarks.corpus import LAYOUTS, PARTY_SIZE, SLOTS_PER_BOX, pokemon_count, write_corpus_file
+
+STAGES = ('load_nbt', 'stream', 'extract_pokemon_data', 'save_pokemon_to_json', 'build_pokemon', 'save_nbt_to_dat')
+BENCH_TRAINER = 'BenchTrainer'
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where it can't be measured."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def stub_mojang(importer, work_dir):
+    """Keep the run offline: every trainer resolves to a fixed name and no real cache or manifest is touched."""
+    from ImportManifest import ImportManifest
+    from UuidResolver import UsernameCache
+
+    importer.uuid_cache = UsernameCache(os.path.join(work_dir, 'uuid_cache.json'))
+    importer.import_manifest = ImportManifest(os.path.join(work_dir, 'import_manifest.json'))
+    importer.FULL_IMPORT = True
+
+    def resolve_usernames(uuids, cache=None, *args, **kwargs):
+        for uuid in uuids:
+            if cache is not None:
+                cache.record(uuid, BENCH_TRAINER, 'ok')
+        return {uuid: (BENCH_TRAINER, 'ok') for uuid in uuids}
+
+    importer.resolve_usernames = resolve_usernames
+
+
+@contextlib.contextmanager
+def stage(timings, name):
+    started = time.perf_counter()
+    yield
+    timings[name] = time.perf_counter() - started
+
+
+def run_case(dat_path, work_dir):
+    """Time every import/export stage for one .dat file. Runs in a fresh process so peak RSS is per case."""
+    if MODULES_DIR not in sys.path:
+        sys.path.insert(0, MODULES_DIR)
+    import nbtlib
+    import CobblemonExporter as exporter
+    import CobblemonImporter as importer
+
+    stub_mojang(importer, work_dir)
+    json_dir = os.path.join(work_dir, 'json')
+    timings = {}
+
+    # The importer and exporter are chatty; their output goes to devnull but is still paid for
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        with stage(timings, 'load_nbt'):
+            nbt_data = importer.load_nbt(dat_path)
+        with stage(timings, 'stream'):
+            slots = list(importer.PokemonStream(dat_path))
+        importer.resolve_trainer_names(slots)
+
+        with stage(timings, 'extract_pokemon_data'):
+            extracted = [importer.extract_pokemon_data(compound, box, slot)[0] for box, slot, compound in slots]
+        pokemon_infos = [info for info in extracted if info]
+
+        with stage(timings, 'save_pokemon_to_json'):
+            for pokemon_info in pokemon_infos:
+                importer.save_pokemon_to_json(pokemon_info, json_dir)
+
+        # Export: build a compound for every imported Pokémon, like process_files does
+        with stage(timings, 'build_pokemon'):
+            merged = [exporter.build_pokemon(pokemon_info, BENCH_TRAINER) for pokemon_info in pokemon_infos]
+
+        export_tree = nbtlib.File({
+            f'Box{box}': nbtlib.Compound({f'Slot{slot}': pokemon
+                                          for slot, pokemon in enumerate(merged[box * SLOTS_PER_BOX:(box + 1) * SLOTS_PER_BOX])})
+            for box in range((len(merged) + SLOTS_PER_BOX - 1) // SLOTS_PER_BOX)
+        })
+        with stage(timings, 'save_nbt_to_dat'):
+            exporter.save_nbt_to_dat(export_tree, os.path.join(work_dir, 'export.dat'))
+
+    return {'pokemon': len(pokemon_infos), 'timings': timings, 'peak_rss_mb': peak_rss_mb()}
+
+
+def print_report(results):
+    print(f"{'case':<24} {'stage':<22} {'seconds':>9} {'Pokémon/s':>11}")
+    for result in results:
+        for name in STAGES:
+            seconds = result['timings'].get(name)
+            if seconds is None:
+                continue
+            rate = result['pokemon'] / seconds if seconds > 0 else float('inf')
+            print(f"{result['case']:<24} {name:<22} {seconds:>9.3f} {rate:>11.0f}")
+        peak = f"{result['peak_rss_mb']:.1f} MB" if result['peak_rss_mb'] is not None else "n/a"
+        print(f"{result['case']:<24} {result['pokemon']} Pokémon, peak RSS {peak}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Cobblemon importer and exporter on synthetic .dat files')
+    parser.add_argument('--layouts', nargs='+', choices=LAYOUTS, default=list(LAYOUTS))
+    parser.add_argument('--boxes', nargs='+', type=int, default=[6, 40], help='PC sizes to benchmark (default: 6 40)')
+    parser.add_argument('--corpus', help='Keep generated .dat files in this directory and reuse them on later runs')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    args = parser.parse_args()
+
+    corpus_dir = args.corpus or tempfile.mkdtemp(prefix='cobblemon-corpus-')
+    cases = []
+    for layout in args.layouts:
+        for boxes in ([PARTY_SIZE] if layout == 'party' else args.boxes):
+            cases.append(('party' if layout == 'party' else f'{layout}_{boxes}', write_corpus_file(corpus_dir, layout, boxes),
+                          pokemon_count(layout, boxes)))
+
+    results = []
+    try:
+        for case, dat_path, expected in cases:
+            work_dir = tempfile.mkdtemp(prefix='cobblemon-bench-')
+            try:
+                # A fresh spawned process per case keeps peak RSS and module state independent
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                    result = pool.submit(run_case, dat_path, work_dir).result()
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            result['case'] = case
+            if result['pokemon'] != expected:
+                print(f"Warning: {case} imported {result['pokemon']} of {expected} Pokémon")
+            results.append(result)
+    finally:
+        if not args.corpus:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import argparse
+import os
+import random
+
+import nbtlib
+from nbtlib import Byte, Compound, Float, Int, IntArray, List, Long, String
+
+# Synthetic Cobblemon storage files. Every Pokémon carries the tags the importer reads plus a few
+# it skips (HeldItem, Features, battle state), so both the decode and the skip paths get exercised.
+LAYOUTS = ('party', 'direct', 'pc_boxes_array', 'pc_boxes_direct')
+SLOTS_PER_BOX = 30
+PARTY_SIZE = 6
+
+SPECIES = ['pikachu', 'bulbasaur', 'charizard', 'mrmime', 'greninja', 'garchomp', 'eevee', 'lucario']
+MOVES = ['thunderbolt', 'quickattack', 'closecombat', 'surf', 'flamethrower', 'earthquake', 'protect', 'uturn']
+STATS = ['hp', 'attack', 'defence', 'special_attack', 'special_defence', 'speed']
+TRAINERS = ['b531aa6c-002f-432c-8d6d-f84ed3d1f66a', 'ba2d88d8-28e5-4901-a378-a5f400d05f90']
+
+
+def make_pokemon(rng, index):
+    return Compound({
+        'Species': String(f'cobblemon:{rng.choice(SPECIES)}'),
+        'Level': Int(rng.randint(1, 100)),
+        'Ability': Compound({'AbilityName': String('static')}),
+        'MoveSet': List[Compound]([
+            Compound({'MoveName': String(move), 'MovePP': Int(15), 'RaisedPPStages': Int(0)})
+            for move in rng.sample(MOVES, 4)
+        ]),
+        'IVs': Compound({
+            'Base': Compound({f'cobblemon:{stat}': Int(rng.randint(0, 31)) for stat in STATS}),
+            'HyperTrained': Compound(),
+        }),
+        'EVs': Compound({f'cobblemon:{stat}': Int(rng.randint(0, 85)) for stat in STATS}),
+        'Nature': String('cobblemon:adamant'),
+        'PokemonOriginalTrainer': String(rng.choice(TRAINERS)),
+        'Health': Int(50),
+        'Experience': Int(rng.randint(0, 1000000)),
+        'Shiny': Byte(rng.random() < 0.01),
+        'CaughtBall': String('cobblemon:poke_ball'),
+        'Gender': String(rng.choice(['MALE', 'FEMALE'])),
+        'Friendship': Int(70),
+        'UUID': IntArray([rng.randint(-2**31, 2**31 - 1) for _ in range(4)]),
+        'ScaleModifier': Float(1.0),
+        'HeldItem': Compound({'id': String('minecraft:air'), 'Count': Byte(0)}),
+        'Features': List[Compound]([Compound({'name': String('snake_pattern'), 'value': Int(rng.randint(0, 9))})]),
+        'PersistentData': Compound({'PID': Long(index), 'EncryptionConstant': Long(index * 7)}),
+    })
+
+
+def build_file(layout, boxes, seed=1):
+    """Build an nbtlib File of the given layout; `boxes` is ignored for the party."""
+    rng = random.Random(seed)
+    nbt_file = nbtlib.File({})
+    if layout == 'party':
+        for slot in range(PARTY_SIZE):
+            nbt_file[f'Slot{slot}'] = make_pokemon(rng, slot)
+    elif layout == 'direct':
+        for box in range(boxes):
+            nbt_file[f'Box{box}'] = Compound({f'Slot{slot}': make_pokemon(rng, box * SLOTS_PER_BOX + slot)
+                                              for slot in range(SLOTS_PER_BOX)})
+    elif layout == 'pc_boxes_direct':
+        nbt_file['pc'] = Compound({f'Box{box}': Compound({f'Slot{slot}': make_pokemon(rng, box * SLOTS_PER_BOX + slot)
+                                                          for slot in range(SLOTS_PER_BOX)})
+                                   for box in range(boxes)})
+    elif layout == 'pc_boxes_array':
+        box_list = []
+        for box in range(boxes):
+            pokemon_list = []
+            for slot in range(SLOTS_PER_BOX):
+                pokemon = make_pokemon(rng, box * SLOTS_PER_BOX + slot)
+                pokemon['slot_number'] = Int(slot)
+                pokemon_list.append(pokemon)
+            box_list.append(Compound({'pokemon': List[Compound](pokemon_list)}))
+        nbt_file['pc'] = Compound({'boxes': List[Compound](box_list)})
+    else:
+        raise ValueError(f"Unknown layout {layout!r}; expected one of {', '.join(LAYOUTS)}")
+    return nbt_file
+
+
+def pokemon_count(layout, boxes):
+    return PARTY_SIZE if layout == 'party' else boxes * SLOTS_PER_BOX
+
+
+def write_corpus_file(out_dir, layout, boxes, seed=1):
+    """Write one gzipped .dat file (reused if it already exists) and return its path."""
+    name = 'party.dat' if layout == 'party' else f'{layout}_{boxes}.dat'
+    path = os.path.join(out_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(out_dir, exist_ok=True)
+        build_file(layout, boxes, seed).save(path, gzipped=True)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic Cobblemon party/pcstore .dat files')
+    parser.add_argument('--out', default='bench_corpus', help='Output directory (default: bench_corpus)')
+    parser.add_argument('--layouts', nargs='+', choices=LAYOUTS, default=list(LAYOUTS))
+    parser.add_argument('--boxes', nargs='+', type=int, default=[6, 40], help='PC sizes to generate (default: 6 40)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    for layout in args.layouts:
+        for boxes in ([PARTY_SIZE] if layout == 'party' else args.boxes):
+            path = write_corpus_file(args.out, layout, boxes, args.seed)
+            print(f"{path}: {pokemon_count(layout, boxes)} Pokémon, {os.path.getsize(path)} bytes")
+
+
+if __name__ == "__main__":
+    main()
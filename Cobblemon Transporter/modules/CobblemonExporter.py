@@ -9,11 +9,23 @@ import json
 import os
 import tkinter as tk
 import random
-from tkinter import filedialog, messagebox
-import copy
+from tkinter import filedialog
+import uuid
+from types import MappingProxyType
 import sys
 import argparse
 import io
+import gzip
+import hashlib
+import shutil
+import tempfile
+from PokemonFields import encode_pokemon
+from CobblemonLayouts import PLACEMENT_POLICIES, layout_hint, load_layout
+from PokemonBundle import is_bundle, read_bundle
+from OutputIndex import uuid_from_int_array
+from WorldLock import busy_targets, find_world_dir, flush_own_writes, record_own_write
+from ExportQueue import ExportQueue
+from StatValidation import format_report, validate_stats
 
 # Set up the console to handle Unicode properly
 if sys.platform.startswith('win'):
@@ -27,126 +39,54 @@ if sys.platform.startswith('win'):
         sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='backslashreplace')
         sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='backslashreplace')
 
+# Number of rotating backups kept of a .dat file on every save (.bak, .bak.1, ...). They go to BACKUP_DIR rather than
+# next to the file, so nothing extra ends up in the world's pcstore/playerpartystore folders.
+BACKUP_COUNT = 3
+BACKUP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'cache', 'backups')
+
+# What to do with a Pokémon the target .dat already holds (same UUID, or same PID and encryption constant)
+DUPLICATE_ACTIONS = ('skip', 'update', 'allow')
+
+# PersistentData tag holding the UUID of the JSON an exported Pokémon was built from; the Pokémon itself gets a new one
+SOURCE_UUID_TAG = 'TransporterSourceUUID'
+
+# What to do when a server may have the target world open: refuse, queue the export for --apply-queue, or write anyway
+BUSY_ACTIONS = ('refuse', 'queue', 'force')
+
 # Directory for JSON files
 JSON_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'cobblemon')
 
-# Mapping from PKHeX ribbon names to Cobblemon mark/ribbon identifiers
-MARK_NAME_MAP = {
-    # Ribbons
-    "ChampionKalos": "cobblemon:ribbon_champion_kalos",
-    "ChampionG3": "cobblemon:ribbon_champion",
-    "ChampionSinnoh": "cobblemon:ribbon_champion_sinnoh",
-    "BestFriends": "cobblemon:ribbon_best_friends",
-    "Training": "cobblemon:ribbon_training",
-    "BattlerSkillful": "cobblemon:ribbon_battler_skillful",
-    "BattlerExpert": "cobblemon:ribbon_battler_expert",
-    "Effort": "cobblemon:ribbon_effort",
-    "Alert": "cobblemon:ribbon_day_alert",
-    "Shock": "cobblemon:ribbon_day_shock",
-    "Downcast": "cobblemon:ribbon_day_downcast",
-    "Careless": "cobblemon:ribbon_day_careless",
-    "Relax": "cobblemon:ribbon_day_relax",
-    "Snooze": "cobblemon:ribbon_day_snooze",
-    "Smile": "cobblemon:ribbon_day_smile",
-    "Gorgeous": "cobblemon:ribbon_syndicate_gorgeous",
-    "Royal": "cobblemon:ribbon_syndicate_royal",
-    "GorgeousRoyal": "cobblemon:ribbon_syndicate_gorgeous_royal",
-    "Artist": "cobblemon:ribbon_artist",
-    "Footprint": "cobblemon:ribbon_footprint",
-    "Record": "cobblemon:ribbon_record",
-    "Legend": "cobblemon:ribbon_legend",
-    "Country": "cobblemon:ribbon_event_country",
-    "National": "cobblemon:ribbon_event_national",
-    "Earth": "cobblemon:ribbon_event_earth",
-    "World": "cobblemon:ribbon_event_world",
-    "Classic": "cobblemon:ribbon_event_classic",
-    "Premier": "cobblemon:ribbon_event_premier",
-    "Event": "cobblemon:ribbon_event",
-    "Birthday": "cobblemon:ribbon_event_birthday",
-    "Special": "cobblemon:ribbon_event_special",
-    "Souvenir": "cobblemon:ribbon_event_souvenir",
-    "Wishing": "cobblemon:ribbon_event_wishing",
-    "ChampionBattle": "cobblemon:ribbon_event_champion_battle",
-    "ChampionRegional": "cobblemon:ribbon_event_champion_regional",
-    "ChampionNational": "cobblemon:ribbon_event_champion_national",
-    "ChampionWorld": "cobblemon:ribbon_event_champion_world",
-    "CountMemoryContest": "cobblemon:ribbon_memory_contest",
-    "CountMemoryBattle": "cobblemon:ribbon_memory_battle",
-    "ChampionG6Hoenn": "cobblemon:ribbon_champion_hoenn",
-    "ContestStar": "cobblemon:ribbon_contest_super_star",
-    "MasterCoolness": "cobblemon:ribbon_contest_super_master_coolness",
-    "MasterBeauty": "cobblemon:ribbon_contest_super_master_beauty",
-    "MasterCuteness": "cobblemon:ribbon_contest_super_master_cuteness",
-    "MasterCleverness": "cobblemon:ribbon_contest_super_master_cleverness",
-    "MasterToughness": "cobblemon:ribbon_contest_super_master_toughness",
-    "ChampionAlola": "cobblemon:ribbon_champion_alola",
-    "BattleRoyale": "cobblemon:ribbon_battle_royal_master",
-    "BattleTreeGreat": "cobblemon:ribbon_battle_tree_great",
-    "BattleTreeMaster": "cobblemon:ribbon_battle_tree_master",
-    "ChampionGalar": "cobblemon:ribbon_champion_galar",
-    "TowerMaster": "cobblemon:ribbon_battle_tower_master",
-    "MasterRank": "cobblemon:ribbon_master_rank",
-    "Hisui": "cobblemon:ribbon_hisui",
-    "TwinklingStar": "cobblemon:ribbon_contest_super_star_twinkling",
-    "ChampionPaldea": "cobblemon:ribbon_champion_paldea",
-    "OnceInALifetime": "cobblemon:ribbon_once-in-a-lifetime",
-    "Partner": "cobblemon:ribbon_partner",
-    # Marks
-    "MarkLunchtime": "cobblemon:mark_time_lunchtime",
-    "MarkSleepyTime": "cobblemon:mark_time_sleepy-time",
-    "MarkDusk": "cobblemon:mark_time_dusk",
-    "MarkDawn": "cobblemon:mark_time_dawn",
-    "MarkCloudy": "cobblemon:mark_weather_cloudy",
-    "MarkRainy": "cobblemon:mark_weather_rainy",
-    "MarkStormy": "cobblemon:mark_weather_stormy",
-    "MarkSnowy": "cobblemon:mark_weather_snowy",
-    "MarkBlizzard": "cobblemon:mark_weather_blizzard",
-    "MarkDry": "cobblemon:mark_weather_dry",
-    "MarkSandstorm": "cobblemon:mark_weather_sandstorm",
-    "MarkMisty": "cobblemon:mark_weather_misty",
-    "MarkDestiny": "cobblemon:mark_destiny",
-    "MarkFishing": "cobblemon:mark_fishing",
-    "MarkCurry": "cobblemon:mark_curry",
-    "MarkUncommon": "cobblemon:mark_uncommon",
-    "MarkRare": "cobblemon:mark_rare",
-    "MarkRowdy": "cobblemon:mark_personality_rowdy",
-    "MarkAbsentMinded": "cobblemon:mark_personality_absent-minded",
-    "MarkJittery": "cobblemon:mark_personality_jittery",
-    "MarkExcited": "cobblemon:mark_personality_excited",
-    "MarkCharismatic": "cobblemon:mark_personality_charismatic",
-    "MarkCalmness": "cobblemon:mark_personality_calmness",
-    "MarkIntense": "cobblemon:mark_personality_intense",
-    "MarkZonedOut": "cobblemon:mark_personality_zoned-out",
-    "MarkJoyful": "cobblemon:mark_personality_joyful",
-    "MarkAngry": "cobblemon:mark_personality_angry",
-    "MarkSmiley": "cobblemon:mark_personality_smiley",
-    "MarkTeary": "cobblemon:mark_personality_teary",
-    "MarkUpbeat": "cobblemon:mark_personality_upbeat",
-    "MarkPeeved": "cobblemon:mark_personality_peeved",
-    "MarkIntellectual": "cobblemon:mark_personality_intellectual",
-    "MarkFerocious": "cobblemon:mark_personality_ferocious",
-    "MarkCrafty": "cobblemon:mark_personality_crafty",
-    "MarkScowling": "cobblemon:mark_personality_scowling",
-    "MarkKindly": "cobblemon:mark_personality_kindly",
-    "MarkFlustered": "cobblemon:mark_personality_flustered",
-    "MarkPumpedUp": "cobblemon:mark_personality_pumped-up",
-    "MarkZeroEnergy": "cobblemon:mark_personality_zero_energy",
-    "MarkPrideful": "cobblemon:mark_personality_prideful",
-    "MarkUnsure": "cobblemon:mark_personality_unsure",
-    "MarkHumble": "cobblemon:mark_personality_humble",
-    "MarkThorny": "cobblemon:mark_personality_thorny",
-    "MarkVigor": "cobblemon:mark_personality_vigor",
-    "MarkSlump": "cobblemon:mark_personality_slump",
-    "MarkJumbo": "cobblemon:mark_jumbo",
-    "MarkMini": "cobblemon:mark_mini",
-    "MarkItemfinder": "cobblemon:mark_itemfinder",
-    "MarkPartner": "cobblemon:mark_partner",
-    "MarkGourmand": "cobblemon:mark_gourmand",
-    "MarkAlpha": "cobblemon:mark_alpha",
-    "MarkMightiest": "cobblemon:mark_mightiest",
-    "MarkTitan": "cobblemon:mark_titan",
-    "MarkRevival": "cobblemon:mark_revival",
-}
+
+# Scalar tags every exported Pokémon starts from. Tags are immutable, so a shallow copy of this mapping is a
+# complete independent starting point; merge_pokemon_data then overwrites whatever the JSON file provides.
+POKEMON_SKELETON = MappingProxyType({
+    'Level': nbtlib.Int(1),
+    'Experience': nbtlib.Int(0),
+    'Health': nbtlib.Int(1),
+    'Friendship': nbtlib.Int(0),
+    'Nature': nbtlib.String("cobblemon:hardy"),
+    'Gender': nbtlib.String("GENDERLESS"),
+    'Shiny': nbtlib.Byte(0),
+    'CaughtBall': nbtlib.String("cobblemon:poke_ball"),
+    'HealingTimer': nbtlib.Int(0),
+    'GmaxFactor': nbtlib.Byte(0),
+    'DmaxLevel': nbtlib.Int(0),
+    'TeraType': nbtlib.String("cobblemon:normal"),
+    'ScaleModifier': nbtlib.Float(1.0),
+    'Tradeable': nbtlib.Byte(1),
+    'PokemonOriginalTrainer': nbtlib.String(""),
+})
+
+def new_pokemon_containers():
+    """The mutable parts of a Pokémon compound, fresh for every Pokémon"""
+    return {
+        'Ability': nbtlib.Compound({'AbilityName': nbtlib.String("")}),
+        'IVs': nbtlib.Compound({'Base': nbtlib.Compound(), 'HyperTrained': nbtlib.Compound()}),
+        'EVs': nbtlib.Compound(),
+        'MoveSet': nbtlib.List[nbtlib.Compound](),
+        'Features': nbtlib.List[nbtlib.Compound](),
+        'PersistentData': nbtlib.Compound(),
+    }
 
 def safe_print(text):
     """Print text with safe encoding handling."""
@@ -160,11 +100,6 @@ def select_json_files():
     root = tk.Tk()
     root.withdraw()  # Hide the main window
 
-    response = messagebox.askyesno("Export to Cobblemon?", "Ensure you have a Pokemon in your party/boxes.")
-    if not response:
-        safe_print("Export canceled.")
-        return None
-    
     file_paths = filedialog.askopenfilenames(title="Select Cobblemon JSON file", filetypes=[("JSON Files", "*.json")], initialdir=JSON_DIR)
     if not file_paths:
         safe_print("No files selected. Exiting.")
@@ -196,402 +131,193 @@ def generate_uuid():
     # Using the same range as Java's random.nextInt() which can generate 32-bit signed integers
     return [random.randint(-2147483648, 2147483647) for _ in range(4)]
 
-def detect_dat_type(nbt_data):
-    """Detect whether the .dat file is for party or boxes"""
-    # Check for Box0, Box1, etc.
-    if any(key.startswith('Box') for key in nbt_data.keys()):
-        return 'boxes'
-    # Check for Slot0, Slot1, etc.
-    elif any(key.startswith('Slot') for key in nbt_data.keys()):
-        return 'party'
-    else:
-        return 'unknown'
-
-def find_existing_pokemon_and_free_slots_party(nbt_data, num_needed):
-    """Find an existing Pokémon and multiple free slots in party data"""
-    existing_slot_index = None
-    free_slot_indices = []
-    
-    for i in range(6):  # Check slots 0-5
-        slot_key = f'Slot{i}'
-        slot_data = nbt_data.get(slot_key)
-        
-        if slot_data and 'Species' in slot_data and existing_slot_index is None:
-            existing_slot_index = i
-        elif not slot_data:
-            free_slot_indices.append(i)
-            
-        if existing_slot_index is not None and len(free_slot_indices) >= num_needed:
-            break
-    
-    return existing_slot_index, free_slot_indices[:num_needed]
-
-def find_existing_pokemon_and_free_slots_boxes(nbt_data, num_needed):
-    """Find an existing Pokémon and multiple free slots in box data"""
-    existing_location = None  # (box_index, slot_index)
-    free_locations = []  # [(box_index, slot_index), ...]
-    
-    box_index = 0
-    while True:
-        box_key = f'Box{box_index}'
-        if box_key not in nbt_data:
-            break
-            
-        box_data = nbt_data[box_key]
-        for slot_index in range(30):  # Assuming 30 slots per box
-            slot_key = f'Slot{slot_index}'
-            slot_data = box_data.get(slot_key)
-            
-            if slot_data and 'Species' in slot_data and existing_location is None:
-                existing_location = (box_index, slot_index)
-            elif not slot_data or len(slot_data) == 0:
-                free_locations.append((box_index, slot_index))
-                
-            if existing_location is not None and len(free_locations) >= num_needed:
-                return existing_location, free_locations[:num_needed]
-        
-        box_index += 1
-    
-    return existing_location, free_locations[:num_needed]
-
-def normalize_stat_name(stat_name):
+def build_pokemon(pokemon_info, original_trainer=""):
     """
-    Normalize stat names to match Cobblemon's expected format.
-    Handles variations like defense/defence, special_defense/special_defence.
+    Build a complete Cobblemon Pokémon compound from a JSON dictionary, without needing an existing Pokémon as a template.
+    The Pokémon always gets a fresh UUID, so an export never clones a live Pokémon. The JSON's own UUID is recorded in
+    PersistentData so a later export of the same file is recognised as a duplicate.
+    Returns None if the JSON has no species.
     """
-    if not isinstance(stat_name, str):
+    if not pokemon_info.get('species'):
         return None
-    
-    stat_name = stat_name.lower().strip()
-    
-    # Map common variations to Cobblemon's expected format
-    stat_mapping = {
-        'defense': 'defence',
-        'def': 'defence',
-        'special_defense': 'special_defence',
-        'spdef': 'special_defence',
-        'sp_def': 'special_defence',
-        'sp_defense': 'special_defence',
-        'specialattack': 'special_attack',
-        'spatk': 'special_attack',
-        'sp_atk': 'special_attack',
-        'sp_attack': 'special_attack',
-    }
-    
-    # Check if it's a known variation
-    if stat_name in stat_mapping:
-        return stat_mapping[stat_name]
-    
-    # Check if it's already a valid stat name
-    valid_stats = ['hp', 'attack', 'defence', 'special_attack', 'special_defence', 'speed']
-    if stat_name in valid_stats:
-        return stat_name
-    
-    # Try to match partial names
-    for valid_stat in valid_stats:
-        if valid_stat.replace('_', '') == stat_name.replace('_', ''):
-            return valid_stat
-    
-    return None
-
-def validate_iv_value(value):
-    """Validate that an IV value is between 0 and 31."""
-    try:
-        iv = int(value)
-        if 0 <= iv <= 31:
-            return iv
-        else:
-            safe_print(f"Warning: IV value {iv} is out of range (0-31), clamping to {'31' if iv > 31 else '0'}")
-            return max(0, min(31, iv))
-    except (ValueError, TypeError):
-        safe_print(f"Warning: Invalid IV value '{value}', defaulting to 0")
-        return 0
-
-def validate_ev_value(value):
-    """Validate that an EV value is between 0 and 252."""
+    pokemon = nbtlib.Compound(POKEMON_SKELETON)
+    pokemon.update(new_pokemon_containers())
+    pokemon['UUID'] = nbtlib.List[nbtlib.Int]([nbtlib.Int(u) for u in generate_uuid()])
+    if original_trainer:
+        pokemon['PokemonOriginalTrainer'] = nbtlib.String(original_trainer)
+    pokemon = merge_pokemon_data(pokemon, pokemon_info)
+    source_uuid = pokemon_info.get('uuid')
+    if uuid_from_int_array(source_uuid or []):
+        pokemon['PersistentData'][SOURCE_UUID_TAG] = nbtlib.List[nbtlib.Int]([nbtlib.Int(u) for u in source_uuid])
+    return pokemon
+
+def owner_uuid(dat_file, storage):
+    """The player a .dat file belongs to: its file name for Cobblemon's <uuid>.dat stores, else an existing Pokémon's trainer"""
+    stem = os.path.splitext(os.path.basename(dat_file))[0]
     try:
-        ev = int(value)
-        if 0 <= ev <= 252:
-            return ev
-        else:
-            safe_print(f"Warning: EV value {ev} is out of range (0-252), clamping to {'252' if ev > 252 else '0'}")
-            return max(0, min(252, ev))
-    except (ValueError, TypeError):
-        safe_print(f"Warning: Invalid EV value '{value}', defaulting to 0")
-        return 0
+        return str(uuid.UUID(stem))
+    except ValueError:
+        pass
+    existing = storage.first_pokemon()
+    if existing is not None and 'PokemonOriginalTrainer' in existing:
+        return str(existing['PokemonOriginalTrainer'])
+    return ""
+
+def identity_keys(uuid_values, pid, encryption_constant):
+    """Hashable keys identifying one Pokémon: its UUID, and its PID + encryption constant when it came from a main-series game"""
+    keys = []
+    pokemon_uuid = uuid_from_int_array(uuid_values or [])
+    if pokemon_uuid:
+        keys.append(('uuid', pokemon_uuid))
+    if pid is not None and (pid or encryption_constant):
+        keys.append(('pid_ec', int(pid), int(encryption_constant or 0)))
+    return keys
+
+def compound_identity_keys(compound):
+    persistent_data = compound.get('PersistentData') or {}
+    keys = identity_keys(compound.get('UUID'), persistent_data.get('PID'), persistent_data.get('EncryptionConstant'))
+    # An exported Pokémon is also known by the UUID of the JSON it was built from
+    source_uuid = uuid_from_int_array(persistent_data.get(SOURCE_UUID_TAG) or [])
+    if source_uuid:
+        keys.append(('uuid', source_uuid))
+    return keys
+
+def info_identity_keys(pokemon_info):
+    return identity_keys(pokemon_info.get('uuid'), pokemon_info.get('pid'), pokemon_info.get('encryption_constant'))
+
+def find_duplicates(storage, entries):
+    """
+    Match every entry against the Pokémon already in the storage and the entries before it, using a hash set of
+    identity keys built once. Returns a list aligned with entries holding None (new), ('existing', (box, slot)) or
+    ('entry', index of the earlier entry it repeats).
+    """
+    known = {key: ('existing', position) for position, compound in storage.pokemon.items()
+             for key in compound_identity_keys(compound)}
+    matches = []
+    for index, (_, pokemon_info) in enumerate(entries):
+        keys = info_identity_keys(pokemon_info) if isinstance(pokemon_info, dict) else []
+        match = next((known[key] for key in keys if key in known), None)
+        matches.append(match)
+        if match is None:
+            for key in keys:
+                known[key] = ('entry', index)
+    return matches
+
+def describe_storage(storage):
+    return "party" if storage.layout == "party" else "boxes"
+
+def describe_location(box, slot):
+    """Human readable location used in log output, numbered from 1 like in game"""
+    if box is None:
+        return f"party slot {slot + 1}"
+    return f"box {box + 1}, slot {slot + 1}"
+
+def location_record(box, slot):
+    """Report entry for a position, 1-indexed like the JSON files' box_number/slot_number"""
+    if box is None:
+        return {'party': True, 'slot_number': slot + 1}
+    return {'box_number': box + 1, 'slot_number': slot + 1}
 
 def merge_pokemon_data(existing_slot, new_data):
     """
     Merge new Pokémon data into the existing slot data.
     Only updates fields that are present in the new data.
     """
-    if 'species' in new_data:
-        clean_species = new_data['species'].replace('-', '').lower()
-        existing_slot['Species'] = nbtlib.String(f"cobblemon:{clean_species}")
-    if 'level' in new_data:
-        existing_slot['Level'] = nbtlib.Int(new_data['level'])
-    if 'ability' in new_data:
-        clean_ability = new_data['ability'].replace('-', '').lower()
-        clean_ability = clean_ability.capitalize()
-        existing_slot['Ability'] = nbtlib.Compound({'AbilityName': nbtlib.String(clean_ability)})
-    
-    # Merge IVs with validation and normalization
-    if 'ivs' in new_data:
-        if not isinstance(new_data['ivs'], dict):
-            safe_print("Warning: 'ivs' is not a dictionary, skipping IV merge")
-        else:
-            ivs = nbtlib.Compound()
-            base = nbtlib.Compound()
-            hyper_trained = nbtlib.Compound()  # Empty compound
-            for stat, value in new_data['ivs'].items():
-                normalized_stat = normalize_stat_name(stat)
-                if normalized_stat:
-                    validated_value = validate_iv_value(value)
-                    base[f'cobblemon:{normalized_stat}'] = nbtlib.Int(validated_value)
-                else:
-                    safe_print(f"Warning: Unknown stat name '{stat}' in IVs, skipping")
-            ivs['Base'] = base
-            ivs['HyperTrained'] = hyper_trained
-            existing_slot['IVs'] = ivs
-
-    # Merge EVs with validation and normalization
-    if 'evs' in new_data:
-        if not isinstance(new_data['evs'], dict):
-            safe_print("Warning: 'evs' is not a dictionary, skipping EV merge")
-        else:
-            evs = nbtlib.Compound()  # Start fresh
-            for stat, value in new_data['evs'].items():
-                normalized_stat = normalize_stat_name(stat)
-                if normalized_stat:
-                    validated_value = validate_ev_value(value)
-                    evs[f'cobblemon:{normalized_stat}'] = nbtlib.Int(validated_value)
-                else:
-                    safe_print(f"Warning: Unknown stat name '{stat}' in EVs, skipping")
-            existing_slot['EVs'] = evs
-
-    # Handle moves
-    if 'moves' in new_data:
-        # First, check if an existing MoveSet is present to understand its structure
-        if 'MoveSet' in existing_slot:
-            #print(f"DEBUG: Found existing MoveSet structure: {type(existing_slot['MoveSet'])}")
-            
-            # Create an empty MoveSet with the same structure as the existing one
-            move_list = type(existing_slot['MoveSet'])()
-            
-            # Clear the existing moves (since we're creating a new Pokémon)
-            while len(move_list) > 0:
-                move_list.pop()
-        else:
-            # No existing MoveSet, create a basic list
-            move_list = nbtlib.List()
-            #print(f"DEBUG: Created new MoveSet list: {type(move_list)}")
-        
-        # Add moves from the JSON
-        for move_name in new_data['moves']:
-            if move_name and isinstance(move_name, str):
-                clean_move_name = move_name.replace('-', '').lower()
-                
-                # Create a move entry based on the structure we saw in screenshots
-                # Use a Python dictionary first, then convert to nbtlib Compound
-                move_dict = {
-                    'RaisedPPStages': nbtlib.Int(0),
-                    'MoveName': nbtlib.String(clean_move_name),
-                    'MovePP': nbtlib.Int(5)  # Default PP value of 5
-                }
-                
-                try:
-                    # Try to append the move to the list
-                    move_list.append(nbtlib.Compound(move_dict))
-                    safe_print(f"Successfully added move {clean_move_name}")
-                except Exception as e:
-                    safe_print(f"Error adding move: {e}")
-                    # Try fallback approach - add directly without wrapping in Compound
-                    try:
-                        move_list.append(move_dict)
-                    except Exception as e2:
-                        safe_print(f"Fallback also failed: {e2}")
-        
-        existing_slot['MoveSet'] = move_list
-
-    # Merge other fields if they exist
-    if 'nature' in new_data:
-        clean_nature = new_data['nature'].replace('-', '').lower()
-        existing_slot['Nature'] = nbtlib.String(f"cobblemon:{clean_nature}")
-    if 'health' in new_data:
-        existing_slot['Health'] = nbtlib.Int(new_data['health'])
-    if 'experience' in new_data:
-        existing_slot['Experience'] = nbtlib.Int(new_data['experience'])
-    if 'shiny' in new_data:
-        existing_slot['Shiny'] = nbtlib.Byte(new_data['shiny'])
-    if 'caught_ball' in new_data:
-        existing_slot['CaughtBall'] = nbtlib.String(new_data['caught_ball'].lower())
-    if 'gender' in new_data:
-        existing_slot['Gender'] = nbtlib.String(new_data['gender'])
-    if 'friendship' in new_data:
-        existing_slot['Friendship'] = nbtlib.Int(new_data['friendship'])
-    if 'healing_timer' in new_data:
-        existing_slot['HealingTimer'] = nbtlib.Int(new_data['healing_timer'])
-    if 'gmax_factor' in new_data:
-        existing_slot['GmaxFactor'] = nbtlib.Byte(new_data['gmax_factor'])
-    if 'gmax_level' in new_data:
-        existing_slot['DmaxLevel'] = nbtlib.Int(new_data['gmax_level'])
-    # Set tera_type with a default value of "cobblemon:normal" if not present or empty
-    if 'tera_type' in new_data and new_data['tera_type'].strip():
-        tera_type_value = new_data['tera_type'].lower()
-        if not tera_type_value.startswith("cobblemon:"):
-            tera_type_value = "cobblemon:" + tera_type_value
-        existing_slot['TeraType'] = nbtlib.String(tera_type_value)
-    else:
-        # Default to normal type if tera_type is missing or empty
-        existing_slot['TeraType'] = nbtlib.String("cobblemon:normal")
-    if 'form_id' in new_data:
-        existing_slot['FormId'] = nbtlib.String(new_data['form_id'])
-    if 'uuid' in new_data:
-        new_uuid = generate_uuid()
-        existing_slot['UUID'] = nbtlib.List[nbtlib.Int]([nbtlib.Int(u) for u in new_uuid])
-    if 'scale_modifier' in new_data:
-        existing_slot['ScaleModifier'] = nbtlib.Float(new_data['scale_modifier'])
-    if 'nickname' in new_data:
-        existing_slot['Nickname'] = nbtlib.String(new_data['nickname'])
-    
-    # Handle Marks (top level, not in PersistentData)
-    if 'marks' in new_data and new_data['marks']:
-        converted_marks = []
-        for mark_name in new_data['marks']:
-            mapped_name = MARK_NAME_MAP.get(mark_name)
-            if mapped_name:
-                converted_marks.append(nbtlib.String(mapped_name))
-            else:
-                safe_print(f"Warning: Unknown mark/ribbon '{mark_name}' - skipping.")
-        if converted_marks:
-            existing_slot['Marks'] = nbtlib.List[nbtlib.String](converted_marks)
+    return encode_pokemon(existing_slot, new_data)
 
-    # Handle PersistentData/CobbleExtraData
-    persistent_data = existing_slot.get('PersistentData', nbtlib.Compound())
-    
-    if 'met_location' in new_data:
-        persistent_data['MetLocation'] = nbtlib.String(new_data['met_location'])
-    if 'met_level' in new_data:
-        persistent_data['MetLevel'] = nbtlib.Int(new_data['met_level'])
-    if 'met_date' in new_data:
-        persistent_data['MetDate'] = nbtlib.String(new_data['met_date'])
-    if 'tid' in new_data and new_data['tid'] is not None:
-        persistent_data['TID'] = nbtlib.Long(new_data['tid'])
-    if 'pid' in new_data and new_data['pid'] is not None:
-        persistent_data['PID'] = nbtlib.Long(new_data['pid'])
-    if 'sid' in new_data and new_data['sid'] is not None:
-        persistent_data['SID'] = nbtlib.Long(new_data['sid'])
-    if 'language' in new_data:
-        persistent_data['Language'] = nbtlib.Int(new_data['language'])
-    if 'origin_game' in new_data:
-        persistent_data['OriginGame'] = nbtlib.String(new_data['origin_game'])
-    if 'original_trainer' in new_data:
-        persistent_data['OriginalTrainer'] = nbtlib.String(new_data['original_trainer'])
-
-    # Restore Home Tracker, Encryption Constant, Height, Weight, Scale, Ribbons, and Relearn Move Flags
-    if 'home_tracker' in new_data:
-        persistent_data['HomeTracker'] = nbtlib.Long(new_data['home_tracker'])
-    if 'encryption_constant' in new_data:
-        persistent_data['EncryptionConstant'] = nbtlib.Long(new_data['encryption_constant'])
-    if 'height' in new_data:
-        persistent_data['Height'] = nbtlib.Int(new_data['height'])
-    if 'weight' in new_data:
-        persistent_data['Weight'] = nbtlib.Int(new_data['weight'])
-    if 'scale' in new_data:
-        persistent_data['Scale'] = nbtlib.Int(new_data['scale'])
-    if 'ribbons' in new_data:
-        persistent_data['Ribbons'] = nbtlib.List[nbtlib.Int]([nbtlib.Int(r) for r in new_data['ribbons']])
-    if 'relearn_flags' in new_data:
-        persistent_data['RelearnFlags'] = nbtlib.List[nbtlib.Byte]([nbtlib.Byte(f) for f in new_data['relearn_flags']])
-    if 'fateful_encounter' in new_data:
-        persistent_data['FatefulEncounter'] = nbtlib.Byte(new_data['fateful_encounter'])
-
-    # Handle memory data
-    if 'memories' in new_data:
-        memory_data = new_data['memories']
-        persistent_data = existing_slot.get('PersistentData', nbtlib.Compound())
-        memories = nbtlib.Compound({
-            'MemoryType': nbtlib.Int(memory_data.get('memory_type', 0)),
-            'MemoryIntensity': nbtlib.Int(memory_data.get('memory_intensity', 0)),
-            'MemoryFeeling': nbtlib.Int(memory_data.get('memory_feeling', 0)),
-            'MemoryVariable': nbtlib.Int(memory_data.get('memory_variable', 0)),
-        })
-        persistent_data['Memories'] = memories
-
-    # Add egg data
-    if 'egg_location' in new_data:
-        persistent_data['EggLocation'] = nbtlib.String(new_data['egg_location'])
-    if 'egg_date' in new_data:
-        persistent_data['EggDate'] = nbtlib.String(new_data['egg_date'])
-    if 'is_egg' in new_data:
-        persistent_data['IsEgg'] = nbtlib.Byte(1 if new_data['is_egg'] else 0)
-
-    # Add Pokérus data
-    if 'pokerus_strain' in new_data:
-        persistent_data['PokerusStrain'] = nbtlib.Int(new_data['pokerus_strain'])
-    if 'pokerus_days' in new_data:
-        persistent_data['PokerusDays'] = nbtlib.Int(new_data['pokerus_days'])
-
-    # Add handler data
-    if 'current_handler' in new_data:
-        persistent_data['CurrentHandler'] = nbtlib.Int(new_data['current_handler'])
-    if 'handling_trainer_name' in new_data:
-        persistent_data['HandlingTrainerName'] = nbtlib.String(new_data['handling_trainer_name'])
-    if 'handling_trainer_gender' in new_data:
-        persistent_data['HandlingTrainerGender'] = nbtlib.Int(new_data['handling_trainer_gender'])
-    if 'handling_trainer_friendship' in new_data:
-        persistent_data['HandlingTrainerFriendship'] = nbtlib.Int(new_data['handling_trainer_friendship'])
-    if 'original_trainer_gender' in new_data:
-        persistent_data['OriginalTrainerGender'] = nbtlib.Int(new_data['original_trainer_gender'])
-
-    # Add ability and nature data
-    if 'ability_number' in new_data:
-        persistent_data['AbilityNumber'] = nbtlib.Int(new_data['ability_number'])
-    if 'stat_nature' in new_data:
-        if new_data['stat_nature']:  # Only set if not empty
-            persistent_data['StatNature'] = nbtlib.String(new_data['stat_nature'])
-
-    # Add stats and type data
-    if 'characteristic' in new_data:
-        persistent_data['Characteristic'] = nbtlib.Int(new_data['characteristic'])
-    if 'tsv' in new_data:
-        persistent_data['TSV'] = nbtlib.Int(new_data['tsv'])
-    if 'psv' in new_data:
-        persistent_data['PSV'] = nbtlib.Int(new_data['psv'])
-    if 'hp_type' in new_data:
-        persistent_data['HPType'] = nbtlib.Int(new_data['hp_type'])
-    if 'hp_power' in new_data:
-        persistent_data['HPPower'] = nbtlib.Int(new_data['hp_power'])
-    if 'iv_total' in new_data:
-        persistent_data['IVTotal'] = nbtlib.Int(new_data['iv_total'])
-    if 'potential_rating' in new_data:
-        persistent_data['PotentialRating'] = nbtlib.Int(new_data['potential_rating'])
-
-    # Add relearn moves
-    if 'relearn_move1' in new_data:
-        persistent_data['RelearnMove1'] = nbtlib.Int(new_data['relearn_move1'])
-    if 'relearn_move2' in new_data:
-        persistent_data['RelearnMove2'] = nbtlib.Int(new_data['relearn_move2'])
-    if 'relearn_move3' in new_data:
-        persistent_data['RelearnMove3'] = nbtlib.Int(new_data['relearn_move3'])
-    if 'relearn_move4' in new_data:
-        persistent_data['RelearnMove4'] = nbtlib.Int(new_data['relearn_move4'])
-
-    existing_slot['PersistentData'] = persistent_data
-
-    return existing_slot
+def is_gzipped(file_path):
+    with open(file_path, 'rb') as f:
+        return f.read(2) == b'\x1f\x8b'
+
+def backup_path(file_path):
+    """
+    Where file_path's backups go: BACKUP_DIR/<world>-<id>/<path inside the world>, e.g.
+    cache/backups/world-1a2b3c4d/pokemon/pcstore/<uuid>.dat. A .dat outside a world is kept under its own folder's
+    name instead. The id tells apart worlds (or folders) with the same name.
+    """
+    file_path = os.path.realpath(file_path)
+    root = find_world_dir(file_path) or os.path.dirname(file_path)
+    folder = f"{os.path.basename(root) or 'root'}-{hashlib.sha1(root.encode('utf-8')).hexdigest()[:8]}"
+    return os.path.join(BACKUP_DIR, folder, os.path.relpath(file_path, root))
+
+def rotate_backups(file_path, count=BACKUP_COUNT):
+    """Shift <backup>.bak -> <backup>.bak.1 -> ... and make <backup>.bak a copy of the current file (see backup_path)"""
+    if count <= 0 or not os.path.exists(file_path):
+        return
+    backup = backup_path(file_path)
+    os.makedirs(os.path.dirname(backup), exist_ok=True)
+    backups = [f"{backup}.bak"] + [f"{backup}.bak.{i}" for i in range(1, count)]
+    for older, newer in reversed(list(zip(backups[1:], backups[:-1]))):
+        if os.path.exists(newer):
+            os.replace(newer, older)
+    try:
+        # A hard link is instant and leaves the original in place until the rename below (same file system only)
+        os.link(file_path, backups[0])
+    except OSError:
+        shutil.copy2(file_path, backups[0])
 
 def save_nbt_to_dat(nbt_data, file_path):
+    """
+    Write the in-memory tree as the complete .dat file: serialise once to a temp file in the same
+    directory, fsync it, back up the current file and atomically rename the temp file over it.
+    A crash at any point leaves either the old or the new file, never a half-written one.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    if isinstance(nbt_data, nbtlib.File):
+        gzipped, byteorder = nbt_data.gzipped, nbt_data.byteorder
+    else:
+        nbt_data = nbtlib.File(nbt_data)
+        gzipped, byteorder = (is_gzipped(file_path) if os.path.exists(file_path) else True), 'big'
+    
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(file_path)}-", suffix='.tmp', dir=directory)
     try:
-        existing_data = nbtlib.load(file_path) if os.path.exists(file_path) else nbtlib.File()
-        existing_data.update(nbt_data)
-        existing_data.save(file_path)
+        with os.fdopen(fd, 'wb') as raw_file:
+            if gzipped:
+                with gzip.GzipFile(fileobj=raw_file, mode='wb') as gzip_file:
+                    nbt_data.write(gzip_file, byteorder)
+            else:
+                nbt_data.write(raw_file, byteorder)
+            raw_file.flush()
+            os.fsync(raw_file.fileno())
+        if os.path.exists(file_path):
+            shutil.copymode(file_path, temp_path)
+        rotate_backups(file_path)
+        os.replace(temp_path, file_path)
+        if hasattr(os, 'O_DIRECTORY'):
+            # Make the rename itself durable (POSIX only)
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        record_own_write(file_path)
         safe_print(f"Saved NBT data to {file_path}")
+        return True
     except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
         safe_print(f"Error saving NBT file: {e}")
+        return False
 
-def process_files(json_files, dat_file):
-    """Process the JSON and DAT files"""
+def export_pokemon(entries, dat_file, policy="fill", box=None, report=None, duplicates="skip"):
+    """
+    Insert (label, pokemon_info) entries into one .dat file: the file is loaded once, every Pokémon is inserted
+    and it is written back once. Positions come from the placement policy (see StorageLayout.plan); Pokémon that
+    don't fit are reported and the rest are still exported. Where each entry went is appended to report, if given.
+    Pokémon the file already holds are skipped or updated in place (duplicates="skip"/"update"); with "allow" every
+    entry is added as a new copy. Every new Pokémon gets a fresh UUID (see build_pokemon).
+    Returns True only if every Pokémon was exported.
+    """
+    return export_jobs(dat_file, [(entries, policy, box, duplicates)], report)
+
+def export_jobs(dat_file, jobs, report=None):
+    """
+    export_pokemon for several (entries, policy, box, duplicates) jobs in a single load/save cycle: each job is
+    placed with its own options, after the Pokémon of the jobs before it. The file is written, and its backups
+    rotated, once. Returns True only if every Pokémon of every job was exported.
+    """
+    report = report if report is not None else []
+    first_record = len(report)
     # Load the existing NBT file
     try:
         nbt_data = nbtlib.load(dat_file)
@@ -599,119 +325,351 @@ def process_files(json_files, dat_file):
         safe_print(f"Error loading NBT file: {e}")
         return False
 
-    # Detect the type of .dat file
-    dat_type = detect_dat_type(nbt_data)
-    safe_print(f"Detected .dat type: {dat_type}")
-
-    if dat_type == 'party':
-        # Handle party data
-        existing_slot_index, free_slot_indices = find_existing_pokemon_and_free_slots_party(nbt_data, len(json_files))
-        
-        if existing_slot_index is None:
-            safe_print("No existing Pokémon found to duplicate in party.")
-            return False
-        
-        if len(free_slot_indices) < len(json_files):
-            safe_print(f"Only {len(free_slot_indices)} free slots available in party, but {len(json_files)} JSON files were selected.")
-            return False
-        
-        safe_print(f"Found existing Pokémon in party slot {existing_slot_index}")
-        safe_print(f"Will duplicate to {len(free_slot_indices)} free slots: {free_slot_indices}")
-
-        # Get the existing slot data
-        existing_slot_key = f'Slot{existing_slot_index}'
-        existing_slot_data = nbt_data[existing_slot_key]
+    # Detect the layout of the .dat file (party, or any PC layout the importer reads)
+    storage = load_layout(nbt_data, default=layout_hint(dat_file))
+    if storage is None:
+        safe_print("Unknown .dat file format. Cannot process.")
+        return False
+    safe_print(f"Detected .dat layout: {storage.layout}")
+
+    original_trainer = owner_uuid(dat_file, storage)
+    exported = 0
+    complete = True
+    for entries, policy, box, duplicates in jobs:
+        result = insert_entries(storage, entries, dat_file, policy, box, report, duplicates, original_trainer)
+        if result is None:
+            complete = False
+            continue
+        job_exported, done = result
+        exported += job_exported
+        complete = complete and done == len(entries)
+
+    if exported == 0:
+        safe_print("No Pokémon were exported.")
+        return complete
+    # Save the modified NBT data
+    if not save_nbt_to_dat(nbt_data, dat_file):
+        for record in report[first_record:]:
+            if 'error' not in record:
+                record['error'] = "save failed"
+        return False
+    safe_print(f"Successfully processed {exported} Pokémon")
+    return complete
 
-        # Process each JSON file to a separate slot
-        for idx, json_file in enumerate(json_files):
-            free_slot_index = free_slot_indices[idx]
-            free_slot_key = f'Slot{free_slot_index}'
-            
-            # Deep copy the existing slot data
-            duplicated_data = copy.deepcopy(existing_slot_data)
-            
-            # Generate a new UUID for the duplicated Pokémon
-            new_uuid = generate_uuid()
-            duplicated_data['UUID'] = nbtlib.List[nbtlib.Int]([nbtlib.Int(u) for u in new_uuid])
-            
-            # Load and merge the JSON data
-            pokemon_info = load_json(json_file)
-            if pokemon_info:
-                # Merge the new data into the duplicated slot
-                duplicated_data = merge_pokemon_data(duplicated_data, pokemon_info)
-                nbt_data[free_slot_key] = duplicated_data
-                safe_print(f"Processed Pokémon from {os.path.basename(json_file)} into party slot {free_slot_index}")
-            else:
-                safe_print(f"Skipping invalid JSON file: {json_file}")
+def insert_entries(storage, entries, dat_file, policy, box, report, duplicates, original_trainer):
+    """
+    Place one job's entries into a loaded storage without saving it (see export_pokemon).
+    Returns (exported, done): the Pokémon added or updated, and the entries that need nothing more (exported,
+    updated or skipped as a duplicate); or None if the placement itself is impossible.
+    """
+    matches = [None] * len(entries) if duplicates == "allow" else find_duplicates(storage, entries)
+    new_indices = [index for index, match in enumerate(matches) if match is None]
+    if len(new_indices) < len(entries):
+        safe_print(f"{len(entries) - len(new_indices)} Pokémon are already in this file and will be {'updated' if duplicates == 'update' else 'skipped'}")
 
-    elif dat_type == 'boxes':
-        # Handle box data
-        existing_location, free_locations = find_existing_pokemon_and_free_slots_boxes(nbt_data, len(json_files))
-        
-        if existing_location is None:
-            safe_print("No existing Pokémon found to duplicate in boxes.")
-            return False
-        
-        if len(free_locations) < len(json_files):
-            safe_print(f"Only {len(free_locations)} free slots available in boxes, but {len(json_files)} JSON files were selected.")
-            return False
-        
-        existing_box, existing_slot = existing_location
-        safe_print(f"Found existing Pokémon in box {existing_box}, slot {existing_slot}")
-        safe_print(f"Will duplicate to {len(free_locations)} free locations")
-
-        # Get the existing slot data
-        existing_box_key = f'Box{existing_box}'
-        existing_slot_key = f'Slot{existing_slot}'
-        existing_slot_data = nbt_data[existing_box_key][existing_slot_key]
-
-        # Process each JSON file to a separate slot
-        for idx, json_file in enumerate(json_files):
-            free_box, free_slot = free_locations[idx]
-            free_box_key = f'Box{free_box}'
-            free_slot_key = f'Slot{free_slot}'
-            
-            # Ensure the box exists
-            if free_box_key not in nbt_data:
-                nbt_data[free_box_key] = nbtlib.Compound()
-            
-            # Deep copy the existing slot data
-            duplicated_data = copy.deepcopy(existing_slot_data)
-            
-            # Generate a new UUID for the duplicated Pokémon
-            new_uuid = generate_uuid()
-            duplicated_data['UUID'] = nbtlib.List[nbtlib.Int]([nbtlib.Int(u) for u in new_uuid])
-            
-            # Load and merge the JSON data
-            pokemon_info = load_json(json_file)
-            if pokemon_info:
-                # Merge the new data into the duplicated slot
-                duplicated_data = merge_pokemon_data(duplicated_data, pokemon_info)
-                nbt_data[free_box_key][free_slot_key] = duplicated_data
-                safe_print(f"Processed Pokémon from {os.path.basename(json_file)} into box {free_box}, slot {free_slot}")
+    species = [entries[index][1].get('species') if isinstance(entries[index][1], dict) else None for index in new_indices]
+    try:
+        planned = storage.plan(species, policy, box)
+    except ValueError as e:
+        safe_print(f"Error: {e}")
+        return None
+    positions = [None] * len(entries)
+    for index, position in zip(new_indices, planned):
+        positions[index] = position
+    placed = sum(1 for position in planned if position is not None)
+    if placed < len(new_indices):
+        safe_print(f"Only {placed} free slots available in the {describe_storage(storage)} for {len(new_indices)} Pokémon; the rest will be skipped.")
+    safe_print(f"Will export to {placed} free locations ({policy} placement)")
+
+    # Build each Pokémon from its JSON data into its planned slot
+    exported = 0
+    done = 0  # Entries that need nothing more: exported, updated or skipped as a duplicate
+    for index, (position, match, (label, pokemon_info)) in enumerate(zip(positions, matches, entries)):
+        record = {'dat': dat_file, 'source': label}
+        report.append(record)
+        if match is not None:
+            kind, target = match
+            if kind == 'entry':
+                target = positions[target]
+            if target is None:
+                record['error'] = "duplicate of an entry that was not exported"
+                continue
+            done += 1
+            if duplicates == "update":
+                merge_pokemon_data(storage.pokemon[target], pokemon_info)
+                record.update(location_record(*target), updated=True)
+                exported += 1
+                safe_print(f"Updated Pokémon in {describe_location(*target)} from {label}")
             else:
-                safe_print(f"Skipping invalid JSON file: {json_file}")
-
-    else:
-        safe_print("Unknown .dat file format. Cannot process.")
+                record.update(location_record(*target), skipped="duplicate")
+                safe_print(f"Skipping {label}: already in {describe_location(*target)}")
+            continue
+        if position is None:
+            record['error'] = "no free slot"
+            continue
+        pokemon = None
+        if isinstance(pokemon_info, dict):
+            pokemon = build_pokemon(pokemon_info, original_trainer)
+        if pokemon is None:
+            positions[index] = None
+            record['error'] = "invalid JSON"
+            safe_print(f"Skipping invalid JSON file: {label}")
+            continue
+        storage.insert(*position, pokemon)
+        record.update(location_record(*position))
+        exported += 1
+        done += 1
+        safe_print(f"Processed Pokémon from {label} into {describe_location(*position)}")
+
+    return exported, done
+
+def hold_export(entries, dat_file, reason, report, queue=None, options=()):
+    """
+    Don't write to a .dat a running server may have open: the server would save its own copy over the change.
+    The export is refused, or added to queue with its (policy, box, duplicates) options. Returns True if queued.
+    """
+    safe_print(f"Not writing to {dat_file}: {reason}")
+    if queue is None:
+        report.extend({'dat': dat_file, 'source': label, 'error': "server may be running"} for label, _ in entries)
+        safe_print("Stop the server and export again, or queue the export with --if-server-running queue.")
         return False
-
-    # Save the modified NBT data
-    save_nbt_to_dat(nbt_data, dat_file)
-    safe_print(f"Successfully processed {len(json_files)} Pokémon")
+    queue.add(dat_file, entries, *options)
+    report.extend({'dat': dat_file, 'source': label, 'queued': True} for label, _ in entries)
+    safe_print(f"Queued {len(entries)} Pokémon; run the exporter with --apply-queue once the server is stopped")
     return True
 
+def process_files(json_files, dat_file, policy="fill", box=None, duplicates="skip", busy="refuse"):
+    """Process the JSON and DAT files"""
+    entries = [(os.path.basename(json_file), load_json(json_file)) for json_file in json_files]
+    validate_entries(entries)
+    reason = None if busy == "force" else busy_targets([dat_file]).get(dat_file)
+    if reason:
+        queue = ExportQueue().load() if busy == "queue" else None
+        queued = hold_export(entries, dat_file, reason, [], queue, (policy, box, duplicates))
+        if queue is not None:
+            queue.save()
+        return queued
+    try:
+        return export_pokemon(entries, dat_file, policy, box, duplicates=duplicates)
+    finally:
+        flush_own_writes()
+
+def expand_source(path):
+    """The JSON files and bundles a batch source names: the file itself, or every one directly inside a folder"""
+    if os.path.isdir(path):
+        return [os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.endswith('.json') or is_bundle(name)]
+    return [path]
+
+def load_source(path, cache):
+    """(label, pokemon_info) for every Pokémon in a JSON file or bundle; each file is parsed once per run"""
+    if path not in cache:
+        name = os.path.basename(path)
+        if is_bundle(path):
+            try:
+                cache[path] = [(f"{name}#{index}", pokemon_info) for index, pokemon_info in enumerate(read_bundle(path), 1)]
+            except (OSError, EOFError) as e:
+                safe_print(f"Error loading bundle {path}: {e}")
+                cache[path] = []
+        else:
+            cache[path] = [(name, load_json(path))]
+    return cache[path]
+
+def load_manifest(manifest_path):
+    """
+    Read a batch export manifest and group it by target .dat file.
+    The manifest is a JSON object mapping a JSON file, bundle or folder of them to one target .dat path or a list of them:
+        {"rewards/pikachu.json": ["pcstore/<uuid-1>.dat", "pcstore/<uuid-2>.dat"], "starters/": "pcstore/<uuid-3>.dat"}
+    Relative paths are resolved against the manifest's folder.
+    Returns ({dat_file: [source, ...]}, None) or (None, error).
+    """
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError) as e:
+        return None, f"Error loading manifest {manifest_path}: {e}"
+    if not isinstance(manifest, dict):
+        return None, f"Manifest {manifest_path} must be a JSON object mapping JSON files or folders to .dat files"
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    groups = {}
+    for source, targets in manifest.items():
+        if isinstance(targets, str):
+            targets = [targets]
+        if not isinstance(targets, list) or not all(isinstance(target, str) for target in targets):
+            return None, f"Manifest entry {source!r} must map to a .dat path or a list of them"
+        source_path = os.path.join(base_dir, source)
+        if not os.path.exists(source_path):
+            return None, f"Manifest source not found: {source_path}"
+        for target in targets:
+            groups.setdefault(os.path.normpath(os.path.join(base_dir, target)), []).extend(expand_source(source_path))
+    # A file listed twice for the same target is only exported once
+    return {dat_file: list(dict.fromkeys(sources)) for dat_file, sources in groups.items()}, None
+
+def validate_entries(entries):
+    """Check the IVs/EVs of (label, pokemon_info) entries in one pass and print the problems grouped by kind"""
+    report = validate_stats(entries)
+    for line in format_report(report):
+        safe_print(line)
+    return report
+
+def validate_sources(sources, cache):
+    """validate_entries for every Pokémon in the sources; a source listed for several targets is checked once"""
+    return validate_entries([entry for source in dict.fromkeys(sources) for entry in load_source(source, cache)])
+
+def export_batch(groups, policy="fill", box=None, report=None, duplicates="skip", busy="refuse"):
+    """
+    Export {dat_file: [json or bundle path, ...]} without any dialogs. Each JSON file is parsed once however many
+    targets it goes to, and each .dat file is loaded and written once. Targets a running server may have open are
+    refused or queued (busy="refuse"/"queue"); they are all checked before the first write, so the batch's own saves
+    aren't taken for server activity. Returns {dat_file: success}; a queued target counts as a success.
+    The stats of the whole batch are validated first, so problems are listed together before any .dat is touched.
+    """
+    report = report if report is not None else []
+    cache = {}
+    validate_sources([source for sources in groups.values() for source in sources], cache)
+    results = {}
+    held = {} if busy == "force" else busy_targets([dat_file for dat_file in groups if os.path.exists(dat_file)])
+    queue = ExportQueue().load() if held and busy == "queue" else None
+    for dat_file, sources in groups.items():
+        entries = [entry for source in sources for entry in load_source(source, cache)]
+        safe_print(f"\n{dat_file}: exporting {len(entries)} Pokémon")
+        if not os.path.exists(dat_file):
+            safe_print(f"Error: .dat file not found: {dat_file}")
+            report.extend({'dat': dat_file, 'source': label, 'error': ".dat file not found"} for label, _ in entries)
+            results[dat_file] = False
+            continue
+        if dat_file in held:
+            results[dat_file] = hold_export(entries, dat_file, held[dat_file], report, queue, (policy, box, duplicates))
+            continue
+        results[dat_file] = export_pokemon(entries, dat_file, policy, box, report, duplicates)
+    flush_own_writes()
+    if queue is not None:
+        queue.save()
+    queued = len(held) if queue is not None else 0
+    written = sum(1 for success in results.values() if success) - queued
+    safe_print(f"\nBatch export finished: {written} of {len(results)} .dat files fully exported"
+               + (f", {queued} queued until the server is stopped" if queued else ""))
+    for dat_file, success in results.items():
+        if not success:
+            safe_print(f"Not fully exported: {dat_file}")
+    return results
+
+def apply_queue(report=None, force=False):
+    """
+    Apply every queued export in one pass once the server is stopped: all jobs for the same .dat are applied in one
+    load/save cycle, each with the options it was queued with. Targets a server still has open stay queued and
+    count as failures.
+    Returns {dat_file: success}.
+    """
+    report = report if report is not None else []
+    queue = ExportQueue().load()
+    groups = queue.grouped()
+    if not groups:
+        safe_print("The export queue is empty.")
+        return {}
+    held = {} if force else busy_targets(list(groups))
+    for dat_file, reason in held.items():
+        safe_print(f"Keeping queued exports for {dat_file}: {reason}")
+    results = {}
+    for dat_file, jobs in groups.items():
+        if dat_file in held:
+            continue
+        safe_print(f"\n{dat_file}: applying {sum(len(entries) for entries, _, _, _ in jobs)} queued Pokémon")
+        if not os.path.exists(dat_file):
+            safe_print(f"Error: .dat file not found: {dat_file}")
+            report.extend({'dat': dat_file, 'source': label, 'error': ".dat file not found"}
+                          for entries, _, _, _ in jobs for label, _ in entries)
+            results[dat_file] = False
+            continue
+        results[dat_file] = export_jobs(dat_file, jobs, report)
+    flush_own_writes()
+    # Applied jobs leave the queue even if some Pokémon didn't fit; the log and report say which
+    queue.remove(results)
+    queue.save()
+    written = sum(1 for success in results.values() if success)
+    safe_print(f"\nQueue applied: {written} of {len(results)} .dat files fully exported"
+               + (f", {len(held)} still waiting for the server to stop" if held else ""))
+    for dat_file, success in results.items():
+        if not success:
+            safe_print(f"Not fully exported: {dat_file}")
+    return {**results, **dict.fromkeys(held, False)}
+
+def write_report(path, report):
+    try:
+        with open(path, 'w', encoding='utf-8') as report_file:
+            json.dump(report, report_file, indent=4)
+        safe_print(f"Report written to {path}")
+    except OSError as e:
+        safe_print(f"Error writing report {path}: {e}")
+
 def main():
     # Parse command-line arguments
     parser = argparse.ArgumentParser(description='Export Pokémon from JSON to Cobblemon DAT file')
-    parser.add_argument('--json', type=str, help='Path to a JSON file to export (CLI mode)')
+    parser.add_argument('--json', type=str, nargs='+', help='JSON files, bundles or folders to export (CLI mode)')
+    parser.add_argument('--dat', type=str, help='Target .dat file for --json; skips the file dialog')
+    parser.add_argument('--manifest', type=str, help='Batch export: JSON manifest mapping JSON files/folders to .dat files')
+    parser.add_argument('--policy', choices=PLACEMENT_POLICIES, default='fill',
+                        help='Where new Pokémon go: fill boxes in order (default), spread across boxes, keep each species together, or one --box')
+    parser.add_argument('--box', type=int, help='Box to export into, numbered from 1 like in game (implies --policy box)')
+    parser.add_argument('--report', type=str, help='Write where each Pokémon was placed (or why it was not) as JSON to this path')
+    parser.add_argument('--on-duplicate', choices=DUPLICATE_ACTIONS[:2], default='skip',
+                        help='What to do with a Pokémon the .dat already holds (same UUID or PID/encryption constant): skip it (default) or update it in place')
+    parser.add_argument('--allow-duplicates', action='store_true', help='Export every Pokémon as a new copy with a fresh UUID, even if it is already there')
+    parser.add_argument('--if-server-running', choices=BUSY_ACTIONS[:2], default='refuse',
+                        help="What to do when the target world is open in a server (its session.lock is held, or its .dat files were just written): refuse (default) or queue the export")
+    parser.add_argument('--apply-queue', action='store_true', help='Apply every queued export in one pass; run while the server is stopped')
+    parser.add_argument('--force', action='store_true', help='Write even if a server seems to have the world open')
+    parser.add_argument('--validate', action='store_true',
+                        help='Only check the IVs/EVs of the --json or --manifest selection and list the problems (written to --report if given); nothing is exported')
     args = parser.parse_args()
+    duplicates = 'allow' if args.allow_duplicates else args.on_duplicate
+    busy = 'force' if args.force else args.if_server_running
+    if args.box is not None:
+        if args.box < 1:
+            parser.error("--box is numbered from 1")
+        args.policy = 'box'
+    elif args.policy == 'box':
+        parser.error("--policy box needs --box")
+    box = args.box - 1 if args.box is not None else None
+    
+    if args.apply_queue:
+        report = []
+        results = apply_queue(report, args.force)
+        if args.report:
+            write_report(args.report, report)
+        sys.exit(0 if all(results.values()) else 1)
+
+    # Batch mode: fully headless
+    if args.manifest or (args.json and (args.dat or args.validate)):
+        if args.manifest:
+            groups, error = load_manifest(args.manifest)
+            if error:
+                safe_print(error)
+                sys.exit(1)
+        else:
+            missing = [path for path in args.json if not os.path.exists(path)]
+            if missing:
+                safe_print(f"Error: JSON file not found: {', '.join(missing)}")
+                sys.exit(1)
+            groups = {args.dat: list(dict.fromkeys(path for source in args.json for path in expand_source(source)))}
+        if args.validate:
+            report = validate_sources([source for sources in groups.values() for source in sources], {})
+            if args.report:
+                write_report(args.report, report)
+            sys.exit(0 if not report['problems'] else 1)
+        report = []
+        results = export_batch(groups, args.policy, box, report, duplicates, busy)
+        if args.report:
+            write_report(args.report, report)
+        sys.exit(0 if results and all(results.values()) else 1)
     
     # CLI mode
     if args.json:
-        # Verify JSON file exists
-        if not os.path.exists(args.json):
-            safe_print(f"Error: JSON file not found: {args.json}")
+        # Verify JSON files exist
+        missing = [path for path in args.json if not os.path.exists(path)]
+        if missing:
+            safe_print(f"Error: JSON file not found: {', '.join(missing)}")
             return
             
         # Ask for DAT file
@@ -721,8 +679,7 @@ def main():
             return
             
         # Process the files
-        json_files = [args.json]
-        result = process_files(json_files, dat_file)
+        result = process_files(args.json, dat_file, args.policy, box, duplicates, busy)
         if result:
             safe_print("Export completed successfully.")
         else:
@@ -738,7 +695,7 @@ def main():
     if not dat_file:
         return
         
-    process_files(json_files, dat_file)
+    process_files(json_files, dat_file, args.policy, box, duplicates, busy)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
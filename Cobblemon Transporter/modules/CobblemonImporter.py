@@ -5,24 +5,30 @@ except ImportError:
     print("Please run install.bat to set up the virtual environment and install dependencies.")
     sys.exit(1)
 
-import random
 import json
-import hashlib
 import os
-import requests
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk, font
-from datetime import date
 import argparse
 import sys
 import threading
+import queue
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from nbtlib import nbt
-from nbtlib.tag import Compound, List, String, Int, Float, Byte, Short, Long, Double, ByteArray, IntArray, LongArray
 import time
-import logging
+from UuidResolver import UsernameCache, resolve_usernames
+from SlotOccupancy import get_occupancy
+from ImportManifest import ImportManifest, hash_compound, slot_key
+from NbtStream import TRAINER_FIELDS, PokemonStream
+from PokemonFields import decode_pokemon
+from CobblemonLayouts import detect_box_structure, iter_pokemon_slots
+from OutputIndex import get_output_index, identity_filename, pokemon_identity
+from PokemonBundle import OUTPUT_FORMATS, bundle_name, read_bundle, write_bundle
 
 # Configuration
 TOTAL_BOXES = 40  # Change this value to adjust the total number of boxes
+SLOTS_PER_BOX = 30  # Change this value to adjust the number of slots in each box
+UI_FRAME_MS = 50  # How often the parser window applies queued import events (20 frames per second)
 
 # Define colors directly in code
 THEME_PRIMARY = "#3f51b5"  # Primary blue
@@ -35,140 +41,46 @@ THEME_SUCCESS = "#4caf50"  # Green for success
 THEME_TEXT_PRIMARY = "#212121"  # Dark text
 THEME_TEXT_SECONDARY = "#757575"  # Gray text
 
-# Cache for UUID-to-username mappings
-uuid_cache = {}
-
 # Directory for cache
 CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'cache')
 CACHE_FILE = os.path.join(CACHE_DIR, 'uuid_cache.json')
 
+# Cache for UUID-to-username mappings (replaced by load_cache())
+uuid_cache = UsernameCache(CACHE_FILE)
+
+# Set by --offline: never contact the Mojang API, only use cached names
+OFFLINE_MODE = False
+
+# Record of previously imported .dat files; --full ignores it and re-imports everything
+import_manifest = ImportManifest()
+FULL_IMPORT = False
+
+# Set by --dry-run: extract and compare with the existing output, but write nothing
+DRY_RUN = False
+
+# Set by --format: one JSON file per Pokémon, or one NDJSON bundle per .dat file
+OUTPUT_FORMAT = 'json'
+
 # Output directory
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'cobblemon')
 
-# Reverse mapping from Cobblemon mark/ribbon identifiers to PKHeX ribbon names
-COBBLEMON_TO_PKHEX_MAP = {
-    # Ribbons
-    "cobblemon:ribbon_champion_kalos": "ChampionKalos",
-    "cobblemon:ribbon_champion": "ChampionG3",
-    "cobblemon:ribbon_champion_sinnoh": "ChampionSinnoh",
-    "cobblemon:ribbon_best_friends": "BestFriends",
-    "cobblemon:ribbon_training": "Training",
-    "cobblemon:ribbon_battler_skillful": "BattlerSkillful",
-    "cobblemon:ribbon_battler_expert": "BattlerExpert",
-    "cobblemon:ribbon_effort": "Effort",
-    "cobblemon:ribbon_day_alert": "Alert",
-    "cobblemon:ribbon_day_shock": "Shock",
-    "cobblemon:ribbon_day_downcast": "Downcast",
-    "cobblemon:ribbon_day_careless": "Careless",
-    "cobblemon:ribbon_day_relax": "Relax",
-    "cobblemon:ribbon_day_snooze": "Snooze",
-    "cobblemon:ribbon_day_smile": "Smile",
-    "cobblemon:ribbon_syndicate_gorgeous": "Gorgeous",
-    "cobblemon:ribbon_syndicate_royal": "Royal",
-    "cobblemon:ribbon_syndicate_gorgeous_royal": "GorgeousRoyal",
-    "cobblemon:ribbon_artist": "Artist",
-    "cobblemon:ribbon_footprint": "Footprint",
-    "cobblemon:ribbon_record": "Record",
-    "cobblemon:ribbon_legend": "Legend",
-    "cobblemon:ribbon_event_country": "Country",
-    "cobblemon:ribbon_event_national": "National",
-    "cobblemon:ribbon_event_earth": "Earth",
-    "cobblemon:ribbon_event_world": "World",
-    "cobblemon:ribbon_event_classic": "Classic",
-    "cobblemon:ribbon_event_premier": "Premier",
-    "cobblemon:ribbon_event": "Event",
-    "cobblemon:ribbon_event_birthday": "Birthday",
-    "cobblemon:ribbon_event_special": "Special",
-    "cobblemon:ribbon_event_souvenir": "Souvenir",
-    "cobblemon:ribbon_event_wishing": "Wishing",
-    "cobblemon:ribbon_event_champion_battle": "ChampionBattle",
-    "cobblemon:ribbon_event_champion_regional": "ChampionRegional",
-    "cobblemon:ribbon_event_champion_national": "ChampionNational",
-    "cobblemon:ribbon_event_champion_world": "ChampionWorld",
-    "cobblemon:ribbon_memory_contest": "CountMemoryContest",
-    "cobblemon:ribbon_memory_battle": "CountMemoryBattle",
-    "cobblemon:ribbon_champion_hoenn": "ChampionG6Hoenn",
-    "cobblemon:ribbon_contest_super_star": "ContestStar",
-    "cobblemon:ribbon_contest_super_master_coolness": "MasterCoolness",
-    "cobblemon:ribbon_contest_super_master_beauty": "MasterBeauty",
-    "cobblemon:ribbon_contest_super_master_cuteness": "MasterCuteness",
-    "cobblemon:ribbon_contest_super_master_cleverness": "MasterCleverness",
-    "cobblemon:ribbon_contest_super_master_toughness": "MasterToughness",
-    "cobblemon:ribbon_champion_alola": "ChampionAlola",
-    "cobblemon:ribbon_battle_royal_master": "BattleRoyale",
-    "cobblemon:ribbon_battle_tree_great": "BattleTreeGreat",
-    "cobblemon:ribbon_battle_tree_master": "BattleTreeMaster",
-    "cobblemon:ribbon_champion_galar": "ChampionGalar",
-    "cobblemon:ribbon_battle_tower_master": "TowerMaster",
-    "cobblemon:ribbon_master_rank": "MasterRank",
-    "cobblemon:ribbon_hisui": "Hisui",
-    "cobblemon:ribbon_contest_super_star_twinkling": "TwinklingStar",
-    "cobblemon:ribbon_champion_paldea": "ChampionPaldea",
-    "cobblemon:ribbon_once-in-a-lifetime": "OnceInALifetime",
-    "cobblemon:ribbon_partner": "Partner",
-    # Marks
-    "cobblemon:mark_time_lunchtime": "MarkLunchtime",
-    "cobblemon:mark_time_sleepy-time": "MarkSleepyTime",
-    "cobblemon:mark_time_dusk": "MarkDusk",
-    "cobblemon:mark_time_dawn": "MarkDawn",
-    "cobblemon:mark_weather_cloudy": "MarkCloudy",
-    "cobblemon:mark_weather_rainy": "MarkRainy",
-    "cobblemon:mark_weather_stormy": "MarkStormy",
-    "cobblemon:mark_weather_snowy": "MarkSnowy",
-    "cobblemon:mark_weather_blizzard": "MarkBlizzard",
-    "cobblemon:mark_weather_dry": "MarkDry",
-    "cobblemon:mark_weather_sandstorm": "MarkSandstorm",
-    "cobblemon:mark_weather_misty": "MarkMisty",
-    "cobblemon:mark_destiny": "MarkDestiny",
-    "cobblemon:mark_fishing": "MarkFishing",
-    "cobblemon:mark_curry": "MarkCurry",
-    "cobblemon:mark_uncommon": "MarkUncommon",
-    "cobblemon:mark_rare": "MarkRare",
-    "cobblemon:mark_personality_rowdy": "MarkRowdy",
-    "cobblemon:mark_personality_absent-minded": "MarkAbsentMinded",
-    "cobblemon:mark_personality_jittery": "MarkJittery",
-    "cobblemon:mark_personality_excited": "MarkExcited",
-    "cobblemon:mark_personality_charismatic": "MarkCharismatic",
-    "cobblemon:mark_personality_calmness": "MarkCalmness",
-    "cobblemon:mark_personality_intense": "MarkIntense",
-    "cobblemon:mark_personality_zoned-out": "MarkZonedOut",
-    "cobblemon:mark_personality_joyful": "MarkJoyful",
-    "cobblemon:mark_personality_angry": "MarkAngry",
-    "cobblemon:mark_personality_smiley": "MarkSmiley",
-    "cobblemon:mark_personality_teary": "MarkTeary",
-    "cobblemon:mark_personality_upbeat": "MarkUpbeat",
-    "cobblemon:mark_personality_peeved": "MarkPeeved",
-    "cobblemon:mark_personality_intellectual": "MarkIntellectual",
-    "cobblemon:mark_personality_ferocious": "MarkFerocious",
-    "cobblemon:mark_personality_crafty": "MarkCrafty",
-    "cobblemon:mark_personality_scowling": "MarkScowling",
-    "cobblemon:mark_personality_kindly": "MarkKindly",
-    "cobblemon:mark_personality_flustered": "MarkFlustered",
-    "cobblemon:mark_personality_pumped-up": "MarkPumpedUp",
-    "cobblemon:mark_personality_zero_energy": "MarkZeroEnergy",
-    "cobblemon:mark_personality_prideful": "MarkPrideful",
-    "cobblemon:mark_personality_unsure": "MarkUnsure",
-    "cobblemon:mark_personality_humble": "MarkHumble",
-    "cobblemon:mark_personality_thorny": "MarkThorny",
-    "cobblemon:mark_personality_vigor": "MarkVigor",
-    "cobblemon:mark_personality_slump": "MarkSlump",
-    "cobblemon:mark_jumbo": "MarkJumbo",
-    "cobblemon:mark_mini": "MarkMini",
-    "cobblemon:mark_itemfinder": "MarkItemfinder",
-    "cobblemon:mark_partner": "MarkPartner",
-    "cobblemon:mark_gourmand": "MarkGourmand",
-    "cobblemon:mark_alpha": "MarkAlpha",
-    "cobblemon:mark_mightiest": "MarkMightiest",
-    "cobblemon:mark_titan": "MarkTitan",
-    "cobblemon:mark_revival": "MarkRevival",
-}
-
 # Parse command line arguments
 def parse_args():
     parser = argparse.ArgumentParser(description='Parse Cobblemon .dat files')
     parser.add_argument('--cli', action='store_true', help='Run in CLI mode without GUI dialogs')
     parser.add_argument('--files', type=str, help='Path to the .dat file to process')
     parser.add_argument('--output', type=str, help='Output directory for the parsed files (default: "cobblemon" folder in script directory)')
+    parser.add_argument('--offline', action='store_true', help='Do not contact the Mojang API; use cached trainer names only')
+    parser.add_argument('--world', type=str, help='Import every pcstore/playerpartystore .dat file of a world directory into one folder per player (the party in its party/ subfolder)')
+    parser.add_argument('--workers', type=int, help='Number of worker processes for --world (default: one per CPU)')
+    parser.add_argument('--full', action='store_true', help='Re-import every file and Pokémon even if unchanged since the last import')
+    parser.add_argument('--inspect', type=str, metavar='DAT', help='Print a JSON report of the structure of a .dat file and exit')
+    parser.add_argument('--verbose', action='store_true', help='In CLI mode, print every extracted field of every Pokémon')
+    parser.add_argument('--report', type=str, metavar='PATH', help='Also write a JSON report of the import to PATH')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Extract and compare against the existing output without writing anything; prints a diff report')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='json',
+                        help='json: one file per Pokémon (default); ndjson / ndjson.gz: one bundle per .dat file')
     return parser.parse_args()
 
 def select_file():
@@ -178,451 +90,103 @@ def select_file():
 def load_nbt(file_path):
     # Load the NBT file
     try:
-        nbt_file = nbt.load(file_path)
-        # Debug: Print the structure of the NBT file to understand it better
-        print("NBT File Structure:")
-        print(f"Type of nbt_file: {type(nbt_file)}")
-        print(f"Top-level keys: {list(nbt_file.keys())}")
-        
-        # Check if there are party slots (Slot0-Slot5)
-        party_slots = [key for key in nbt_file.keys() if key.startswith('Slot') and key[4:].isdigit()]
-        if party_slots:
-            print(f"Found party slots: {party_slots}")
-            # Print structure of a party Pokémon as example
-            if party_slots:
-                first_slot = party_slots[0]
-                print(f"Party Pokémon structure ({first_slot}):")
-                if first_slot in nbt_file:
-                    print(f"Keys in {first_slot}: {list(nbt_file[first_slot].keys()) if hasattr(nbt_file[first_slot], 'keys') else 'Not a dictionary'}")
-        
-        # Check if there are box structures directly in the top level
-        box_keys = [key for key in nbt_file.keys() if key.startswith('Box') and key[3:].isdigit()]
-        if box_keys:
-            print(f"Found box keys at top level: {box_keys}")
-            # Print structure of the first box as example
-            if box_keys:
-                first_box = box_keys[0]
-                print(f"First box structure ({first_box}):")
-                if hasattr(nbt_file[first_box], 'keys'):
-                    print(f"Keys in {first_box}: {list(nbt_file[first_box].keys())}")
-                    # Print a sample slot from this box
-                    slot_keys = [key for key in nbt_file[first_box].keys() if key.startswith('Slot') and key[4:].isdigit()]
-                    if slot_keys:
-                        sample_slot = slot_keys[0]
-                        print(f"Sample slot in {first_box}: {sample_slot}")
-                        print(f"Keys in {first_box}.{sample_slot}: {list(nbt_file[first_box][sample_slot].keys()) if hasattr(nbt_file[first_box][sample_slot], 'keys') else 'Not a dictionary'}")
-                else:
-                    print(f"{first_box} is not a dictionary-like object, it's a {type(nbt_file[first_box])}")
-        
-        # Check more detailed PC structure
-        if 'pc' in nbt_file:
-            print("\nFound 'pc' key in top level")
-            if hasattr(nbt_file['pc'], 'keys'):
-                print(f"Keys in 'pc': {list(nbt_file['pc'].keys())}")
-                
-                # Check if the PC has a boxes list/array
-                if 'boxes' in nbt_file['pc']:
-                    print(f"'pc.boxes' type: {type(nbt_file['pc']['boxes'])}")
-                    if isinstance(nbt_file['pc']['boxes'], list):
-                        print(f"Number of boxes in pc.boxes: {len(nbt_file['pc']['boxes'])}")
-                        if len(nbt_file['pc']['boxes']) > 0:
-                            first_box = nbt_file['pc']['boxes'][0]
-                            print(f"First box in pc.boxes type: {type(first_box)}")
-                            if hasattr(first_box, 'keys'):
-                                print(f"Keys in first box: {list(first_box.keys())}")
-                                
-                                # Check if there's a 'pokemon' list in the box
-                                if 'pokemon' in first_box and isinstance(first_box['pokemon'], list):
-                                    print(f"Number of Pokémon in first box: {len(first_box['pokemon'])}")
-                                    if len(first_box['pokemon']) > 0:
-                                        print(f"First Pokémon in box type: {type(first_box['pokemon'][0])}")
-                                        if hasattr(first_box['pokemon'][0], 'keys'):
-                                            print(f"Keys in first Pokémon: {list(first_box['pokemon'][0].keys())}")
-                                            # Particularly interested in slot_number for our use case
-                                            if 'slot_number' in first_box['pokemon'][0]:
-                                                print(f"slot_number value: {first_box['pokemon'][0]['slot_number']}")
-                
-                # Check if PC has direct Box0, Box1, etc. structure
-                pc_box_keys = [key for key in nbt_file['pc'].keys() if key.startswith('Box') and key[3:].isdigit()]
-                if pc_box_keys:
-                    print(f"Found box keys inside 'pc': {pc_box_keys}")
-                    # Print structure of the first box as example
-                    first_pc_box = pc_box_keys[0]
-                    print(f"First PC box structure ({first_pc_box}):")
-                    if hasattr(nbt_file['pc'][first_pc_box], 'keys'):
-                        print(f"Keys in pc.{first_pc_box}: {list(nbt_file['pc'][first_pc_box].keys())}")
-            else:
-                print(f"'pc' is not a dictionary-like object, it's a {type(nbt_file['pc'])}")
-        
-        return nbt_file
+        return nbt.load(file_path)
     except Exception as e:
         print(f"Error loading NBT file: {str(e)}")
         return None, str(e)
 
-def generate_unique_filename(pokemon_data):
-    # Use species, level, and a hash of the stats to generate a unique filename
-    name = pokemon_data['species'].lower()
-    stats_string = str(pokemon_data['ivs']) + str(pokemon_data['evs'])  # Example of stats-based uniqueness
-    unique_number = int(hashlib.md5(stats_string.encode('utf-8')).hexdigest(), 16) % 10000
-    filename = f"{name}_{unique_number}.json"
-    return filename
-
-def fetch_username_from_uuid(uuid):
-    # Check if the UUID is already in the cache
-    if uuid in uuid_cache:
-        return uuid_cache[uuid]
-
-    # Mojang API endpoint to get username from UUID
-    url = f"https://api.mojang.com/user/profile/{uuid}"
-    headers = {
-        'Accept': 'application/json',
-        'User-Agent': 'PokemonPC/1.0'
-    }
+def _count_tag_types(tag, histogram):
+    histogram[type(tag).__name__] = histogram.get(type(tag).__name__, 0) + 1
+    if hasattr(tag, 'values') and not isinstance(tag, str):
+        for child in tag.values():
+            _count_tag_types(child, histogram)
+    elif isinstance(tag, list):
+        for child in tag:
+            _count_tag_types(child, histogram)
+
+def inspect_nbt(file_path):
+    """Describe the structure of a .dat file as a JSON-serialisable report (used by --inspect)"""
+    try:
+        nbt_data = nbt.load(file_path)
+    except Exception as e:
+        return {"file": file_path, "error": str(e)}
     
-    max_retries = 3
-    retry_delay = 1  # seconds
+    box_structure = detect_box_structure(nbt_data)
+    party_slots = 0
+    box_slots = {}
+    pokemon_tags = {}
+    for box, slot, compound in iter_pokemon_slots(nbt_data, box_structure):
+        if box is None:
+            party_slots += 1
+        else:
+            box_slots[box] = box_slots.get(box, 0) + 1
+        for key in compound.keys():
+            pokemon_tags[key] = pokemon_tags.get(key, 0) + 1
     
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                username = data.get('name', 'Unknown')
-                # Cache the result
-                uuid_cache[uuid] = username
-                return username
-            elif response.status_code == 429:  # Rate limit
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay * (attempt + 1))
-                    continue
-            return 'Unknown'
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay * (attempt + 1))
-                continue
-            return 'Unknown'
-    return 'Unknown'
-
-def extract_pokemon_data(nbt_data, slot):
-    if not nbt_data:
-        return None, "Invalid NBT data"
+    tag_types = {}
+    _count_tag_types(nbt_data, tag_types)
     
-    try:
-        # Parse the slot parameter to get the actual data
-        pokemon_data = None
-        box_number = None
-        slot_number = None
-        
-        # Check if the slot parameter is a direct key (e.g., 'Slot0' for party)
-        if slot in nbt_data:
-            pokemon_data = nbt_data[slot]
-            # This is a party Pokémon - assign to box 0 (party)
-            if slot.startswith('Slot') and slot[4:].isdigit():
-                try:
-                    box_number = 1  # Party Pokémon (box 1)
-                    slot_number = int(slot[4:]) + 1  # Convert from 0-indexed to 1-indexed
-                except ValueError:
-                    pass
-        # Check if the slot parameter is a compound key (e.g., 'Box0 -> Slot1')
-        elif '->' in slot:
-            parts = slot.split(' -> ')
-            if len(parts) == 2 and parts[0].startswith('Box') and parts[1].startswith('Slot'):
-                box_key = parts[0]
-                slot_key = parts[1]
-                
-                # Get box and slot indices
-                try:
-                    box_idx = int(box_key[3:])
-                    slot_idx = int(slot_key[4:])
-                    
-                    # Track if we found the data
-                    found = False
-                    
-                    # Try strategy 1: Direct Box0/Slot0 access at top level
-                    if box_key in nbt_data and slot_key in nbt_data[box_key]:
-                        pokemon_data = nbt_data[box_key][slot_key]
-                        box_number = box_idx + 1  # Convert from 0-indexed to 1-indexed
-                        slot_number = slot_idx + 1  # Convert from 0-indexed to 1-indexed
-                        found = True
-                    
-                    # Try strategy 2: pc.boxes[box_idx].pokemon array with slot_number
-                    if not found and 'pc' in nbt_data and 'boxes' in nbt_data['pc'] and isinstance(nbt_data['pc']['boxes'], list):
-                        # Check if the box index is valid
-                        if 0 <= box_idx < len(nbt_data['pc']['boxes']):
-                            box = nbt_data['pc']['boxes'][box_idx]
-                            
-                            # Check if the Pokemon list exists in this box
-                            if 'pokemon' in box and isinstance(box['pokemon'], list):
-                                # Find the Pokemon with matching slot in this box
-                                for poke in box['pokemon']:
-                                    if 'slot_number' in poke and poke['slot_number'] == slot_idx:
-                                        pokemon_data = poke
-                                        box_number = box_idx + 1  # Convert from 0-indexed to 1-indexed
-                                        slot_number = slot_idx + 1  # Convert from 0-indexed to 1-indexed
-                                        found = True
-                                        break
-                    
-                    # Try strategy 3: Direct pc.Box0/Slot0 access
-                    if not found and 'pc' in nbt_data:
-                        if box_key in nbt_data['pc'] and slot_key in nbt_data['pc'][box_key]:
-                            pokemon_data = nbt_data['pc'][box_key][slot_key]
-                            box_number = box_idx + 1
-                            slot_number = slot_idx + 1
-                            found = True
-                    
-                    # Try strategy 4: Maybe box_idx.slot_idx format in pc
-                    if not found and 'pc' in nbt_data:
-                        pc_data = nbt_data['pc']
-                        # Convert string box/slot index to actual keys
-                        str_box_idx = str(box_idx)
-                        str_slot_idx = str(slot_idx)
-                        
-                        if str_box_idx in pc_data and isinstance(pc_data[str_box_idx], dict):
-                            if str_slot_idx in pc_data[str_box_idx]:
-                                pokemon_data = pc_data[str_box_idx][str_slot_idx]
-                                box_number = box_idx + 1
-                                slot_number = slot_idx + 1
-                                found = True
-                    
-                    # Try strategy 5: Maybe just a single pc.pokemon array with indices
-                    if not found and 'pc' in nbt_data and 'pokemon' in nbt_data['pc'] and isinstance(nbt_data['pc']['pokemon'], list):
-                        for poke in nbt_data['pc']['pokemon']:
-                            if ('box_number' in poke and poke['box_number'] == box_idx and
-                                'slot_number' in poke and poke['slot_number'] == slot_idx):
-                                pokemon_data = poke
-                                box_number = box_idx + 1
-                                slot_number = slot_idx + 1
-                                found = True
-                                break
-                    
-                    if not found:
-                        return None, f"Could not find Pokémon data for {slot} in any NBT structure"
-                
-                except (ValueError, IndexError, KeyError) as e:
-                    return None, f"Error parsing slot format '{slot}': {str(e)}"
-        
-        # If we couldn't get the Pokémon data, return an error
-        if pokemon_data is None:
-            return None, f"Could not extract Pokémon data from slot: {slot}"
-        
-        # Extract species and remove 'cobblemon:' prefix if it exists
-        species = pokemon_data['Species']
-        if species.startswith('cobblemon:'):
-            species = species[len('cobblemon:'):]
-            
-        level = int(pokemon_data['Level'])  # Convert to int
+    return {
+        "file": file_path,
+        "layout": box_structure,
+        "top_level_keys": sorted(nbt_data.keys()),
+        "pc_keys": sorted(nbt_data['pc'].keys()) if hasattr(nbt_data.get('pc'), 'keys') else [],
+        "party_slots": party_slots,
+        "box_count": len(box_slots),
+        "box_slots": {str(box): count for box, count in sorted(box_slots.items())},
+        "pokemon": party_slots + sum(box_slots.values()),
+        "pokemon_tags": dict(sorted(pokemon_tags.items(), key=lambda item: (-item[1], item[0]))),
+        "tag_types": dict(sorted(tag_types.items(), key=lambda item: (-item[1], item[0]))),
+    }
 
-        moves = []
-        hyphen_moves = load_hyphen_moves()
-        
-        # Check and apply hyphenation to ability
-        ability = pokemon_data['Ability']['AbilityName']
-        if ability in hyphen_moves:
-            ability = hyphen_moves[ability].capitalize()
+def generate_unique_filename(pokemon_data):
+    # Name the file after the Pokémon's Cobblemon UUID (or a full stats hash when it has none)
+    return identity_filename(pokemon_data)
 
-        if species in hyphen_moves:
-            species = hyphen_moves[species].capitalize()
+def output_filename(pokemon_info, output_dir=None):
+    """File a Pokémon is (or will be) saved to in an output directory, reusing the file of an earlier import"""
+    return get_output_index(output_dir or OUTPUT_DIR).assign(pokemon_info)
 
-        for move_data in pokemon_data['MoveSet']:  # Loop through the list of Compound objects
-            move_name = move_data.get('MoveName', 'Unknown')  # Access MoveName from each Compound
-            
-            # Check if move_name needs hyphenation
-            if move_name in hyphen_moves:
-                move_name = hyphen_moves[move_name]
-            
-            moves.append(move_name)  # Append the (potentially hyphenated) move name
+def lookup_username(uuid):
+    """Read a trainer name from the in-memory map filled by resolve_trainer_names (never hits the network)"""
+    return uuid_cache.name(uuid)
+
+def collect_trainer_uuids(slots):
+    """Gather every distinct original trainer UUID from (box, slot, compound, ...) tuples"""
+    return {str(entry[2]['PokemonOriginalTrainer']) for entry in slots if 'PokemonOriginalTrainer' in entry[2]}
+
+def resolve_trainer_names(slots):
+    """Resolve all original trainers of a .dat file concurrently before extraction starts"""
+    return resolve_usernames(collect_trainer_uuids(slots), uuid_cache)
+
+def slot_label(box, slot):
+    """Human readable location used in log output"""
+    if box is None:
+        return f"Party Slot{slot}"
+    return f"Box{box} Slot{slot}"
+
+def extract_pokemon_data(pokemon_data, box=None, slot=None):
+    """
+    Convert a single Pokémon compound into the JSON dictionary format.
+    box/slot are the 0-indexed location yielded by iter_pokemon_slots (box is None for the party).
+    """
+    if not pokemon_data:
+        return None, "Invalid NBT data"
     
-        # Convert IVs and EVs to integers and ensure they are lists
-        ivs_compound = pokemon_data.get('IVs', pokemon_data.get('Base', {}).get('IVs', {}))
-        if 'Base' in ivs_compound:
-            base_ivs = ivs_compound['Base']
-            ivs = {stat: int(base_ivs.get(f'cobblemon:{stat}', 0)) for stat in ['attack', 'defence', 'hp', 'special_attack', 'special_defence', 'speed']}
-        else:
-            ivs = {stat: int(ivs_compound.get(f'cobblemon:{stat}', 0)) for stat in ['attack', 'defence', 'hp', 'special_attack', 'special_defence', 'speed']}
-        
-        evs_compound = pokemon_data.get('EVs', pokemon_data.get('Base', {}).get('EVs', {}))
-        if 'Base' in evs_compound:
-            base_evs = evs_compound['Base']
-            evs = {stat: int(base_evs.get(f'cobblemon:{stat}', 0)) for stat in ['attack', 'defence', 'hp', 'special_attack', 'special_defence', 'speed']}
-        else:
-            evs = {stat: int(evs_compound.get(f'cobblemon:{stat}', 0)) for stat in ['attack', 'defence', 'hp', 'special_attack', 'special_defence', 'speed']}
+    try:
+        box_number = None
+        slot_number = None
+        if slot is not None:
+            if box is None:
+                box_number = 1  # Party Pokémon (box 1)
+            else:
+                box_number = box + 1  # Convert from 0-indexed to 1-indexed
+            slot_number = slot + 1  # Convert from 0-indexed to 1-indexed
         
-        # Convert Nature, Original Trainer, Health, and Experience
-        nature = pokemon_data['Nature'].split(":")[-1].capitalize()
         original_trainer_uuid = pokemon_data['PokemonOriginalTrainer']
-        original_trainer = fetch_username_from_uuid(original_trainer_uuid)
-        health = int(pokemon_data['Health'])  # Convert to int
-        experience = int(pokemon_data['Experience'])  # Convert to int
-
-        # Get shiny status (assuming shiny is indicated by 'Shiny' key)
-        shiny = int(pokemon_data.get('Shiny', 0))
-
-        # Get the ball type (assuming 'CaughtBall' stores the ball type)
-        caught_ball = pokemon_data.get('CaughtBall', 'Unknown')
-
-        # Get the gender (assuming 'Gender' key exists and stores 'MALE' or 'FEMALE')
-        gender = pokemon_data.get('Gender', 'Unknown')
-
-        # Extract other fields
-        friendship = int(pokemon_data.get('Friendship', 0))
-        healing_timer = int(pokemon_data.get('HealingTimer', 0))
-        gmax_factor = int(pokemon_data.get('GmaxFactor', 0))
-        gmax_level = int(pokemon_data.get('DmaxLevel', 0))
-        tera_type = pokemon_data.get('TeraType', 'Unknown')
-        form_id = pokemon_data.get('FormId', 'normal')
-        uuid = list(pokemon_data.get('UUID', []))  # Convert UUID to a list
-        scale_modifier = float(pokemon_data.get('ScaleModifier', 1.0))
-        nickname = pokemon_data.get('Nickname', species.capitalize())
-        
-        # Extract Marks from top level (not PersistentData)
-        marks = []
-        if 'Marks' in pokemon_data:
-            cobblemon_marks = pokemon_data.get('Marks', [])
-            for cobblemon_mark in cobblemon_marks:
-                # Convert to string if it's an NBT String object
-                mark_str = str(cobblemon_mark) if hasattr(cobblemon_mark, '__str__') else cobblemon_mark
-                # Map Cobblemon identifier to PKHeX ribbon name
-                pkhex_name = COBBLEMON_TO_PKHEX_MAP.get(mark_str)
-                if pkhex_name:
-                    marks.append(pkhex_name)
-                else:
-                    print(f"Warning: Unknown Cobblemon mark/ribbon '{mark_str}' - skipping.")
-
-        # Extract MetDate, MetLevel, and MetLocation from PersistentData
-        persistent_data = pokemon_data.get('PersistentData', {})
-
-        date_today = date.today().strftime('%Y-%m-%d')  # Format the date as YYYY-MM-DD
-        met_date = persistent_data.get('MetDate', date_today)
-        met_level = persistent_data.get('MetLevel', level)
-        met_location = persistent_data.get('MetLocation', 'a lovely place')
-
-        origin_game = persistent_data.get('OriginGame', 'Cobblemon')
-        original_trainer = persistent_data.get('OriginalTrainer', fetch_username_from_uuid(original_trainer_uuid))
-        language = persistent_data.get('Language', 2)
-        tid = persistent_data.get('TID', )
-        pid = persistent_data.get('PID', )
-        sid = persistent_data.get('SID', )
-
-        # Extract Home Tracker, Encryption Constant, Height, Weight, Scale, Ribbons, and Relearn Move Flags
-        home_tracker = int(persistent_data.get('HomeTracker', 0))
-        encryption_constant = int(persistent_data.get('EncryptionConstant', 0))
-        height = int(persistent_data.get('Height', 0))
-        weight = int(persistent_data.get('Weight', 0))
-        scale = int(persistent_data.get('Scale', 0))
-        ribbons = list(persistent_data.get('Ribbons', []))
-        # Convert relearn flags to boolean values (true/false)
-        relearn_flags = [bool(flag) for flag in persistent_data.get('RelearnFlags', [])]
-        fateful_encounter = bool(persistent_data.get('FatefulEncounter', False))
-
-        memory_data = persistent_data.get('Memories', {})
-        memories = {
-            "memory_type": memory_data.get('MemoryType', 0),
-            "memory_intensity": memory_data.get('MemoryIntensity', 0),
-            "memory_feeling": memory_data.get('MemoryFeeling', 0),
-            "memory_variable": memory_data.get('MemoryVariable', 0),
-        }
-        
-        # Extract egg data
-        egg_location = persistent_data.get('EggLocation', '0')
-        egg_date = persistent_data.get('EggDate', '')
-        is_egg = bool(persistent_data.get('IsEgg', False))
-        
-        # Extract Pokérus data
-        pokerus_strain = int(persistent_data.get('PokerusStrain', 0))
-        pokerus_days = int(persistent_data.get('PokerusDays', 0))
-        
-        # Extract handler data
-        current_handler = int(persistent_data.get('CurrentHandler', 0))
-        handling_trainer_name = persistent_data.get('HandlingTrainerName', '')
-        handling_trainer_gender = int(persistent_data.get('HandlingTrainerGender', 0))
-        handling_trainer_friendship = int(persistent_data.get('HandlingTrainerFriendship', 0))
-        original_trainer_gender = int(persistent_data.get('OriginalTrainerGender', 0))
-        
-        # Extract ability and nature data
-        ability_number = int(persistent_data.get('AbilityNumber', 1))
-        stat_nature = persistent_data.get('StatNature', '')
-        
-        # Extract stats and type data
-        characteristic = int(persistent_data.get('Characteristic', -1))
-        tsv = int(persistent_data.get('TSV', 0))
-        psv = int(persistent_data.get('PSV', 0))
-        hp_type = int(persistent_data.get('HPType', 0))
-        hp_power = int(persistent_data.get('HPPower', 0))
-        iv_total = int(persistent_data.get('IVTotal', 0))
-        potential_rating = int(persistent_data.get('PotentialRating', 0))
-        
-        # Extract relearn moves
-        relearn_move1 = int(persistent_data.get('RelearnMove1', 0))
-        relearn_move2 = int(persistent_data.get('RelearnMove2', 0))
-        relearn_move3 = int(persistent_data.get('RelearnMove3', 0))
-        relearn_move4 = int(persistent_data.get('RelearnMove4', 0))
-        
-        # Create a simple dictionary with extracted data
-        pokemon_info = {
-            "species": species,
-            "nickname": nickname,
-            "level": level,
-            "ability": ability,
-            "moves": moves,  # Now this holds the move names instead of IDs
-            "ivs": ivs,
-            "evs": evs,
-            "nature": nature,
-            "original_trainer": original_trainer,
-            "health": health,
-            "experience": experience,
-            "shiny": shiny,
-            "caught_ball": caught_ball,
-            "gender": gender,
-            "friendship": friendship,
-            "healing_timer": healing_timer,
-            "gmax_factor": gmax_factor,
-            "gmax_level": gmax_level,
-            "tera_type": tera_type,
-            "form_id": form_id,
-            "uuid": uuid,
-            "scale_modifier": scale_modifier,
-            "met_date": met_date,
-            "met_level": met_level,
-            "met_location": met_location,
-            "origin_game": origin_game,
-            "language": language,
-            "tid": tid,
-            "pid": pid,
-            "sid": sid,
-            "home_tracker": home_tracker,
-            "encryption_constant": encryption_constant,
-            "height": height,
-            "weight": weight,
-            "scale": scale,
-            "ribbons": ribbons,
-            "marks": marks,
-            "relearn_flags": relearn_flags,
-            "fateful_encounter": fateful_encounter,
-            "memories": memories,
-            "egg_location": egg_location,
-            "egg_date": egg_date,
-            "is_egg": is_egg,
-            "pokerus_strain": pokerus_strain,
-            "pokerus_days": pokerus_days,
-            "current_handler": current_handler,
-            "handling_trainer_name": handling_trainer_name,
-            "handling_trainer_gender": handling_trainer_gender,
-            "handling_trainer_friendship": handling_trainer_friendship,
-            "original_trainer_gender": original_trainer_gender,
-            "ability_number": ability_number,
-            "stat_nature": stat_nature,
-            "characteristic": characteristic,
-            "tsv": tsv,
-            "psv": psv,
-            "hp_type": hp_type,
-            "hp_power": hp_power,
-            "iv_total": iv_total,
-            "potential_rating": potential_rating,
-            "relearn_move1": relearn_move1,
-            "relearn_move2": relearn_move2,
-            "relearn_move3": relearn_move3,
-            "relearn_move4": relearn_move4
-        }
+        pokemon_info = decode_pokemon(pokemon_data)
+        if pokemon_info['original_trainer'] is None:
+            pokemon_info['original_trainer'] = lookup_username(original_trainer_uuid)
         
         # Add box and slot information if available
         if box_number is not None and slot_number is not None:
@@ -636,52 +200,19 @@ def extract_pokemon_data(nbt_data, slot):
         print(error_msg)  # Print for debugging
         return None, error_msg
 
-def load_hyphen_moves():
-    hyphen_moves_file = os.path.join(CACHE_DIR, 'hyphens.json')
-    if os.path.exists(hyphen_moves_file):
-        with open(hyphen_moves_file, 'r') as f:
-            return json.load(f)
-    else:
-        return {}
+def get_output_occupancy(output_dir=None):
+    """Occupancy index for an output directory (built once, then updated on every save)"""
+    return get_occupancy(output_dir or OUTPUT_DIR, TOTAL_BOXES, SLOTS_PER_BOX)
 
-def find_available_box_slot():
-    """Find an available box slot for a Pokémon by checking existing JSON files"""
+def find_available_box_slot(output_dir=None):
+    """Find an available box slot for a Pokémon using the output directory's occupancy index"""
     try:
-        # Use the global output directory
-        global OUTPUT_DIR
-        
         # Ensure the directory exists
-        if not os.path.exists(OUTPUT_DIR):
-            os.makedirs(OUTPUT_DIR, exist_ok=True)
-            # If directory was just created, first slot in first box is available
-            return 1, 1
-        
-        # Maximum box and slot numbers
-        MAX_BOXES = TOTAL_BOXES
-        MAX_SLOTS_PER_BOX = 30
+        os.makedirs(output_dir or OUTPUT_DIR, exist_ok=True)
         
-        # Keep track of occupied slots
-        occupied_slots = set()
-        
-        # Parse all existing JSON files to find occupied slots
-        for filename in os.listdir(OUTPUT_DIR):
-            if filename.endswith('.json'):
-                try:
-                    with open(os.path.join(OUTPUT_DIR, filename), 'r') as f:
-                        pokemon_data = json.load(f)
-                        if 'box_number' in pokemon_data and 'slot_number' in pokemon_data:
-                            box_num = pokemon_data['box_number']
-                            slot_num = pokemon_data['slot_number']
-                            occupied_slots.add((box_num, slot_num))
-                except:
-                    # Skip files that can't be parsed
-                    continue
-        
-        # Find first available slot
-        for box in range(1, MAX_BOXES + 1):
-            for slot in range(1, MAX_SLOTS_PER_BOX + 1):
-                if (box, slot) not in occupied_slots:
-                    return box, slot
+        position = get_output_occupancy(output_dir).next_free()
+        if position is not None:
+            return position
         
         # If all slots are occupied, default to box 1, slot 1 (will overwrite)
         return 1, 1
@@ -689,26 +220,38 @@ def find_available_box_slot():
         # In case of any error, default to box 1, slot 1
         return 1, 1
 
-def save_pokemon_to_json(pokemon_info):
+def save_pokemon_to_json(pokemon_info, output_dir=None):
     if pokemon_info:
         # Get the output directory (use the global variable that may have been set via command line)
-        global OUTPUT_DIR
+        output_dir = output_dir or OUTPUT_DIR
         
         # Ensure the output directory exists
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        os.makedirs(output_dir, exist_ok=True)
 
         # Use existing box and slot if available, otherwise find available ones
         if 'box_number' in pokemon_info and 'slot_number' in pokemon_info:
             box_num = pokemon_info['box_number']
             slot_num = pokemon_info['slot_number']
         else:
-            box_num, slot_num = find_available_box_slot()
+            box_num, slot_num = find_available_box_slot(output_dir)
             # Add box and slot information to the Pokémon data
             pokemon_info['box_number'] = box_num
             pokemon_info['slot_number'] = slot_num
+        occupancy = get_output_occupancy(output_dir)
+        occupancy.occupy(box_num, slot_num)
 
-        filename = generate_unique_filename(pokemon_info)
-        file_path = os.path.join(OUTPUT_DIR, filename)
+        filename = output_filename(pokemon_info, output_dir)
+        file_path = os.path.join(output_dir, filename)
+        
+        # Re-import of a Pokémon we already have: free the slot its old file was in if it moved
+        if os.path.exists(file_path):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as json_file:
+                    previous = json.load(json_file)
+                if (previous.get('box_number'), previous.get('slot_number')) != (box_num, slot_num):
+                    occupancy.release(previous.get('box_number'), previous.get('slot_number'))
+            except (OSError, ValueError, AttributeError):
+                pass
 
         # Save the Pokémon data to a JSON file
         with open(file_path, 'w') as json_file:
@@ -717,228 +260,644 @@ def save_pokemon_to_json(pokemon_info):
     else:
         return "No Pokémon data to save."
 
+def new_bundle(file_path, output_format=None):
+    """Collects the Pokémon of one .dat file for save_bundle, or None when writing one JSON file per Pokémon"""
+    output_format = output_format or OUTPUT_FORMAT
+    if output_format == 'json':
+        return None
+    return {'name': bundle_name(file_path, output_format), 'pokemon': {}}
+
+def store_pokemon(pokemon_info, output_dir=None, bundle=None):
+    """
+    Save a Pokémon as its own JSON file, or add it to a bundle that save_bundle writes later.
+    Returns (message, manifest record without the hash).
+    """
+    output_dir = output_dir or OUTPUT_DIR
+    if bundle is None:
+        message = save_pokemon_to_json(pokemon_info, output_dir)
+        return message, {'file': output_filename(pokemon_info, output_dir)}
+    
+    if 'box_number' in pokemon_info and 'slot_number' in pokemon_info:
+        box_num, slot_num = pokemon_info['box_number'], pokemon_info['slot_number']
+    else:
+        box_num, slot_num = find_available_box_slot(output_dir)
+        pokemon_info['box_number'] = box_num
+        pokemon_info['slot_number'] = slot_num
+    get_output_occupancy(output_dir).occupy(box_num, slot_num)
+    
+    entry = identity_filename(pokemon_info)
+    bundle['pokemon'][entry] = pokemon_info
+    return f"Added to {bundle['name']} (Box {box_num}, Slot {slot_num})", {'file': bundle['name'], 'entry': entry}
+
+def save_bundle(bundle, slot_records, output_dir=None):
+    """Write a bundle: the Pokémon extracted this run plus the unchanged ones carried over from the previous bundle"""
+    path = os.path.join(output_dir or OUTPUT_DIR, bundle['name'])
+    keep = {record.get('entry') for record in slot_records.values() if record.get('file') == bundle['name']}
+    pokemon_list = []
+    if os.path.exists(path):
+        for pokemon in read_bundle(path):
+            entry = identity_filename(pokemon)
+            if entry in keep and entry not in bundle['pokemon']:
+                pokemon_list.append(pokemon)
+    pokemon_list.extend(bundle['pokemon'].values())
+    write_bundle(path, pokemon_list)
+
 def save_cache():
-    # Ensure the cache directory exists
-    os.makedirs(CACHE_DIR, exist_ok=True)
-    # Save the cache to the cache file
-    with open(CACHE_FILE, 'w') as cache_file:
-        json.dump(uuid_cache, cache_file)
+    # Write any lookups that have not been flushed yet (the cache also flushes periodically on its own)
+    uuid_cache.flush()
 
 def load_cache():
     # Load the cache from the cache file if it exists
-    if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, 'r') as cache_file:
-            return json.load(cache_file)
-    return {}
+    if DRY_RUN:
+        # Dry runs never write, not even the trainer name cache
+        return UsernameCache(CACHE_FILE, offline=OFFLINE_MODE, flush_every=float('inf'), flush_interval=float('inf')).load()
+    return UsernameCache(CACHE_FILE, offline=OFFLINE_MODE).load()
+
+def load_manifest():
+    return ImportManifest().load()
+
+def file_unchanged(file_path, output_dir=None):
+    """True when a .dat file was already imported into the output directory and has not changed since"""
+    return not FULL_IMPORT and import_manifest.is_unchanged(file_path, output_dir or OUTPUT_DIR)
+
+def split_changed_slots(file_path, slots, kept, output_dir=None, previous_slots=None):
+    """
+    Compare each slot's compound bytes with the last import of this file as the slots stream past.
+    Yields (box, slot, compound, digest) for the Pokémon that need extracting and adds the manifest records of
+    unchanged ones to kept (slot key -> record), so only one compound is held at a time.
+    """
+    if previous_slots is None:
+        previous_slots = {} if FULL_IMPORT else import_manifest.previous_slots(file_path, output_dir or OUTPUT_DIR)
+    for box, slot, compound in slots:
+        digest = hash_compound(compound)
+        previous = previous_slots.get(slot_key(box, slot))
+        if previous and previous['hash'] == digest:
+            kept[slot_key(box, slot)] = previous
+        else:
+            yield box, slot, compound, digest
+
+def scan_changed_slots(file_path, output_dir=None):
+    """
+    Cheap first pass over a .dat file that only decodes the original trainer of each Pokémon (the digest still
+    covers the whole compound). Returns (stream, changed, kept) with changed as split_changed_slots yields it,
+    so the trainers can be looked up and progress counted before the real pass.
+    """
+    stream = PokemonStream(file_path, TRAINER_FIELDS)
+    kept = {}
+    changed = list(split_changed_slots(file_path, stream, kept, output_dir))
+    return stream, changed, kept
+
+def record_import(file_path, slot_records, output_dir=None):
+    """Remember what a .dat file produced so the next run can skip it"""
+    import_manifest.record(file_path, output_dir or OUTPUT_DIR, slot_records)
+    import_manifest.save()
+    get_output_index(output_dir or OUTPUT_DIR).save()
+
+def volatile_fields(compound):
+    """Fields extract_pokemon_data fills with a run-dependent default for this compound, so they never count as drift"""
+    return set() if 'MetDate' in compound.get('PersistentData', {}) else {'met_date'}
+
+def load_archived_bundle(file_path, output_dir=None):
+    """Existing bundle entries of a .dat file keyed by identity: {identity: (entry, pokemon)}"""
+    bundle = new_bundle(file_path)
+    archived = {}
+    if bundle is not None:
+        path = os.path.join(output_dir or OUTPUT_DIR, bundle['name'])
+        if os.path.exists(path):
+            for pokemon in read_bundle(path):
+                archived[pokemon_identity(pokemon)] = (identity_filename(pokemon), pokemon)
+    return archived
+
+def find_archived_pokemon(pokemon_info, output_dir=None, archived_bundle=None):
+    """The archived copy of a Pokémon at its stable identity: (filename or bundle entry, data), or (None, None)"""
+    output_dir = output_dir or OUTPUT_DIR
+    identity = pokemon_identity(pokemon_info)
+    filename = get_output_index(output_dir).filename(identity)
+    if filename is None and os.path.exists(os.path.join(output_dir, identity_filename(pokemon_info, identity))):
+        filename = identity_filename(pokemon_info, identity)
+    if filename is not None:
+        try:
+            with open(os.path.join(output_dir, filename), 'r', encoding='utf-8') as json_file:
+                return filename, json.load(json_file)
+        except (OSError, ValueError):
+            return filename, {}
+    if archived_bundle and identity in archived_bundle:
+        return archived_bundle[identity]
+    return None, None
+
+def diff_pokemon(archived, pokemon_info, ignore=()):
+    """Fields whose value differs between the archived copy and a fresh extraction: {field: [old, new]}"""
+    # Round-trip through JSON so tuples/lists and int/float keys compare the way they were stored
+    current = json.loads(json.dumps(pokemon_info))
+    changes = {}
+    for field in sorted(set(archived) | set(current)):
+        if field in ignore:
+            continue
+        if archived.get(field) != current.get(field):
+            changes[field] = [archived.get(field), current.get(field)]
+    return changes
+
+def diff_file(file_path, extracted, kept, output_dir=None, total=None):
+    """
+    Dry run of one .dat file: compare every extracted Pokémon with its archived copy and yield 'diff' events,
+    then a 'diff_summary' that also lists archived Pokémon no longer in the file. Nothing is written.
+    extracted yields (label, pokemon_info, error, ignored_fields); kept maps unchanged slots to manifest records.
+    """
+    output_dir = output_dir or OUTPUT_DIR
+    archived_bundle = load_archived_bundle(file_path, output_dir)
+    counts = {'new': 0, 'changed': 0, 'unchanged': len(kept), 'errors': 0}
+    matched = {record.get('entry') or record['file'] for record in kept.values()}
+    
+    for processed, (label, pokemon_info, error, ignore) in enumerate(extracted, 1):
+        if not pokemon_info:
+            counts['errors'] += 1
+            yield {'event': 'error', 'file': file_path, 'label': label, 'error': error,
+                   'processed': processed, 'total': total}
+            continue
+        
+        archived_name, archived = find_archived_pokemon(pokemon_info, output_dir, archived_bundle)
+        if archived_name is None:
+            status, changes = 'new', {}
+        else:
+            matched.add(archived_name)
+            changes = diff_pokemon(archived, pokemon_info, ignore)
+            status = 'changed' if changes else 'unchanged'
+        counts[status] += 1
+        yield {'event': 'diff', 'file': file_path, 'label': label, 'status': status, 'species': pokemon_info['species'],
+               'archived': archived_name, 'changes': changes, 'processed': processed, 'total': total}
+    
+    # Pokémon the last import produced from this file that are no longer in it
+    previous = import_manifest.previous_slots(file_path, output_dir)
+    missing = sorted({record.get('entry') or record['file'] for record in previous.values()} - matched)
+    yield dict(counts, event='diff_summary', file=file_path, missing=missing)
+
+class ImportEngine:
+    """
+    Imports .dat files and reports every step as an event dict ({'event': 'pokemon', ...}) to a list of sinks.
+    The GUI, the CLI and the fallback all run through here and only differ in the sinks they attach.
+    """
+
+    def __init__(self, sinks=None, output_dir=None, cancel_event=None, dry_run=False):
+        self.sinks = list(sinks or [])
+        self.output_dir = output_dir
+        self.cancel_event = cancel_event  # threading.Event; when set the import stops after the current Pokémon
+        self.dry_run = dry_run  # Compare with the existing output instead of writing it
+
+    def cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def events(self, file_path):
+        """Import one file, yielding events as it goes"""
+        output_dir = self.output_dir or OUTPUT_DIR
+        yield {'event': 'start', 'file': file_path}
+        
+        if file_unchanged(file_path, output_dir):
+            yield {'event': 'unchanged', 'file': file_path}
+            return
+        
+        # Find the changed Pokémon and their trainers first, then stream the file again decoding only the tags we
+        # use; only Pokémon whose data changed since the last import are extracted.
+        try:
+            scan, changed, kept = scan_changed_slots(file_path, output_dir)
+        except Exception as e:
+            yield {'event': 'load_error', 'file': file_path, 'error': str(e)}
+            return
+        total = len(changed)
+        
+        yield {'event': 'structure', 'file': file_path, 'box_structure': scan.box_structure,
+               'kept': len(kept), 'total': total}
+        
+        # Look up every original trainer once, up front
+        resolve_trainer_names(changed)
+        del changed
+        
+        slot_records = {}
+        slots = split_changed_slots(file_path, PokemonStream(file_path), slot_records, output_dir)
+        if self.dry_run:
+            extracted = ((slot_label(box, slot), *extract_pokemon_data(compound, box, slot), volatile_fields(compound))
+                         for box, slot, compound, digest in slots)
+            yield from diff_file(file_path, extracted, slot_records, output_dir, total)
+            return
+        
+        pokemon_count = 0
+        error_count = 0
+        bundle = new_bundle(file_path)
+        for processed, (box, slot, compound, digest) in enumerate(slots, 1):
+            if self.cancelled():
+                # Keep the files written so far findable, but don't record the file as imported
+                get_output_index(output_dir).save()
+                yield {'event': 'cancelled', 'file': file_path, 'pokemon': pokemon_count, 'errors': error_count}
+                return
+            label = slot_label(box, slot)
+            pokemon_info, error = extract_pokemon_data(compound, box, slot)
+            if pokemon_info:
+                pokemon_count += 1
+                message, record = store_pokemon(pokemon_info, output_dir, bundle)
+                slot_records[slot_key(box, slot)] = dict(record, hash=digest)
+                yield {'event': 'pokemon', 'file': file_path, 'label': label, 'pokemon': pokemon_info,
+                       'message': message, 'processed': processed, 'total': total}
+            else:
+                error_count += 1
+                yield {'event': 'error', 'file': file_path, 'label': label, 'error': error,
+                       'processed': processed, 'total': total}
+        
+        if bundle is not None:
+            save_bundle(bundle, slot_records, output_dir)
+        record_import(file_path, slot_records, output_dir)
+        yield {'event': 'summary', 'file': file_path, 'pokemon': pokemon_count, 'errors': error_count,
+               'kept': len(slot_records) - pokemon_count}
+
+    def emit(self, event):
+        for sink in self.sinks:
+            sink.handle(event)
+
+    def import_file(self, file_path):
+        """Import one file, sending its events to the sinks. Returns the last event."""
+        event = None
+        for event in self.events(file_path):
+            self.emit(event)
+        return event
+
+    def finish(self):
+        """Save the trainer name cache and let the sinks flush their output"""
+        if not self.dry_run:
+            save_cache()
+        self.emit({'event': 'finished'})
+        for sink in self.sinks:
+            sink.close()
+
+class NullSink:
+    """Discards every event (for benchmarks and callers that only want the files)"""
+    def handle(self, event):
+        pass
+
+    def close(self):
+        pass
+
+class StdoutSink(NullSink):
+    """Prints one line per Pokémon; verbose also dumps every extracted field like the old CLI did"""
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+
+    def handle(self, event):
+        kind = event['event']
+        if kind == 'start':
+            print(f"Processing file: {event['file']}")
+        elif kind == 'unchanged':
+            print("Unchanged since the last import, skipping.")
+        elif kind == 'load_error':
+            print(f"Failed to load NBT file: {event['error']}")
+        elif kind == 'structure':
+            print(f"Detected box structure: {event['box_structure']}")
+            if event['kept']:
+                print(f"{event['kept']} Pokémon unchanged since the last import")
+        elif kind == 'pokemon':
+            pokemon_info = event['pokemon']
+            if self.verbose:
+                print(f"Extracted Pokémon Data for {event['label']}:")
+                for key, value in pokemon_info.items():
+                    print(f"{key}: {value}")
+            else:
+                print(f"✅ {event['label']}: {pokemon_info['species']} (Lv. {pokemon_info['level']}) - {event['message']}")
+        elif kind == 'error':
+            print(f"❌ Failed to extract Pokémon data for {event['label']}: {event['error']}")
+        elif kind == 'summary':
+            print(f"📊 {event['pokemon']} Pokémon imported, {event['errors']} errors, {event['kept']} unchanged")
+        elif kind == 'cancelled':
+            print(f"⏹ Import cancelled after {event['pokemon']} Pokémon")
+        elif kind == 'diff':
+            if event['status'] == 'new':
+                print(f"+ {event['label']}: {event['species']} (new)")
+            elif event['status'] == 'changed':
+                changes = ', '.join(f"{field}: {old!r} -> {new!r}" for field, (old, new) in event['changes'].items())
+                print(f"~ {event['label']}: {event['species']} ({event['archived']}) {changes}")
+            elif self.verbose:
+                print(f"= {event['label']}: {event['species']} (unchanged)")
+        elif kind == 'diff_summary':
+            for name in event['missing']:
+                print(f"- {name} (missing from {os.path.basename(event['file'])})")
+            print(f"📊 Dry run: {event['new']} new, {event['changed']} changed, {event['unchanged']} unchanged, "
+                  f"{len(event['missing'])} missing, {event['errors']} errors")
+
+class TkLogSink(NullSink):
+    """
+    Renders events for the parser window's log, progress bar and status label.
+    handle() only buffers; flush() applies everything buffered in one insert, so it must run on the Tk thread.
+    """
+    def __init__(self, output_text, progress_var=None, status_label=None):
+        self.output_text = output_text
+        self.progress_var = progress_var
+        self.status_label = status_label
+        self._lines = []  # text, tag, text, tag, ... as Text.insert takes them
+        self._progress = None
+        self._status = None
+
+    def _log(self, text, tag=""):
+        self._lines.extend((text, tag))
+
+    def handle(self, event):
+        kind = event['event']
+        name = os.path.basename(event.get('file', ''))
+        if kind == 'start':
+            self._status = f"Processing: {name}"
+            self._log(f"Processing file: {event['file']}\n", "heading")
+        elif kind == 'unchanged':
+            self._log("⏭ Unchanged since the last import, skipping\n\n", "success")
+            self._status = f"Unchanged: {name}"
+            self._progress = 100
+        elif kind == 'load_error':
+            self._log(f"❌ Error loading NBT file: {event['error']}\n", "error")
+            self._status = "Error loading file"
+        elif kind == 'structure':
+            self._log(f"Detected box structure: {event['box_structure']}\n", "heading")
+            if event['kept']:
+                self._log(f"⏭ {event['kept']} Pokémon unchanged since the last import\n")
+        elif kind == 'pokemon':
+            pokemon_info = event['pokemon']
+            shiny_star = "⭐ " if pokemon_info['shiny'] else ""
+            self._log(f"✅ {event['label']}: {shiny_star}{pokemon_info['species']} (Lv. {pokemon_info['level']}) - {event['message']}\n",
+                      "success")
+            self._progress = (event['processed'] / event['total']) * 100
+        elif kind == 'error':
+            self._log(f"❌ Error in {event['label']}: {event['error']}\n", "error")
+            self._progress = (event['processed'] / event['total']) * 100
+        elif kind == 'summary':
+            self._log(f"\n📊 Summary for {name}:\n", "heading")
+            self._log(f"✅ Successfully processed {event['pokemon']} Pokémon\n", "success")
+            if event['errors'] > 0:
+                self._log(f"❌ Encountered {event['errors']} errors\n", "error")
+            self._log("──────────────────────────────────────\n\n")
+            self._status = f"Completed: {name}"
+            self._progress = 100
+        elif kind == 'cancelled':
+            self._log(f"⏹ Cancelled after {event['pokemon']} Pokémon - {name} will be imported again next time\n\n", "error")
+            self._status = f"Cancelled: {name}"
+
+    def flush(self):
+        """Apply buffered output to the widgets (Tk thread only)"""
+        if self._lines:
+            self.output_text.insert(tk.END, *self._lines)
+            self.output_text.see(tk.END)
+            self._lines = []
+        if self._progress is not None and self.progress_var:
+            self.progress_var.set(self._progress)
+        self._progress = None
+        if self._status is not None and self.status_label:
+            self.status_label.config(text=self._status)
+        self._status = None
+
+    def close(self):
+        self.flush()
+
+class QueueSink(NullSink):
+    """Hands events from a worker thread to the Tk thread, which drains the queue on a timer"""
+    def __init__(self, event_queue):
+        self.event_queue = event_queue
+
+    def handle(self, event):
+        self.event_queue.put(event)
+
+class JsonReportSink(NullSink):
+    """Collects a per-file report and writes it as JSON when the engine finishes"""
+    def __init__(self, path):
+        self.path = path
+        self.files = []
+
+    def handle(self, event):
+        kind = event['event']
+        if kind == 'start':
+            self.files.append({'file': event['file'], 'status': 'imported', 'pokemon': [], 'errors': []})
+        elif kind in ('unchanged', 'load_error'):
+            self.files[-1]['status'] = kind
+            if kind == 'load_error':
+                self.files[-1]['error'] = event['error']
+        elif kind == 'structure':
+            self.files[-1].update(box_structure=event['box_structure'], kept=event['kept'])
+        elif kind == 'pokemon':
+            pokemon_info = event['pokemon']
+            self.files[-1]['pokemon'].append({'slot': event['label'], 'species': pokemon_info['species'],
+                                              'level': pokemon_info['level'], 'box_number': pokemon_info.get('box_number'),
+                                              'slot_number': pokemon_info.get('slot_number')})
+        elif kind == 'error':
+            self.files[-1]['errors'].append({'slot': event['label'], 'error': event['error']})
+        elif kind == 'cancelled':
+            self.files[-1]['status'] = 'cancelled'
+        elif kind == 'diff':
+            self.files[-1]['status'] = 'dry_run'
+            if event['status'] != 'unchanged':
+                self.files[-1].setdefault('diff', []).append({'slot': event['label'], 'status': event['status'],
+                                                              'species': event['species'], 'archived': event['archived'],
+                                                              'changes': event['changes']})
+        elif kind == 'diff_summary':
+            self.files[-1]['status'] = 'dry_run'
+            self.files[-1]['counts'] = {key: event[key] for key in ('new', 'changed', 'unchanged', 'errors')}
+            self.files[-1]['missing'] = event['missing']
+
+    def close(self):
+        with open(self.path, 'w', encoding='utf-8') as report_file:
+            json.dump({'files': self.files}, report_file, indent=4)
 
 def process_file(file_path, output_text, progress_var=None, status_label=None):
     """Process a .dat file and display results in the output text widget"""
     if not file_path:
         output_text.insert(tk.END, "No file selected.\n")
         return
+    sink = TkLogSink(output_text, progress_var, status_label)
+    ImportEngine([sink]).import_file(file_path)
+    sink.flush()
 
-    # Update status label if provided
-    if status_label:
-        status_label.config(text=f"Processing: {os.path.basename(file_path)}")
+def discover_world_dat_files(world_dir):
+    """Find every pcstore and playerpartystore .dat file in a world (or its pokemon) directory"""
+    pokemon_dir = os.path.join(world_dir, 'pokemon')
+    if not os.path.isdir(pokemon_dir):
+        pokemon_dir = world_dir
     
-    output_text.insert(tk.END, f"Processing file: {file_path}\n", "heading")
-    output_text.see(tk.END)
-    
-    nbt_data = load_nbt(file_path)
+    dat_files = []
+    for store in ('playerpartystore', 'pcstore'):
+        store_dir = os.path.join(pokemon_dir, store)
+        # Cobblemon shards the stores into sub-folders, so walk the whole tree
+        for root, _, files in os.walk(store_dir):
+            for filename in files:
+                if filename.endswith('.dat'):
+                    dat_files.append((store, os.path.join(root, filename)))
+    dat_files.sort()
+    return dat_files
+
+def extract_dat_file(file_path, previous_slots=None):
+    """
+    Parse one .dat file and extract every changed Pokémon without touching the network or the disk.
+    Runs inside the --world process pool, so it only returns plain data.
+    """
+    result = {'file': file_path, 'error': None, 'pokemon': [], 'errors': [], 'kept': {}}
+    changed = split_changed_slots(file_path, PokemonStream(file_path), result['kept'], previous_slots=previous_slots or {})
+    try:
+        for box, slot, compound, digest in changed:
+            pokemon_info, error = extract_pokemon_data(compound, box, slot)
+            if pokemon_info:
+                # Trainer names are resolved by the parent for Pokémon without a stored OriginalTrainer
+                persistent_data = compound.get('PersistentData', {})
+                trainer_uuid = None
+                if 'OriginalTrainer' not in persistent_data and 'PokemonOriginalTrainer' in compound:
+                    trainer_uuid = str(compound['PokemonOriginalTrainer'])
+                result['pokemon'].append((pokemon_info, trainer_uuid, slot_key(box, slot), digest,
+                                          slot_label(box, slot), volatile_fields(compound)))
+            else:
+                result['errors'].append((slot_label(box, slot), error))
+    except Exception as e:
+        # A file that breaks off part way is not imported at all, like one that can't be opened
+        result.update(error=str(e), pokemon=[], errors=[], kept={})
+    return result
+
+# Party Pokémon are numbered box 1, slot 1-6 like the first PC box, so they go to their own folder inside the player's
+PARTY_SUBDIR = 'party'
+WORLD_STATUSES = ('imported', 'unchanged', 'partial', 'failed')
+
+def world_player_status(player_summary):
+    """How a player's files went: all unchanged since the last import, all failed, some failed, or imported"""
+    if player_summary['unchanged'] == player_summary['files']:
+        return 'unchanged'
+    if player_summary['failed'] == player_summary['files'] - player_summary['unchanged']:
+        return 'failed'
+    return 'partial' if player_summary['failed'] else 'imported'
+
+def import_world(world_dir, output_root=None, workers=None):
+    """
+    Import a whole world: parse every player's .dat files in a process pool, one output folder per player with the
+    party in its PARTY_SUBDIR. Returns {player: summary} for every player found, with a status from WORLD_STATUSES.
+    """
+    output_root = output_root or OUTPUT_DIR
+    dat_files = discover_world_dat_files(world_dir)
+    if not dat_files:
+        print(f"No pcstore/playerpartystore .dat files found in {world_dir}")
+        return {}
     
-    if isinstance(nbt_data, tuple):  # Error occurred
-        nbt_data, error = None, nbt_data[1]
-        output_text.insert(tk.END, f"❌ Error loading NBT file: {error}\n", "error")
-        output_text.see(tk.END)
-        if status_label:
-            status_label.config(text="Error loading file")
-        return
+    print(f"Found {len(dat_files)} .dat files in {world_dir}")
+    started = time.time()
     
-    pokemon_count = 0
-    error_count = 0
-    total_possible = 0  # For progress calculation
+    def player_of(file_path):
+        return os.path.splitext(os.path.basename(file_path))[0]
     
-    # Count total possible Pokémon slots for progress bar
-    # Party slots
-    total_possible += sum(1 for i in range(6) if f'Slot{i}' in nbt_data)
+    def player_dir_for(store, file_path):
+        player_dir = os.path.join(output_root, player_of(file_path))
+        return os.path.join(player_dir, PARTY_SUBDIR) if store == 'playerpartystore' else player_dir
     
-    # Check for different PC box structures
-    box_structure = "unknown"
-    if any(f'Box{i}' in nbt_data for i in range(TOTAL_BOXES)):
-        # Traditional Box0, Box1, etc. structure
-        box_structure = "direct"
-        for box in range(TOTAL_BOXES):
-            box_key = f'Box{box}'
-            if box_key in nbt_data:
-                total_possible += sum(1 for slot in range(30) if f'Slot{slot}' in nbt_data[box_key])
-    elif 'pc' in nbt_data:
-        if 'boxes' in nbt_data['pc'] and isinstance(nbt_data['pc']['boxes'], list):
-            # Structure with pc.boxes array
-            box_structure = "pc_boxes_array"
-            for box_idx, box in enumerate(nbt_data['pc']['boxes']):
-                if 'pokemon' in box and isinstance(box['pokemon'], list):
-                    total_possible += len(box['pokemon'])
-        elif any(f'Box{i}' in nbt_data['pc'] for i in range(TOTAL_BOXES)):
-            # Structure with pc.Box0, pc.Box1, etc.
-            box_structure = "pc_boxes_direct"
-            for box in range(TOTAL_BOXES):
-                box_key = f'Box{box}'
-                if box_key in nbt_data['pc']:
-                    total_possible += sum(1 for slot in range(30) if f'Slot{slot}' in nbt_data['pc'][box_key])
+    # Every player is listed in the summary, including those whose files are skipped below
+    summary = {}
+    for store, file_path in dat_files:
+        player_summary = summary.setdefault(player_of(file_path), {'party': 0, 'pc': 0, 'unchanged_pokemon': 0, 'errors': 0,
+                                                                    'files': 0, 'unchanged': 0, 'failed': 0})
+        player_summary['files'] += 1
     
-    output_text.insert(tk.END, f"Detected box structure: {box_structure}\n", "heading")
-    processed_count = 0
-
-    # Process party Pokémon
-    for i in range(6):
-        slot = f'Slot{i}'
-        if slot in nbt_data:
-            pokemon_info, error = extract_pokemon_data(nbt_data, slot)
-            processed_count += 1
-            if pokemon_info:
-                pokemon_count += 1
-                save_result = save_pokemon_to_json(pokemon_info)
-                shiny_star = "⭐ " if pokemon_info['shiny'] else ""
-                output_text.insert(tk.END, f"✅ Party {slot}: {shiny_star}{pokemon_info['species']} (Lv. {pokemon_info['level']}) - {save_result}\n", 
-                                   "success")
-            else:
-                error_count += 1
-                output_text.insert(tk.END, f"❌ Error in Party {slot}: {error}\n", "error")
-            output_text.see(tk.END)
-            
-            # Update progress bar if provided
-            if progress_var and total_possible > 0:
-                progress_var.set((processed_count / total_possible) * 100)
-
-    # Process PC boxes based on detected structure
-    if box_structure == "direct":
-        # Process traditional Box0, Box1, etc. structure
-        for box in range(TOTAL_BOXES):
-            box_key = f'Box{box}'
-            if box_key in nbt_data:
-                for slot in range(30):
-                    slot_key = f'Slot{slot}'
-                    # Only process if the slot actually exists in the box
-                    if slot_key in nbt_data[box_key]:
-                        # Create a compound slot key in the format "Box{box} -> Slot{slot}"
-                        compound_slot_key = f"{box_key} -> {slot_key}"
-                        pokemon_info, error = extract_pokemon_data(nbt_data, compound_slot_key)
-                        processed_count += 1
-                        if pokemon_info:
-                            pokemon_count += 1
-                            save_result = save_pokemon_to_json(pokemon_info)
-                            shiny_star = "⭐ " if pokemon_info['shiny'] else ""
-                            output_text.insert(tk.END, f"✅ {box_key} {slot_key}: {shiny_star}{pokemon_info['species']} (Lv. {pokemon_info['level']}) - {save_result}\n", 
-                                              "success")
-                        else:
-                            error_count += 1
-                            output_text.insert(tk.END, f"❌ Error in {box_key} {slot_key}: {error}\n", "error")
-                        output_text.see(tk.END)
-                        
-                        # Update progress bar if provided
-                        if progress_var and total_possible > 0:
-                            progress_var.set((processed_count / total_possible) * 100)
+    # Skip files that have not changed since the last import
+    pending = []
+    skipped = 0
+    for store, file_path in dat_files:
+        player_dir = player_dir_for(store, file_path)
+        if file_unchanged(file_path, player_dir):
+            skipped += 1
+            player_summary = summary[player_of(file_path)]
+            player_summary['unchanged'] += 1
+            player_summary['unchanged_pokemon'] += len(import_manifest.previous_slots(file_path, player_dir))
+        else:
+            previous = {} if FULL_IMPORT else import_manifest.previous_slots(file_path, player_dir)
+            pending.append((store, file_path, previous))
+    if skipped:
+        print(f"⏭ {skipped} files unchanged since the last import")
     
-    elif box_structure == "pc_boxes_array":
-        # Process pc.boxes array structure
-        for box_idx, box in enumerate(nbt_data['pc']['boxes']):
-            box_key = f'Box{box_idx}'
-            if 'pokemon' in box and isinstance(box['pokemon'], list):
-                for poke in box['pokemon']:
-                    if 'slot_number' in poke:
-                        slot_idx = poke['slot_number']
-                        slot_key = f'Slot{slot_idx}'
-                        compound_slot_key = f"{box_key} -> {slot_key}"
-                        pokemon_info, error = extract_pokemon_data(nbt_data, compound_slot_key)
-                        processed_count += 1
-                        if pokemon_info:
-                            pokemon_count += 1
-                            save_result = save_pokemon_to_json(pokemon_info)
-                            shiny_star = "⭐ " if pokemon_info['shiny'] else ""
-                            output_text.insert(tk.END, f"✅ {box_key} {slot_key}: {shiny_star}{pokemon_info['species']} (Lv. {pokemon_info['level']}) - {save_result}\n", 
-                                              "success")
-                        else:
-                            error_count += 1
-                            output_text.insert(tk.END, f"❌ Error in {box_key} {slot_key}: {error}\n", "error")
-                        output_text.see(tk.END)
-                        
-                        # Update progress bar if provided
-                        if progress_var and total_possible > 0:
-                            progress_var.set((processed_count / total_possible) * 100)
+    # Parsing is CPU-bound nbtlib work, so it runs in processes rather than threads
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(extract_dat_file, file_path, previous): (store, file_path) for store, file_path, previous in pending}
+        for future in as_completed(futures):
+            store, file_path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'file': file_path, 'error': str(e), 'pokemon': [], 'errors': [], 'kept': {}}
+            result['store'] = store
+            results.append(result)
+    results.sort(key=lambda result: result['file'])
     
-    elif box_structure == "pc_boxes_direct":
-        # Process pc.Box0, pc.Box1, etc. structure
-        for box in range(TOTAL_BOXES):
-            box_key = f'Box{box}'
-            if box_key in nbt_data['pc']:
-                for slot in range(30):
-                    slot_key = f'Slot{slot}'
-                    # Only process if the slot actually exists in the box
-                    if slot_key in nbt_data['pc'][box_key]:
-                        # Create a compound slot key in the format "Box{box} -> Slot{slot}"
-                        compound_slot_key = f"{box_key} -> {slot_key}"
-                        pokemon_info, error = extract_pokemon_data(nbt_data, compound_slot_key)
-                        processed_count += 1
-                        if pokemon_info:
-                            pokemon_count += 1
-                            save_result = save_pokemon_to_json(pokemon_info)
-                            shiny_star = "⭐ " if pokemon_info['shiny'] else ""
-                            output_text.insert(tk.END, f"✅ {box_key} {slot_key}: {shiny_star}{pokemon_info['species']} (Lv. {pokemon_info['level']}) - {save_result}\n", 
-                                              "success")
-                        else:
-                            error_count += 1
-                            output_text.insert(tk.END, f"❌ Error in {box_key} {slot_key}: {error}\n", "error")
-                        output_text.see(tk.END)
-                        
-                        # Update progress bar if provided
-                        if progress_var and total_possible > 0:
-                            progress_var.set((processed_count / total_possible) * 100)
-    else:
-        # Unknown structure, try all possibilities for each box
-        for box in range(TOTAL_BOXES):
-            box_key = f'Box{box}'
-            for slot in range(30):
-                slot_key = f'Slot{slot}'
-                compound_slot_key = f"{box_key} -> {slot_key}"
-                
-                # Try to extract data with our flexible function
-                pokemon_info, error = extract_pokemon_data(nbt_data, compound_slot_key)
-                if pokemon_info:
-                    pokemon_count += 1
-                    save_result = save_pokemon_to_json(pokemon_info)
-                    shiny_star = "⭐ " if pokemon_info['shiny'] else ""
-                    output_text.insert(tk.END, f"✅ {box_key} {slot_key}: {shiny_star}{pokemon_info['species']} (Lv. {pokemon_info['level']}) - {save_result}\n", 
-                                      "success")
-                    output_text.see(tk.END)
-                    processed_count += 1
-                    
-                    # Update progress bar if provided
-                    if progress_var:
-                        progress_var.set((processed_count / (TOTAL_BOXES * 30)) * 100)  # Approximate progress
+    # Resolve every trainer of the whole world in one concurrent pass
+    trainer_uuids = {entry[1] for result in results for entry in result['pokemon'] if entry[1]}
+    resolve_usernames(trainer_uuids, uuid_cache)
     
-    output_text.insert(tk.END, f"\n📊 Summary for {os.path.basename(file_path)}:\n", "heading")
-    output_text.insert(tk.END, f"✅ Successfully processed {pokemon_count} Pokémon\n", "success")
-    if error_count > 0:
-        output_text.insert(tk.END, f"❌ Encountered {error_count} errors\n", "error")
-    output_text.insert(tk.END, "──────────────────────────────────────\n\n")
-    output_text.see(tk.END)
+    drift = {'new': 0, 'changed': 0, 'unchanged': 0, 'missing': 0}
+    dry_run_sink = StdoutSink()
+    for result in results:
+        player_summary = summary[player_of(result['file'])]
+        if result['error']:
+            player_summary['errors'] += 1
+            player_summary['failed'] += 1
+            print(f"❌ {result['file']}: {result['error']}")
+            continue
+        
+        player_dir = player_dir_for(result['store'], result['file'])
+        slot_records = result['kept']
+        player_summary['unchanged_pokemon'] += len(slot_records)
+        for pokemon_info, trainer_uuid, *_ in result['pokemon']:
+            if trainer_uuid:
+                pokemon_info['original_trainer'] = lookup_username(trainer_uuid)
+        
+        if DRY_RUN:
+            extracted = [(label, pokemon_info, None, ignore) for pokemon_info, _, _, _, label, ignore in result['pokemon']]
+            extracted += [(label, None, error, ()) for label, error in result['errors']]
+            for event in diff_file(result['file'], extracted, slot_records, player_dir):
+                if event['event'] == 'diff_summary':
+                    for key in ('new', 'changed', 'unchanged'):
+                        drift[key] += event[key]
+                    drift['missing'] += len(event['missing'])
+                if event['event'] != 'error':
+                    dry_run_sink.handle(event)
+        else:
+            bundle = new_bundle(result['file'])
+            for pokemon_info, _, key, digest, _, _ in result['pokemon']:
+                _, record = store_pokemon(pokemon_info, player_dir, bundle)
+                slot_records[key] = dict(record, hash=digest)
+            if bundle is not None:
+                save_bundle(bundle, slot_records, player_dir)
+            record_import(result['file'], slot_records, player_dir)
+        
+        player_summary['party' if result['store'] == 'playerpartystore' else 'pc'] += len(result['pokemon'])
+        player_summary['errors'] += len(result['errors'])
+        for label, error in result['errors']:
+            print(f"❌ {result['file']} {label}: {error}")
     
-    # Update status label if provided
-    if status_label:
-        status_label.config(text=f"Completed: {os.path.basename(file_path)}")
+    if not DRY_RUN:
+        save_cache()
     
-    # Reset progress bar to 100%
-    if progress_var:
-        progress_var.set(100)
+    # Consolidated summary
+    total_pokemon = sum(s['party'] + s['pc'] for s in summary.values())
+    total_errors = sum(s['errors'] for s in summary.values())
+    print(f"\n📊 Summary for {world_dir}:")
+    for player, player_summary in sorted(summary.items()):
+        player_summary['status'] = world_player_status(player_summary)
+        print(f"  {player} [{player_summary['status']}]: {player_summary['party']} party, {player_summary['pc']} PC, "
+              f"{player_summary['unchanged_pokemon']} unchanged, {player_summary['errors']} errors")
+    players = sum(1 for s in summary.values() if s['status'] in ('imported', 'partial'))
+    if DRY_RUN:
+        print(f"🔍 Dry run of {total_pokemon} Pokémon for {players} of {len(summary)} players against {output_root}: "
+              f"{drift['new']} new, {drift['changed']} changed, {drift['unchanged']} unchanged, {drift['missing']} missing")
+    else:
+        print(f"✅ Imported {total_pokemon} Pokémon for {players} of {len(summary)} players into {output_root} in {time.time() - started:.1f}s")
+    if total_errors:
+        print(f"❌ Encountered {total_errors} errors")
+    return summary
 
 class CobblemonParserUI:
     def __init__(self, root):
         # Load the cache at the start
-        global uuid_cache
+        global uuid_cache, import_manifest
         uuid_cache = load_cache()
+        import_manifest = load_manifest()
         
         self.root = root
         self.root.title("Cobblemon Parser")
+        
+        # Import events travel from the worker thread to the Tk thread through this queue
+        self.event_queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.log_sink = None
         self.root.geometry("900x700")
         self.root.configure(bg=THEME_BACKGROUND)
         self.root.minsize(800, 600)
@@ -1039,6 +998,10 @@ class CobblemonParserUI:
         self.process_btn = ttk.Button(self.button_frame, text="Process Files", command=self.process_files)
         self.process_btn.pack(side=tk.RIGHT)
         
+        # Cancel button (only enabled while an import is running)
+        self.cancel_btn = ttk.Button(self.button_frame, text="Cancel", command=self.cancel_processing, state=tk.DISABLED)
+        self.cancel_btn.pack(side=tk.RIGHT, padx=5)
+        
         # Create output section title
         output_title = tk.Label(self.main_frame, text="Processing Results", 
                             font=self.heading_font, bg=THEME_BACKGROUND, fg=THEME_TEXT_PRIMARY)
@@ -1093,241 +1056,102 @@ class CobblemonParserUI:
         self.output_text.insert(tk.END, "Processing started...\n\n", "heading")
         self.status_label.config(text="Processing...")
         self.progress_var.set(0)
+        self.process_btn.config(state=tk.DISABLED)
+        self.cancel_btn.config(state=tk.NORMAL)
+        self.cancel_event.clear()
+        self.log_sink = TkLogSink(self.output_text, self.progress_var, self.status_label)
         
-        # Use threading to avoid UI freezing
+        # Use threading to avoid UI freezing; the worker never touches a widget, it only queues events
         def process_thread():
-            # Process first file if provided
-            if file1:
-                process_file(file1, self.output_text, self.progress_var, self.status_label)
-            
-            # Process second file if provided
-            if file2:
-                process_file(file2, self.output_text, self.progress_var, self.status_label)
-                
-            # Save the cache at the end
-            save_cache()
-            
-            # Update UI on completion
-            self.output_text.insert(tk.END, "Processing complete! Cache saved.\n", "heading")
-            self.status_label.config(text="Ready")
-            self.progress_var.set(100)
+            engine = None
+            file_path = None  # Set by the loop; still None if setting up the engine fails
+            try:
+                engine = ImportEngine([QueueSink(self.event_queue)], cancel_event=self.cancel_event)
+                for file_path in (file1, file2):
+                    if file_path and not self.cancel_event.is_set():
+                        engine.import_file(file_path)
+            except Exception as e:
+                self.event_queue.put({'event': 'load_error', 'file': file_path, 'error': str(e)})
+            finally:
+                # Save the cache at the end
+                if engine is not None:
+                    engine.finish()
+                else:
+                    self.event_queue.put({'event': 'finished'})
         
         # Start the processing thread
         threading.Thread(target=process_thread, daemon=True).start()
-
-def safe_json_loads(response_text, max_size=32768):
-    """Safely parse JSON response with size validation and chunked handling."""
-    if not response_text or not response_text.strip():
-        logging.error("Empty response received")
-        return None
+        self.root.after(UI_FRAME_MS, self.drain_events)
+    
+    def drain_events(self):
+        """Apply every queued import event in one batch, then check again next frame"""
+        finished = False
+        while True:
+            try:
+                event = self.event_queue.get_nowait()
+            except queue.Empty:
+                break
+            if event['event'] == 'finished':
+                finished = True
+                break
+            self.log_sink.handle(event)
+        self.log_sink.flush()
+        
+        if not finished:
+            self.root.after(UI_FRAME_MS, self.drain_events)
+            return
         
-    if len(response_text) > max_size:
-        logging.warning(f"Response size ({len(response_text)} bytes) exceeds maximum size ({max_size} bytes)")
-        # Try to find a valid JSON boundary
-        last_valid_pos = response_text.rfind('}', 0, max_size)
-        if last_valid_pos != -1:
-            response_text = response_text[:last_valid_pos + 1]
-            logging.info(f"Truncated response to {len(response_text)} bytes at valid JSON boundary")
+        # Update UI on completion
+        if self.cancel_event.is_set():
+            self.output_text.insert(tk.END, "Processing cancelled. Cache saved.\n", "heading")
         else:
-            logging.error("Could not find valid JSON boundary for truncation")
-            return None
-            
-    try:
-        return json.loads(response_text)
-    except json.JSONDecodeError as e:
-        logging.error(f"JSON decode error: {str(e)}")
-        # Try to recover partial JSON
-        if e.pos > 0:
-            try:
-                return json.loads(response_text[:e.pos])
-            except:
-                logging.error("Failed to recover partial JSON")
-                pass
-        return None
-
-def fetch_pokemon_data(species):
-    """Fetch Pokemon data with proper error handling and chunked response support."""
-    # Use pokemon-species endpoint instead of pokemon
-    url = f"https://pokeapi.co/api/v2/pokemon-species/{species.lower()}"
-    headers = {
-        'Accept': 'application/json',
-        'User-Agent': 'PokemonPC/1.0'
-    }
-    
-    max_retries = 3
-    retry_delay = 1
+            self.output_text.insert(tk.END, "Processing complete! Cache saved.\n", "heading")
+            self.progress_var.set(100)
+        self.output_text.see(tk.END)
+        self.status_label.config(text="Ready")
+        self.process_btn.config(state=tk.NORMAL)
+        self.cancel_btn.config(state=tk.DISABLED)
     
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers, timeout=10, stream=True)
-            if response.status_code == 200:
-                # Use chunked response handling
-                chunks = []
-                total_size = 0
-                for chunk in response.iter_content(chunk_size=8192, decode_unicode=True):
-                    if chunk:
-                        chunks.append(chunk)
-                        total_size += len(chunk)
-                        if total_size > 32768:
-                            logging.warning(f"Response for {species} exceeds size limit, truncating")
-                            break
-                response_text = ''.join(chunks)
-                
-                # Check if response is empty
-                if not response_text.strip():
-                    logging.error(f"Empty response received for {species}")
-                    if attempt < max_retries - 1:
-                        time.sleep(retry_delay * (attempt + 1))
-                        continue
-                    return None
-                    
-                return safe_json_loads(response_text)
-            elif response.status_code == 429:  # Rate limit
-                logging.warning(f"Rate limit hit for {species}, attempt {attempt + 1}/{max_retries}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay * (attempt + 1))
-                    continue
-            else:
-                logging.error(f"HTTP {response.status_code} error for {species}")
-            return None
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Request error for {species}: {str(e)}")
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay * (attempt + 1))
-                continue
-            return None
-    return None
+    def cancel_processing(self):
+        self.cancel_event.set()
+        self.cancel_btn.config(state=tk.DISABLED)
+        self.status_label.config(text="Cancelling...")
 
 def main():
     # Parse command line arguments
     args = parse_args()
     
     # Set the output directory if specified
-    global OUTPUT_DIR
+    global OUTPUT_DIR, OFFLINE_MODE, FULL_IMPORT, OUTPUT_FORMAT, DRY_RUN, uuid_cache, import_manifest
+    OFFLINE_MODE = args.offline
+    FULL_IMPORT = args.full
+    DRY_RUN = args.dry_run
+    OUTPUT_FORMAT = args.format
+    import_manifest = load_manifest()
     if args.output:
         OUTPUT_DIR = args.output
         print(f"Using output directory: {OUTPUT_DIR}")
     
-    if args.cli and args.files:
+    if args.inspect:
+        # Diagnostics only - nothing is imported
+        print(json.dumps(inspect_nbt(args.inspect), indent=2))
+    elif args.world:
+        # Bulk mode - import every player of a world
+        uuid_cache = load_cache()
+        import_world(args.world, OUTPUT_DIR, args.workers)
+    elif args.cli and args.files:
         # CLI mode - use the provided file path
         file_path = args.files
-        print(f"Processing file in CLI mode: {file_path}")
         
         # Load cache
-        global uuid_cache
         uuid_cache = load_cache()
         
-        nbt_data = load_nbt(file_path)
-        
-        if not isinstance(nbt_data, tuple):  # No error
-            # Process party Pokémon
-            for i in range(6):
-                slot = f'Slot{i}'
-                if slot in nbt_data:
-                    pokemon_info, error = extract_pokemon_data(nbt_data, slot)
-                    if pokemon_info:
-                        print(f"Extracted Pokémon Data for {slot}:")
-                        for key, value in pokemon_info.items():
-                            print(f"{key}: {value}")
-                        save_pokemon_to_json(pokemon_info)
-                    else:
-                        print(f"Failed to extract Pokémon data for {slot}: {error}")
-            
-            # Check for different PC box structures
-            box_structure = "unknown"
-            if any(f'Box{i}' in nbt_data for i in range(TOTAL_BOXES)):
-                # Traditional Box0, Box1, etc. structure
-                box_structure = "direct"
-            elif 'pc' in nbt_data:
-                if 'boxes' in nbt_data['pc'] and isinstance(nbt_data['pc']['boxes'], list):
-                    # Structure with pc.boxes array
-                    box_structure = "pc_boxes_array"
-                elif any(f'Box{i}' in nbt_data['pc'] for i in range(TOTAL_BOXES)):
-                    # Structure with pc.Box0, pc.Box1, etc.
-                    box_structure = "pc_boxes_direct"
-            
-            print(f"Detected box structure: {box_structure}")
-            
-            # Process PC boxes based on detected structure
-            if box_structure == "direct":
-                # Process traditional Box0, Box1, etc. structure
-                for box in range(TOTAL_BOXES):
-                    box_key = f'Box{box}'
-                    if box_key in nbt_data:
-                        for slot in range(30):
-                            slot_key = f'Slot{slot}'
-                            # Only process if the slot actually exists in the box
-                            if slot_key in nbt_data[box_key]:
-                                # Create a compound slot key in the format "Box{box} -> Slot{slot}"
-                                compound_slot_key = f"{box_key} -> {slot_key}"
-                                pokemon_info, error = extract_pokemon_data(nbt_data, compound_slot_key)
-                                if pokemon_info:
-                                    print(f"Extracted Pokémon Data for {box_key} -> {slot_key}:")
-                                    for key, value in pokemon_info.items():
-                                        print(f"{key}: {value}")
-                                    save_pokemon_to_json(pokemon_info)
-                                else:
-                                    print(f"Failed to extract Pokémon data for {box_key} -> {slot_key}: {error}")
-            
-            elif box_structure == "pc_boxes_array":
-                # Process pc.boxes array structure
-                for box_idx, box in enumerate(nbt_data['pc']['boxes']):
-                    box_key = f'Box{box_idx}'
-                    if 'pokemon' in box and isinstance(box['pokemon'], list):
-                        for poke in box['pokemon']:
-                            if 'slot_number' in poke:
-                                slot_idx = poke['slot_number']
-                                slot_key = f'Slot{slot_idx}'
-                                compound_slot_key = f"{box_key} -> {slot_key}"
-                                pokemon_info, error = extract_pokemon_data(nbt_data, compound_slot_key)
-                                if pokemon_info:
-                                    print(f"Extracted Pokémon Data for {box_key} -> {slot_key}:")
-                                    for key, value in pokemon_info.items():
-                                        print(f"{key}: {value}")
-                                    save_pokemon_to_json(pokemon_info)
-                                else:
-                                    print(f"Failed to extract Pokémon data for {box_key} -> {slot_key}: {error}")
-            
-            elif box_structure == "pc_boxes_direct":
-                # Process pc.Box0, pc.Box1, etc. structure
-                for box in range(TOTAL_BOXES):
-                    box_key = f'Box{box}'
-                    if box_key in nbt_data['pc']:
-                        for slot in range(30):
-                            slot_key = f'Slot{slot}'
-                            # Only process if the slot actually exists in the box
-                            if slot_key in nbt_data['pc'][box_key]:
-                                # Create a compound slot key in the format "Box{box} -> Slot{slot}"
-                                compound_slot_key = f"{box_key} -> {slot_key}"
-                                pokemon_info, error = extract_pokemon_data(nbt_data, compound_slot_key)
-                                if pokemon_info:
-                                    print(f"Extracted Pokémon Data for {box_key} -> {slot_key}:")
-                                    for key, value in pokemon_info.items():
-                                        print(f"{key}: {value}")
-                                    save_pokemon_to_json(pokemon_info)
-                                else:
-                                    print(f"Failed to extract Pokémon data for {box_key} -> {slot_key}: {error}")
-            else:
-                # Unknown structure, try all possibilities for each box
-                print("Unknown box structure, trying all possibilities...")
-                for box in range(TOTAL_BOXES):
-                    box_key = f'Box{box}'
-                    for slot in range(30):
-                        slot_key = f'Slot{slot}'
-                        compound_slot_key = f"{box_key} -> {slot_key}"
-                        
-                        # Try to extract data with our flexible function
-                        pokemon_info, error = extract_pokemon_data(nbt_data, compound_slot_key)
-                        if pokemon_info:
-                            print(f"Extracted Pokémon Data for {box_key} -> {slot_key}:")
-                            for key, value in pokemon_info.items():
-                                print(f"{key}: {value}")
-                            save_pokemon_to_json(pokemon_info)
-        else:
-            print(f"Failed to load NBT file: {nbt_data[1]}")
-        
-        # Save the cache at the end
-        save_cache()
+        sinks = [StdoutSink(verbose=args.verbose)]
+        if args.report:
+            sinks.append(JsonReportSink(args.report))
+        engine = ImportEngine(sinks, dry_run=DRY_RUN)
+        engine.import_file(file_path)
+        engine.finish()
     else:
         # GUI mode - create and run the application
         try:
@@ -1349,62 +1173,16 @@ def main():
             file_path = filedialog.askopenfilename(title="Select Cobblemon .dat file", filetypes=[("DAT Files", "*.dat")])
             
             if file_path:
-                # Process the file using the simplified approach
+                # Process the file with the same engine, logging to the console
                 uuid_cache = load_cache()
-                nbt_data = load_nbt(file_path)
+                engine = ImportEngine([StdoutSink()])
+                result = engine.import_file(file_path)
+                engine.finish()
                 
-                if not isinstance(nbt_data, tuple):
-                    # Process party Pokémon
-                    for i in range(6):
-                        slot = f'Slot{i}'
-                        if slot in nbt_data:
-                            pokemon_info, error = extract_pokemon_data(nbt_data, slot)
-                            if pokemon_info:
-                                save_pokemon_to_json(pokemon_info)
-                                print(f"Processed {pokemon_info['species']} (Level {pokemon_info['level']})")
-                    
-                    # Check for different PC box structures
-                    box_structure = "unknown"
-                    if any(f'Box{i}' in nbt_data for i in range(TOTAL_BOXES)):
-                        # Traditional Box0, Box1, etc. structure
-                        box_structure = "direct"
-                        for box in range(TOTAL_BOXES):
-                            box_key = f'Box{box}'
-                            if box_key in nbt_data:
-                                for slot in range(30):
-                                    slot_key = f'Slot{slot}'
-                                    # Only process if the slot actually exists in the box
-                                    if slot_key in nbt_data[box_key]:
-                                        # Create a compound slot key
-                                        compound_slot_key = f"{box_key} -> {slot_key}"
-                                        pokemon_info, error = extract_pokemon_data(nbt_data, compound_slot_key)
-                                        if pokemon_info:
-                                            save_pokemon_to_json(pokemon_info)
-                                            print(f"Processed {pokemon_info['species']} (Level {pokemon_info['level']})")
-                    elif 'pc' in nbt_data:
-                        print(f"Detected PC structure, checking format...")
-                        # Try other structures with the same approach as in CLI mode
-                        if 'boxes' in nbt_data['pc'] and isinstance(nbt_data['pc']['boxes'], list):
-                            box_structure = "pc_boxes_array"
-                            # Process the same way as in CLI mode
-                            for box_idx, box in enumerate(nbt_data['pc']['boxes']):
-                                if 'pokemon' in box and isinstance(box['pokemon'], list):
-                                    for poke in box['pokemon']:
-                                        if 'slot_number' in poke:
-                                            slot_idx = poke['slot_number']
-                                            box_key = f'Box{box_idx}'
-                                            slot_key = f'Slot{slot_idx}'
-                                            compound_slot_key = f"{box_key} -> {slot_key}"
-                                            pokemon_info, error = extract_pokemon_data(nbt_data, compound_slot_key)
-                                            if pokemon_info:
-                                                save_pokemon_to_json(pokemon_info)
-                                                print(f"Processed {pokemon_info['species']} (Level {pokemon_info['level']})")
-                    
-                    # Save the cache
-                    save_cache()
+                if result['event'] != 'load_error':
                     messagebox.showinfo("Success", "Processing complete! Check the console for details.")
                 else:
-                    messagebox.showerror("Error", f"Failed to load NBT file: {nbt_data[1]}")
+                    messagebox.showerror("Error", f"Failed to load NBT file: {result['error']}")
             else:
                 print("No file selected. Exiting.")
 
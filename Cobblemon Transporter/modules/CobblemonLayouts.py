@@ -0,0 +1,313 @@
+import os
+
+from nbtlib import Compound, Int, List
+
+from SlotOccupancy import DEFAULT_TOTAL_BOXES, DEFAULT_SLOTS_PER_BOX
+
+# Party and PC layouts of Cobblemon storage .dat files, shared by the importer (reading) and the exporter (inserting).
+# Boxes and slots are 0-indexed here, like the .dat files themselves; the party is box None.
+PARTY_SIZE = 6
+PLACEMENT_POLICIES = ("fill", "spread", "species", "box")
+BOX_LAYOUTS = ("direct", "pc_boxes_direct", "pc_boxes_array", "pc_numeric", "pc_pokemon_list")
+
+
+def detect_box_structure(nbt_data):
+    """Work out which PC layout a loaded .dat file uses"""
+    if any(key.startswith('Box') and key[3:].isdigit() for key in nbt_data.keys()):
+        # Traditional Box0, Box1, etc. structure
+        return "direct"
+    if 'pc' in nbt_data and hasattr(nbt_data['pc'], 'keys'):
+        pc_data = nbt_data['pc']
+        if 'boxes' in pc_data and isinstance(pc_data['boxes'], list):
+            # Structure with pc.boxes array
+            return "pc_boxes_array"
+        if any(key.startswith('Box') and key[3:].isdigit() for key in pc_data.keys()):
+            # Structure with pc.Box0, pc.Box1, etc.
+            return "pc_boxes_direct"
+        if any(key.isdigit() for key in pc_data.keys()):
+            # Structure with pc["0"]["1"], etc.
+            return "pc_numeric"
+        if 'pokemon' in pc_data and isinstance(pc_data['pokemon'], list):
+            # Single flat pc.pokemon array carrying box_number/slot_number
+            return "pc_pokemon_list"
+    return "unknown"
+
+
+def detect_layout(nbt_data):
+    """Like detect_box_structure, but also recognises party files ("party"), including empty ones"""
+    box_structure = detect_box_structure(nbt_data)
+    if box_structure != "unknown":
+        return box_structure
+    if 'SlotCount' in nbt_data or _numbered_keys(nbt_data, 'Slot'):
+        return "party"
+    if 'BoxCount' in nbt_data:
+        # A PC saved with every box empty
+        return "direct"
+    return "unknown"
+
+
+def _numbered_keys(compound, prefix):
+    """Return (index, key) pairs for keys like Slot0, Slot1... sorted by index"""
+    keys = []
+    for key in compound.keys():
+        suffix = key[len(prefix):]
+        if key.startswith(prefix) and suffix.isdigit():
+            keys.append((int(suffix), key))
+    keys.sort()
+    return keys
+
+
+def _is_pokemon(compound):
+    return hasattr(compound, 'keys') and len(compound) > 0
+
+
+def iter_pokemon_slots(nbt_data, box_structure=None):
+    """
+    Walk a loaded .dat file once and yield (box, slot, compound) for every Pokémon.
+    box is None for party Pokémon, otherwise the 0-indexed PC box; slot is 0-indexed.
+    """
+    # Party Pokémon (Slot0-Slot5)
+    for slot_idx, slot_key in _numbered_keys(nbt_data, 'Slot'):
+        if _is_pokemon(nbt_data[slot_key]):
+            yield None, slot_idx, nbt_data[slot_key]
+
+    if box_structure is None:
+        box_structure = detect_box_structure(nbt_data)
+
+    if box_structure in ("direct", "pc_boxes_direct"):
+        boxes = nbt_data if box_structure == "direct" else nbt_data['pc']
+        for box_idx, box_key in _numbered_keys(boxes, 'Box'):
+            box = boxes[box_key]
+            if not hasattr(box, 'keys'):
+                continue
+            for slot_idx, slot_key in _numbered_keys(box, 'Slot'):
+                if _is_pokemon(box[slot_key]):
+                    yield box_idx, slot_idx, box[slot_key]
+
+    elif box_structure == "pc_boxes_array":
+        for box_idx, box in enumerate(nbt_data['pc']['boxes']):
+            if 'pokemon' in box and isinstance(box['pokemon'], list):
+                for poke in box['pokemon']:
+                    if 'slot_number' in poke and _is_pokemon(poke):
+                        yield box_idx, int(poke['slot_number']), poke
+
+    elif box_structure == "pc_numeric":
+        pc_data = nbt_data['pc']
+        box_keys = sorted((int(key), key) for key in pc_data.keys() if key.isdigit())
+        for box_idx, box_key in box_keys:
+            box = pc_data[box_key]
+            if not hasattr(box, 'keys'):
+                continue
+            slot_keys = sorted((int(key), key) for key in box.keys() if key.isdigit())
+            for slot_idx, slot_key in slot_keys:
+                if _is_pokemon(box[slot_key]):
+                    yield box_idx, slot_idx, box[slot_key]
+
+    elif box_structure == "pc_pokemon_list":
+        for poke in nbt_data['pc']['pokemon']:
+            if 'box_number' in poke and 'slot_number' in poke and _is_pokemon(poke):
+                yield int(poke['box_number']), int(poke['slot_number']), poke
+
+
+def _append(parent, key, compound):
+    """Append to a list of compounds; an empty list may have been loaded without an element type"""
+    if key in parent and len(parent[key]) > 0:
+        parent[key].append(compound)
+    else:
+        parent[key] = List[Compound]([compound])
+
+
+class StorageLayout:
+    """
+    A loaded party or PC .dat file in any layout the importer reads, with the free slots of every box indexed.
+    The index is built in one pass; finding a free slot resumes after the last full box and insert() keeps it current,
+    so filling a nearly full PC doesn't rescan the boxes before it.
+    """
+
+    def __init__(self, nbt_data, layout=None, slots_per_box=DEFAULT_SLOTS_PER_BOX):
+        self.nbt_data = nbt_data
+        self.layout = layout or detect_layout(nbt_data)
+        self.slots_per_box = slots_per_box
+        self.pokemon = {}  # (box, slot) -> compound
+        for box, slot, compound in iter_pokemon_slots(nbt_data, self.layout):
+            if (box is None) == (self.layout == "party"):
+                self.pokemon[(box, slot)] = compound
+        self.boxes = self._box_indices()
+        # box -> free slots in descending order, so the lowest free slot is popped from the end
+        self._free = {box: [slot for slot in reversed(range(self._capacity(box))) if (box, slot) not in self.pokemon]
+                      for box in self.boxes}
+        self._cursor = 0  # Every box before boxes[_cursor] is full
+
+    def _box_indices(self):
+        if self.layout == "party":
+            return [None]
+        if self.layout in ("direct", "pc_boxes_direct"):
+            container = self._box_container()
+            highest = max((index for index, _ in _numbered_keys(container, 'Box')), default=-1)
+            # A brand new PC has no boxes saved yet; they are created as Pokémon are inserted
+            return list(range(max(highest + 1, int(self.nbt_data.get('BoxCount', 0))) or DEFAULT_TOTAL_BOXES))
+        if self.layout == "pc_boxes_array":
+            return list(range(len(self.nbt_data['pc']['boxes'])))
+        if self.layout == "pc_numeric":
+            highest = max((int(key) for key in self.nbt_data['pc'].keys() if key.isdigit()), default=-1)
+            return list(range(highest + 1))
+        if self.layout == "pc_pokemon_list":
+            highest = max((box for box, _ in self.pokemon), default=-1)
+            return list(range(max(highest + 1, DEFAULT_TOTAL_BOXES)))
+        return []
+
+    def _capacity(self, box):
+        if box is None:
+            return int(self.nbt_data.get('SlotCount', PARTY_SIZE))
+        return self.slots_per_box
+
+    def _box_container(self):
+        return self.nbt_data if self.layout == "direct" else self.nbt_data['pc']
+
+    @property
+    def supported(self):
+        return self.layout == "party" or self.layout in BOX_LAYOUTS
+
+    def first_pokemon(self):
+        """The Pokémon in the lowest occupied position, or None if the storage is empty"""
+        if not self.pokemon:
+            return None
+        return self.pokemon[min(self.pokemon, key=lambda position: (position[0] or 0, position[1]))]
+
+    def free_count(self):
+        return sum(len(slots) for slots in self._free.values())
+
+    def free_slots(self, box=None):
+        """Yield free (box, slot) positions in order, in one box or across the whole storage"""
+        boxes = [box] if box is not None or self.layout == "party" else self.boxes[self._cursor:]
+        for box_index in boxes:
+            for slot in reversed(self._free.get(box_index, [])):
+                yield box_index, slot
+
+    def next_free(self, box=None):
+        """The lowest free (box, slot), optionally within one box; None when there is no room"""
+        if box is not None or self.layout == "party":
+            slots = self._free.get(box, [])
+            return (box, slots[-1]) if slots else None
+        while self._cursor < len(self.boxes):
+            box_index = self.boxes[self._cursor]
+            if self._free[box_index]:
+                return box_index, self._free[box_index][-1]
+            self._cursor += 1
+        return None
+
+    def plan(self, keys, policy="fill", box=None):
+        """
+        Choose a free position for each item, without inserting anything. keys are the items' species (only the
+        "species" policy looks at them). Returns a list aligned with keys holding (box, slot), or None for items that
+        don't fit, so a short PC is filled as far as it goes. Deterministic, and linear in items plus boxes.
+            fill     lowest free slots first, box by box
+            spread   round-robin over the boxes that still have room
+            species  each species in the first box with room for all of it, else wherever fill would put it
+            box      only the given 0-indexed box
+        """
+        if policy not in PLACEMENT_POLICIES:
+            raise ValueError(f"Unknown placement policy {policy!r}; expected one of {', '.join(PLACEMENT_POLICIES)}")
+        # Work on a copy so the index only changes when Pokémon are actually inserted
+        free = {box_index: list(slots) for box_index, slots in self._free.items()}
+        boxes = [box_index for box_index in self.boxes[self._cursor:] if free[box_index]]
+        positions = [None] * len(keys)
+
+        def take(box_index):
+            return (box_index, free[box_index].pop()) if free.get(box_index) else None
+
+        def fill(indices):
+            current = 0
+            for index in indices:
+                while current < len(boxes) and not free[boxes[current]]:
+                    current += 1
+                if current == len(boxes):
+                    return
+                positions[index] = take(boxes[current])
+
+        if policy == "box":
+            if self.layout == "party" or box not in free:
+                raise ValueError(f"Box {box} does not exist in this {self.layout} storage")
+            for index in range(len(keys)):
+                positions[index] = take(box)
+        elif policy == "spread":
+            turn = 0
+            for index in range(len(keys)):
+                if not boxes:
+                    break
+                turn %= len(boxes)
+                positions[index] = take(boxes[turn])
+                if free[boxes[turn]]:
+                    turn += 1
+                else:
+                    boxes.pop(turn)  # Full now; the next box takes its turn
+        elif policy == "species":
+            groups = {}
+            for index, key in enumerate(keys):
+                groups.setdefault(str(key).lower(), []).append(index)
+            leftovers = []
+            for indices in groups.values():
+                target = next((box_index for box_index in boxes if len(free[box_index]) >= len(indices)), None)
+                if target is None:
+                    leftovers.extend(indices)
+                    continue
+                for index in indices:
+                    positions[index] = take(target)
+            fill(sorted(leftovers))
+        else:
+            fill(range(len(keys)))
+        return positions
+
+    def is_free(self, box, slot):
+        return slot in self._free.get(box, ())
+
+    def insert(self, box, slot, compound):
+        """Write a Pokémon compound into a free position, creating the box if the file doesn't have it yet"""
+        if not self.is_free(box, slot):
+            raise ValueError(f"Box {box} slot {slot} is not a free position in this {self.layout} storage")
+        if self.layout == "party":
+            self.nbt_data[f'Slot{slot}'] = compound
+        elif self.layout in ("direct", "pc_boxes_direct"):
+            container = self._box_container()
+            box_key = f'Box{box}'
+            if box_key not in container:
+                container[box_key] = Compound()
+            container[box_key][f'Slot{slot}'] = compound
+        elif self.layout == "pc_boxes_array":
+            compound['slot_number'] = Int(slot)
+            _append(self.nbt_data['pc']['boxes'][box], 'pokemon', compound)
+        elif self.layout == "pc_numeric":
+            pc_data = self.nbt_data['pc']
+            if str(box) not in pc_data:
+                pc_data[str(box)] = Compound()
+            pc_data[str(box)][str(slot)] = compound
+        elif self.layout == "pc_pokemon_list":
+            compound['box_number'] = Int(box)
+            compound['slot_number'] = Int(slot)
+            _append(self.nbt_data['pc'], 'pokemon', compound)
+        else:
+            raise ValueError("Cannot insert into a storage with an unknown layout")
+        self._free[box].remove(slot)
+        self.pokemon[(box, slot)] = compound
+
+
+def layout_hint(dat_path):
+    """Layout to assume for a .dat file with no recognisable structure yet, from the store folder it sits in"""
+    parts = os.path.normpath(os.path.realpath(dat_path)).split(os.sep)
+    if 'playerpartystore' in parts:
+        return "party"
+    if 'pcstore' in parts:
+        return "direct"
+    return None
+
+
+def load_layout(nbt_data, default=None):
+    """
+    Wrap a loaded .dat file, or return None if its layout isn't one the importer can read back.
+    default is used for files too empty to tell (see layout_hint).
+    """
+    layout = detect_layout(nbt_data)
+    if layout == "unknown" and default:
+        layout = default
+    storage = StorageLayout(nbt_data, layout)
+    return storage if storage.supported else None
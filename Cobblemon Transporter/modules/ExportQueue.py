@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+import time
+
+# Directory for cache
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'cache')
+QUEUE_FILE = os.path.join(CACHE_DIR, 'export_queue.json')
+
+
+class ExportQueue:
+    """
+    Exports held back while a server had the target world open. Each job keeps the Pokémon data itself rather than
+    the JSON paths, so it applies the same even if the files are moved or edited before the server is stopped.
+    """
+
+    def __init__(self, path=QUEUE_FILE):
+        self.path = path
+        self.jobs = []
+        self._dirty = False
+
+    def load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.jobs = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: could not read export queue {self.path}: {e}")
+                self.jobs = []
+        return self
+
+    def save(self):
+        """Atomically write the queue if anything changed."""
+        if not self._dirty:
+            return
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.export_queue-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.jobs, f)
+            os.replace(temp_path, self.path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._dirty = False
+
+    def add(self, dat_file, entries, policy, box, duplicates):
+        """Queue (label, pokemon_info) entries for dat_file with the options they were exported with."""
+        self.jobs.append({
+            'dat': os.path.abspath(dat_file),
+            'entries': [[label, pokemon_info] for label, pokemon_info in entries],
+            'policy': policy,
+            'box': box,
+            'duplicates': duplicates,
+            'queued': time.time(),
+        })
+        self._dirty = True
+
+    def grouped(self):
+        """
+        Queued entries per target, in queue order: {dat: [(entries, policy, box, duplicates), ...]} with one
+        sub-batch per set of options, so every file can be written once however its jobs were queued.
+        """
+        groups = {}
+        for job in self.jobs:
+            batches = groups.setdefault(job['dat'], {})
+            options = (job['policy'], job['box'], job['duplicates'])
+            batches.setdefault(options, []).extend((label, pokemon_info) for label, pokemon_info in job['entries'])
+        return {dat: [(entries, *options) for options, entries in batches.items()] for dat, batches in groups.items()}
+
+    def remove(self, dat_files):
+        """Drop every job for the given .dat files, once they have been applied."""
+        dat_files = set(dat_files)
+        kept = [job for job in self.jobs if job['dat'] not in dat_files]
+        if len(kept) != len(self.jobs):
+            self.jobs = kept
+            self._dirty = True
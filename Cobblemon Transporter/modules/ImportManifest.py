@@ -0,0 +1,113 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+
+# Directory for cache
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'cache')
+MANIFEST_FILE = os.path.join(CACHE_DIR, 'import_manifest.json')
+
+
+def hash_file(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_compound(compound):
+    """Hash the serialised NBT bytes of a single Pokémon compound."""
+    digest = getattr(compound, 'digest', None)
+    if digest:
+        # Already hashed from the raw file bytes while streaming (see NbtStream)
+        return digest
+    buffer = io.BytesIO()
+    compound.write(buffer)
+    return hashlib.sha256(buffer.getvalue()).hexdigest()
+
+
+def slot_key(box, slot):
+    return f"{'party' if box is None else box}:{slot}"
+
+
+class ImportManifest:
+    """
+    Remembers which .dat files (and which Pokémon inside them) were already imported into an output folder.
+    Files are fingerprinted by size, mtime and a SHA-256 of their contents; slots by the hash of their compound.
+    """
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        self._entries = {}
+        self._dirty = False
+
+    def load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: could not read import manifest {self.path}: {e}")
+                self._entries = {}
+        return self
+
+    def save(self):
+        """Atomically write the manifest if anything changed."""
+        if not self._dirty:
+            return
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.import_manifest-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(temp_path, self.path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._dirty = False
+
+    def _entry(self, dat_path, output_dir):
+        return self._entries.get(os.path.realpath(output_dir), {}).get(os.path.realpath(dat_path))
+
+    def _outputs_exist(self, slots, output_dir):
+        return all(os.path.exists(os.path.join(output_dir, entry['file'])) for entry in slots.values())
+
+    def is_unchanged(self, dat_path, output_dir):
+        """
+        True when the file matches its last import and every JSON it produced is still there.
+        Size and mtime are checked first; the content hash is only computed when they differ.
+        """
+        entry = self._entry(dat_path, output_dir)
+        if entry is None:
+            return False
+        stat = os.stat(dat_path)
+        if (stat.st_size, stat.st_mtime) != (entry['size'], entry['mtime']):
+            if stat.st_size != entry['size'] or hash_file(dat_path) != entry['sha256']:
+                return False
+            # Touched but identical: remember the new mtime so the next check is cheap again
+            entry['mtime'] = stat.st_mtime
+            self._dirty = True
+        return self._outputs_exist(entry.get('slots', {}), output_dir)
+
+    def previous_slots(self, dat_path, output_dir):
+        """Slot hashes recorded for a file whose output files still exist."""
+        entry = self._entry(dat_path, output_dir)
+        if entry is None:
+            return {}
+        return {key: value for key, value in entry.get('slots', {}).items()
+                if os.path.exists(os.path.join(output_dir, value['file']))}
+
+    def record(self, dat_path, output_dir, slots):
+        """Store the fingerprint of an imported file; slots maps slot_key -> {'hash': ..., 'file': ...}."""
+        stat = os.stat(dat_path)
+        self._entries.setdefault(os.path.realpath(output_dir), {})[os.path.realpath(dat_path)] = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'sha256': hash_file(dat_path),
+            'slots': slots,
+        }
+        self._dirty = True
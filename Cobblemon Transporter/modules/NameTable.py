@@ -0,0 +1,118 @@
+import json
+import os
+import re
+import threading
+
+from ReferenceData import lookup_id, lookup_name
+
+# Directory for cache
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'cache')
+HYPHENS_FILE = os.path.join(CACHE_DIR, 'hyphens.json')
+
+# Shared name-normalisation table for moves, abilities and species.
+# hyphens.json maps Cobblemon identifiers (e.g. "closecombat") to PokeAPI style names ("close-combat").
+# It is read lazily once per process and only re-read when the file's mtime changes.
+# Names it doesn't know fall back to the offline reference store (ReferenceData), then to the name itself.
+_lock = threading.Lock()
+_table = {}
+_reverse_table = {}
+_loaded_mtime = None
+_loaded = False
+
+
+def _compact(name):
+    """Strip everything but letters and digits, e.g. "king's-shield" -> "kingsshield"."""
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+def _build_reverse(table):
+    """Map the hyphenated names back to the identifier Cobblemon uses."""
+    reverse = {}
+    for cobblemon_name, hyphenated in table.items():
+        key = hyphenated.lower()
+        current = reverse.get(key)
+        # Several identifiers can point at the same name; prefer the one that is simply the
+        # compacted form of the hyphenated name (e.g. "vicegrip" over "visegrip").
+        if current is None or (cobblemon_name == _compact(key) and current != _compact(key)):
+            reverse[key] = cobblemon_name
+    return reverse
+
+
+def _refresh():
+    global _table, _reverse_table, _loaded_mtime, _loaded
+    try:
+        mtime = os.path.getmtime(HYPHENS_FILE)
+    except OSError:
+        mtime = None
+
+    if _loaded and mtime == _loaded_mtime:
+        return
+
+    with _lock:
+        if _loaded and mtime == _loaded_mtime:
+            return
+        table = {}
+        if mtime is not None:
+            try:
+                with open(HYPHENS_FILE, 'r', encoding='utf-8') as f:
+                    table = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: could not read {HYPHENS_FILE}: {e}")
+        _table = table
+        _reverse_table = _build_reverse(table)
+        _loaded_mtime = mtime
+        _loaded = True
+
+
+def get_name_table():
+    """Return the Cobblemon identifier -> hyphenated name table (shared, do not modify)."""
+    _refresh()
+    return _table
+
+
+def get_reverse_name_table():
+    """Return the hyphenated name -> Cobblemon identifier table (shared, do not modify)."""
+    _refresh()
+    return _reverse_table
+
+
+def reference_name(kind, name):
+    """The reference store's name for a species/move/ability/nature given by name in any spelling or by id; None if unknown."""
+    value = str(name).strip()
+    entry_id = int(value) if value.isdigit() else lookup_id(kind, value)
+    return None if entry_id is None else lookup_name(kind, entry_id)
+
+
+def reference_display_name(kind, name):
+    """
+    The reference store's hyphenated spelling of a Cobblemon identifier hyphens.json doesn't list ("hooh" -> "ho-oh"),
+    or None when the store doesn't know it or spells it the same way.
+    """
+    hyphenated = reference_name(kind, name)
+    if hyphenated is None or hyphenated == name.lower() or _compact(hyphenated) != _compact(name):
+        return None
+    return hyphenated
+
+
+def to_display_name(name, kind=None):
+    """Convert a Cobblemon move/ability/species identifier to its hyphenated name, if one is known."""
+    hyphenated = get_name_table().get(name)
+    if hyphenated is None and kind is not None:
+        hyphenated = reference_display_name(kind, name)
+    return name if hyphenated is None else hyphenated
+
+
+def to_cobblemon_name(name, kind=None):
+    """
+    Convert a hyphenated (or capitalised) move/ability/species name back to the Cobblemon identifier.
+    With a kind, spellings like "King's Shield" and numeric ids are resolved through the reference store.
+    """
+    lowered = name.lower()
+    mapped = get_reverse_name_table().get(lowered)
+    if mapped is not None:
+        return mapped
+    if kind is not None:
+        known = reference_name(kind, name)
+        if known is not None:
+            return _compact(known)
+    return lowered.replace('-', '')
@@ -0,0 +1,284 @@
+import gzip
+import hashlib
+import io
+import re
+import struct
+
+from PokemonFields import DECODED_TAGS
+
+# NBT tag ids
+TAG_END = 0
+TAG_BYTE = 1
+TAG_SHORT = 2
+TAG_INT = 3
+TAG_LONG = 4
+TAG_FLOAT = 5
+TAG_DOUBLE = 6
+TAG_BYTE_ARRAY = 7
+TAG_STRING = 8
+TAG_LIST = 9
+TAG_COMPOUND = 10
+TAG_INT_ARRAY = 11
+TAG_LONG_ARRAY = 12
+
+# Fixed payload sizes and struct formats of the numeric tags
+_NUMERIC = {
+    TAG_BYTE: (1, '>b'),
+    TAG_SHORT: (2, '>h'),
+    TAG_INT: (4, '>i'),
+    TAG_LONG: (8, '>q'),
+    TAG_FLOAT: (4, '>f'),
+    TAG_DOUBLE: (8, '>d'),
+}
+_ARRAY_ITEM = {
+    TAG_BYTE_ARRAY: (1, 'b'),
+    TAG_INT_ARRAY: (4, 'i'),
+    TAG_LONG_ARRAY: (8, 'q'),
+}
+
+# Tags of a Pokémon compound that extract_pokemon_data reads (the PokemonFields table plus the trainer and array
+# positions). None decodes the whole value; anything not listed (held items, battle state, features, ...) is skipped
+# without being built.
+POKEMON_FIELDS = dict.fromkeys(DECODED_TAGS + ('PokemonOriginalTrainer', 'slot_number', 'box_number'))
+# Just the trainer, for a quick pass that only needs the digests and trainer UUIDs
+TRAINER_FIELDS = {'PokemonOriginalTrainer': None}
+
+_BOX_KEY = re.compile(r'Box(\d+)$')
+_SLOT_KEY = re.compile(r'Slot(\d+)$')
+
+
+class StreamedCompound(dict):
+    """A partially decoded Pokémon compound; digest is the SHA-256 of its raw NBT payload."""
+    digest = None
+
+
+class NbtStreamError(Exception):
+    pass
+
+
+class _Reader:
+    def __init__(self, stream):
+        self._stream = stream
+        self.hasher = None  # Set while a Pokémon compound is being read
+
+    def read(self, size):
+        data = self._stream.read(size)
+        if len(data) != size:
+            raise NbtStreamError("Unexpected end of NBT data")
+        if self.hasher is not None:
+            self.hasher.update(data)
+        return data
+
+    def tag_id(self):
+        return self.read(1)[0]
+
+    def string(self):
+        length = struct.unpack('>H', self.read(2))[0]
+        return self.read(length).decode('utf-8', errors='replace')
+
+    def length(self):
+        return struct.unpack('>i', self.read(4))[0]
+
+
+def _open(file_path):
+    raw = open(file_path, 'rb')
+    if raw.read(2) != b'\x1f\x8b':
+        raw.seek(0)
+        return raw
+    raw.close()
+    # gzip.open owns the file it opens, so closing the reader closes the file too
+    return io.BufferedReader(gzip.open(file_path, 'rb'), buffer_size=1 << 16)
+
+
+def _skip(reader, tag):
+    """Consume a payload without building Python objects for it."""
+    if tag in _NUMERIC:
+        reader.read(_NUMERIC[tag][0])
+    elif tag == TAG_STRING:
+        reader.read(struct.unpack('>H', reader.read(2))[0])
+    elif tag in _ARRAY_ITEM:
+        reader.read(reader.length() * _ARRAY_ITEM[tag][0])
+    elif tag == TAG_LIST:
+        item_tag = reader.tag_id()
+        count = reader.length()
+        if item_tag in _NUMERIC:
+            reader.read(count * _NUMERIC[item_tag][0])
+        else:
+            for _ in range(count):
+                _skip(reader, item_tag)
+    elif tag == TAG_COMPOUND:
+        while True:
+            child = reader.tag_id()
+            if child == TAG_END:
+                return
+            reader.read(struct.unpack('>H', reader.read(2))[0])
+            _skip(reader, child)
+    else:
+        raise NbtStreamError(f"Unknown NBT tag id {tag}")
+
+
+def _decode(reader, tag, fields=None):
+    """Decode a payload into plain Python values; compounds only keep the keys listed in fields."""
+    if tag in _NUMERIC:
+        size, fmt = _NUMERIC[tag]
+        return struct.unpack(fmt, reader.read(size))[0]
+    if tag == TAG_STRING:
+        return reader.string()
+    if tag in _ARRAY_ITEM:
+        count = reader.length()
+        size, fmt = _ARRAY_ITEM[tag]
+        return list(struct.unpack(f'>{count}{fmt}', reader.read(count * size)))
+    if tag == TAG_LIST:
+        item_tag = reader.tag_id()
+        count = reader.length()
+        return [_decode(reader, item_tag) for _ in range(count)]
+    if tag == TAG_COMPOUND:
+        result = {}
+        while True:
+            child = reader.tag_id()
+            if child == TAG_END:
+                return result
+            name = reader.string()
+            if fields is None or name in fields:
+                result[name] = _decode(reader, child, fields.get(name) if fields else None)
+            else:
+                _skip(reader, child)
+    raise NbtStreamError(f"Unknown NBT tag id {tag}")
+
+
+class PokemonStream:
+    """
+    Stream the Pokémon out of a Cobblemon .dat file without materialising the whole NBT tree.
+    Iterating yields (box, slot, compound) exactly like CobblemonLayouts.iter_pokemon_slots
+    (box is None for the party, both 0-indexed). box_structure is filled in as the layout is discovered.
+    """
+
+    def __init__(self, file_path, fields=POKEMON_FIELDS):
+        self.file_path = file_path
+        self.fields = fields
+        self.box_structure = "unknown"
+
+    def _layout(self, name):
+        if self.box_structure == "unknown":
+            self.box_structure = name
+
+    def _pokemon(self, reader):
+        reader.hasher = hashlib.sha256()
+        try:
+            compound = StreamedCompound(_decode(reader, TAG_COMPOUND, self.fields))
+            compound.digest = reader.hasher.hexdigest()
+        finally:
+            reader.hasher = None
+        return compound
+
+    def _slot_container(self, reader, box_idx):
+        """A BoxN compound holding SlotN compounds"""
+        while True:
+            tag = reader.tag_id()
+            if tag == TAG_END:
+                return
+            name = reader.string()
+            match = _SLOT_KEY.match(name)
+            if tag == TAG_COMPOUND and match:
+                compound = self._pokemon(reader)
+                if compound:
+                    yield box_idx, int(match.group(1)), compound
+            else:
+                _skip(reader, tag)
+
+    def _numeric_box(self, reader, box_idx):
+        """A pc["N"] compound holding pc["N"]["M"] Pokémon"""
+        while True:
+            tag = reader.tag_id()
+            if tag == TAG_END:
+                return
+            name = reader.string()
+            if tag == TAG_COMPOUND and name.isdigit():
+                compound = self._pokemon(reader)
+                if compound:
+                    yield box_idx, int(name), compound
+            else:
+                _skip(reader, tag)
+
+    def _pokemon_list(self, reader, box_idx):
+        """A list of Pokémon compounds that carry their own slot_number (and box_number when box_idx is None)"""
+        item_tag = reader.tag_id()
+        count = reader.length()
+        if item_tag != TAG_COMPOUND:
+            for _ in range(count):
+                _skip(reader, item_tag)
+            return
+        for _ in range(count):
+            compound = self._pokemon(reader)
+            if not compound or 'slot_number' not in compound:
+                continue
+            if box_idx is None:
+                if 'box_number' in compound:
+                    yield int(compound['box_number']), int(compound['slot_number']), compound
+            else:
+                yield box_idx, int(compound['slot_number']), compound
+
+    def _boxes_array(self, reader):
+        item_tag = reader.tag_id()
+        count = reader.length()
+        if item_tag != TAG_COMPOUND:
+            for _ in range(count):
+                _skip(reader, item_tag)
+            return
+        for box_idx in range(count):
+            while True:
+                tag = reader.tag_id()
+                if tag == TAG_END:
+                    break
+                name = reader.string()
+                if name == 'pokemon' and tag == TAG_LIST:
+                    yield from self._pokemon_list(reader, box_idx)
+                else:
+                    _skip(reader, tag)
+
+    def _pc(self, reader):
+        while True:
+            tag = reader.tag_id()
+            if tag == TAG_END:
+                return
+            name = reader.string()
+            box_match = _BOX_KEY.match(name)
+            if name == 'boxes' and tag == TAG_LIST:
+                self._layout("pc_boxes_array")
+                yield from self._boxes_array(reader)
+            elif box_match and tag == TAG_COMPOUND:
+                self._layout("pc_boxes_direct")
+                yield from self._slot_container(reader, int(box_match.group(1)))
+            elif name.isdigit() and tag == TAG_COMPOUND:
+                self._layout("pc_numeric")
+                yield from self._numeric_box(reader, int(name))
+            elif name == 'pokemon' and tag == TAG_LIST:
+                self._layout("pc_pokemon_list")
+                yield from self._pokemon_list(reader, None)
+            else:
+                _skip(reader, tag)
+
+    def __iter__(self):
+        with _open(self.file_path) as stream:
+            reader = _Reader(stream)
+            if reader.tag_id() != TAG_COMPOUND:
+                raise NbtStreamError("NBT root is not a compound")
+            reader.string()  # Root name
+            while True:
+                tag = reader.tag_id()
+                if tag == TAG_END:
+                    return
+                name = reader.string()
+                slot_match = _SLOT_KEY.match(name)
+                box_match = _BOX_KEY.match(name)
+                if slot_match and tag == TAG_COMPOUND:
+                    compound = self._pokemon(reader)
+                    if compound:
+                        yield None, int(slot_match.group(1)), compound
+                elif box_match and tag == TAG_COMPOUND:
+                    self._layout("direct")
+                    yield from self._slot_container(reader, int(box_match.group(1)))
+                elif name == 'pc' and tag == TAG_COMPOUND:
+                    yield from self._pc(reader)
+                else:
+                    _skip(reader, tag)
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import uuid as uuid_module
+
+# Kept next to the JSON files so it moves with the folder. Not a .json file, so the PC viewer never
+# mistakes it for a Pokémon.
+INDEX_FILENAME = '.pokemon_index'
+
+
+def uuid_from_int_array(values):
+    """Convert Cobblemon's UUID int array (4 signed 32-bit ints, most significant first) to a UUID string."""
+    try:
+        values = [int(value) for value in values]
+    except (TypeError, ValueError):
+        return None
+    if len(values) != 4 or not any(values):
+        return None
+    number = 0
+    for value in values:
+        number = (number << 32) | (value & 0xFFFFFFFF)
+    return str(uuid_module.UUID(int=number))
+
+
+def pokemon_identity(pokemon_info):
+    """
+    Stable identity of an imported Pokémon: its Cobblemon UUID when it has one, otherwise a full
+    SHA-256 of the fields the old filenames were derived from.
+    """
+    pokemon_uuid = uuid_from_int_array(pokemon_info.get('uuid') or [])
+    if pokemon_uuid:
+        return f"uuid:{pokemon_uuid}"
+    stats = json.dumps([pokemon_info.get('species'), pokemon_info.get('ivs'), pokemon_info.get('evs')], sort_keys=True)
+    return f"sha256:{hashlib.sha256(stats.encode('utf-8')).hexdigest()}"
+
+
+def identity_filename(pokemon_info, identity=None):
+    """Filename for a Pokémon that has no file yet, e.g. pikachu_5f1c...json"""
+    identity = identity or pokemon_identity(pokemon_info)
+    kind, value = identity.split(':', 1)
+    if kind == 'sha256':
+        value = value[:32]  # 128 bits, same as a UUID
+    return f"{pokemon_info['species'].lower()}_{value}.json"
+
+
+class OutputIndex:
+    """
+    Identity -> filename map of one output directory, so re-importing a Pokémon rewrites its existing
+    file (even after it evolved or its EVs changed) instead of creating a duplicate or clobbering another one.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, INDEX_FILENAME)
+        self._entries = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: could not read output index {self.path}: {e}")
+                self._entries = {}
+        return self
+
+    def __len__(self):
+        return len(self._entries)
+
+    def filename(self, identity):
+        """The file recorded for an identity, or None when it was never written or has since been deleted."""
+        filename = self._entries.get(identity)
+        if filename and os.path.exists(os.path.join(self.directory, filename)):
+            return filename
+        return None
+
+    def assign(self, pokemon_info):
+        """Return the filename a Pokémon should be written to, reusing its existing file if there is one."""
+        identity = pokemon_identity(pokemon_info)
+        with self._lock:
+            filename = self.filename(identity)
+            if filename is None:
+                filename = identity_filename(pokemon_info, identity)
+                self._entries[identity] = filename
+                self._dirty = True
+            return filename
+
+    def save(self):
+        """Atomically write the index if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix='.pokemon_index-', suffix='.tmp', dir=self.directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(self._entries, f)
+                os.replace(temp_path, self.path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            self._dirty = False
+
+
+# One index per output directory, loaded on first use
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_output_index(directory):
+    key = os.path.realpath(directory)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = OutputIndex(directory).load()
+            _indexes[key] = index
+        return index
@@ -0,0 +1,68 @@
+import gzip
+import json
+import os
+import tempfile
+
+# A bundle holds many Pokémon as newline-delimited JSON, one compact object per line.
+# ".ndjson.gz" bundles are gzip-compressed. Neither ends in ".json", so older tools simply ignore them.
+BUNDLE_EXTENSIONS = ('.ndjson', '.ndjson.gz')
+OUTPUT_FORMATS = ('json', 'ndjson', 'ndjson.gz')
+
+
+def is_bundle(filename):
+    return filename.endswith(BUNDLE_EXTENSIONS)
+
+
+def _open(path, mode, compressed=None):
+    if compressed is None:
+        compressed = path.endswith('.gz')
+    if compressed:
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def read_bundle(path):
+    """Yield every Pokémon dict stored in a bundle, skipping lines that can't be parsed."""
+    with _open(path, 'r') as bundle_file:
+        for line in bundle_file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                pokemon = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(pokemon, dict):
+                yield pokemon
+
+
+def write_bundle(path, pokemon_list):
+    """Atomically replace a bundle with the given Pokémon."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix='.bundle-', suffix='.tmp', dir=directory)
+    os.close(fd)
+    try:
+        with _open(temp_path, 'w', compressed=path.endswith('.gz')) as bundle_file:
+            for pokemon in pokemon_list:
+                bundle_file.write(json.dumps(pokemon, separators=(',', ':')))
+                bundle_file.write('\n')
+        os.chmod(temp_path, 0o644)  # mkstemp creates private files; bundles are ordinary output
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def bundle_name(dat_path, output_format):
+    """
+    Bundle filename for a .dat file. Party and PC stores of one player share the file stem,
+    so the store folder is part of the name when the file sits inside one.
+    """
+    stem = os.path.splitext(os.path.basename(dat_path))[0]
+    parts = os.path.normpath(os.path.realpath(dat_path)).split(os.sep)
+    for store in ('playerpartystore', 'pcstore'):
+        if store in parts:
+            return f"{stem}-{store}.{output_format}"
+    return f"{stem}.{output_format}"
@@ -0,0 +1,489 @@
+from collections import namedtuple
+from datetime import date
+
+from nbtlib import Byte, Compound, Float, Int, List, Long, String
+
+from NameTable import get_name_table, reference_display_name, to_cobblemon_name
+
+# The fields of a Cobblemon Pokémon compound and their JSON counterparts, in the order they appear in the JSON files.
+# The importer decodes with decode_pokemon (NBT -> JSON) and the exporter encodes with encode_pokemon (JSON -> NBT),
+# so both directions read the same table and a field can't be added to one side only.
+
+# Stats in the order the JSON files list them
+STATS = ['attack', 'defence', 'hp', 'special_attack', 'special_defence', 'speed']
+MAX_IV = 31
+MAX_EV = 252
+MAX_EV_TOTAL = 510
+
+# Stat name spellings seen in JSON files -> Cobblemon stat; built once, normalize_stat_name is a dict lookup
+_STAT_NAMES = {
+    **{stat: stat for stat in STATS},
+    'defense': 'defence',
+    'def': 'defence',
+    'special_defense': 'special_defence',
+    'spdef': 'special_defence',
+    'sp_def': 'special_defence',
+    'sp_defense': 'special_defence',
+    'specialattack': 'special_attack',
+    'spatk': 'special_attack',
+    'sp_atk': 'special_attack',
+    'sp_attack': 'special_attack',
+}
+# Stats with underscores ignored, for spellings like "specialdefence" or "special_de_fence"
+_COMPACT_STAT_NAMES = {stat.replace('_', ''): stat for stat in STATS}
+
+# Mapping from PKHeX ribbon names to Cobblemon mark/ribbon identifiers
+MARK_NAME_MAP = {
+    # Ribbons
+    "ChampionKalos": "cobblemon:ribbon_champion_kalos",
+    "ChampionG3": "cobblemon:ribbon_champion",
+    "ChampionSinnoh": "cobblemon:ribbon_champion_sinnoh",
+    "BestFriends": "cobblemon:ribbon_best_friends",
+    "Training": "cobblemon:ribbon_training",
+    "BattlerSkillful": "cobblemon:ribbon_battler_skillful",
+    "BattlerExpert": "cobblemon:ribbon_battler_expert",
+    "Effort": "cobblemon:ribbon_effort",
+    "Alert": "cobblemon:ribbon_day_alert",
+    "Shock": "cobblemon:ribbon_day_shock",
+    "Downcast": "cobblemon:ribbon_day_downcast",
+    "Careless": "cobblemon:ribbon_day_careless",
+    "Relax": "cobblemon:ribbon_day_relax",
+    "Snooze": "cobblemon:ribbon_day_snooze",
+    "Smile": "cobblemon:ribbon_day_smile",
+    "Gorgeous": "cobblemon:ribbon_syndicate_gorgeous",
+    "Royal": "cobblemon:ribbon_syndicate_royal",
+    "GorgeousRoyal": "cobblemon:ribbon_syndicate_gorgeous_royal",
+    "Artist": "cobblemon:ribbon_artist",
+    "Footprint": "cobblemon:ribbon_footprint",
+    "Record": "cobblemon:ribbon_record",
+    "Legend": "cobblemon:ribbon_legend",
+    "Country": "cobblemon:ribbon_event_country",
+    "National": "cobblemon:ribbon_event_national",
+    "Earth": "cobblemon:ribbon_event_earth",
+    "World": "cobblemon:ribbon_event_world",
+    "Classic": "cobblemon:ribbon_event_classic",
+    "Premier": "cobblemon:ribbon_event_premier",
+    "Event": "cobblemon:ribbon_event",
+    "Birthday": "cobblemon:ribbon_event_birthday",
+    "Special": "cobblemon:ribbon_event_special",
+    "Souvenir": "cobblemon:ribbon_event_souvenir",
+    "Wishing": "cobblemon:ribbon_event_wishing",
+    "ChampionBattle": "cobblemon:ribbon_event_champion_battle",
+    "ChampionRegional": "cobblemon:ribbon_event_champion_regional",
+    "ChampionNational": "cobblemon:ribbon_event_champion_national",
+    "ChampionWorld": "cobblemon:ribbon_event_champion_world",
+    "CountMemoryContest": "cobblemon:ribbon_memory_contest",
+    "CountMemoryBattle": "cobblemon:ribbon_memory_battle",
+    "ChampionG6Hoenn": "cobblemon:ribbon_champion_hoenn",
+    "ContestStar": "cobblemon:ribbon_contest_super_star",
+    "MasterCoolness": "cobblemon:ribbon_contest_super_master_coolness",
+    "MasterBeauty": "cobblemon:ribbon_contest_super_master_beauty",
+    "MasterCuteness": "cobblemon:ribbon_contest_super_master_cuteness",
+    "MasterCleverness": "cobblemon:ribbon_contest_super_master_cleverness",
+    "MasterToughness": "cobblemon:ribbon_contest_super_master_toughness",
+    "ChampionAlola": "cobblemon:ribbon_champion_alola",
+    "BattleRoyale": "cobblemon:ribbon_battle_royal_master",
+    "BattleTreeGreat": "cobblemon:ribbon_battle_tree_great",
+    "BattleTreeMaster": "cobblemon:ribbon_battle_tree_master",
+    "ChampionGalar": "cobblemon:ribbon_champion_galar",
+    "TowerMaster": "cobblemon:ribbon_battle_tower_master",
+    "MasterRank": "cobblemon:ribbon_master_rank",
+    "Hisui": "cobblemon:ribbon_hisui",
+    "TwinklingStar": "cobblemon:ribbon_contest_super_star_twinkling",
+    "ChampionPaldea": "cobblemon:ribbon_champion_paldea",
+    "OnceInALifetime": "cobblemon:ribbon_once-in-a-lifetime",
+    "Partner": "cobblemon:ribbon_partner",
+    # Marks
+    "MarkLunchtime": "cobblemon:mark_time_lunchtime",
+    "MarkSleepyTime": "cobblemon:mark_time_sleepy-time",
+    "MarkDusk": "cobblemon:mark_time_dusk",
+    "MarkDawn": "cobblemon:mark_time_dawn",
+    "MarkCloudy": "cobblemon:mark_weather_cloudy",
+    "MarkRainy": "cobblemon:mark_weather_rainy",
+    "MarkStormy": "cobblemon:mark_weather_stormy",
+    "MarkSnowy": "cobblemon:mark_weather_snowy",
+    "MarkBlizzard": "cobblemon:mark_weather_blizzard",
+    "MarkDry": "cobblemon:mark_weather_dry",
+    "MarkSandstorm": "cobblemon:mark_weather_sandstorm",
+    "MarkMisty": "cobblemon:mark_weather_misty",
+    "MarkDestiny": "cobblemon:mark_destiny",
+    "MarkFishing": "cobblemon:mark_fishing",
+    "MarkCurry": "cobblemon:mark_curry",
+    "MarkUncommon": "cobblemon:mark_uncommon",
+    "MarkRare": "cobblemon:mark_rare",
+    "MarkRowdy": "cobblemon:mark_personality_rowdy",
+    "MarkAbsentMinded": "cobblemon:mark_personality_absent-minded",
+    "MarkJittery": "cobblemon:mark_personality_jittery",
+    "MarkExcited": "cobblemon:mark_personality_excited",
+    "MarkCharismatic": "cobblemon:mark_personality_charismatic",
+    "MarkCalmness": "cobblemon:mark_personality_calmness",
+    "MarkIntense": "cobblemon:mark_personality_intense",
+    "MarkZonedOut": "cobblemon:mark_personality_zoned-out",
+    "MarkJoyful": "cobblemon:mark_personality_joyful",
+    "MarkAngry": "cobblemon:mark_personality_angry",
+    "MarkSmiley": "cobblemon:mark_personality_smiley",
+    "MarkTeary": "cobblemon:mark_personality_teary",
+    "MarkUpbeat": "cobblemon:mark_personality_upbeat",
+    "MarkPeeved": "cobblemon:mark_personality_peeved",
+    "MarkIntellectual": "cobblemon:mark_personality_intellectual",
+    "MarkFerocious": "cobblemon:mark_personality_ferocious",
+    "MarkCrafty": "cobblemon:mark_personality_crafty",
+    "MarkScowling": "cobblemon:mark_personality_scowling",
+    "MarkKindly": "cobblemon:mark_personality_kindly",
+    "MarkFlustered": "cobblemon:mark_personality_flustered",
+    "MarkPumpedUp": "cobblemon:mark_personality_pumped-up",
+    "MarkZeroEnergy": "cobblemon:mark_personality_zero_energy",
+    "MarkPrideful": "cobblemon:mark_personality_prideful",
+    "MarkUnsure": "cobblemon:mark_personality_unsure",
+    "MarkHumble": "cobblemon:mark_personality_humble",
+    "MarkThorny": "cobblemon:mark_personality_thorny",
+    "MarkVigor": "cobblemon:mark_personality_vigor",
+    "MarkSlump": "cobblemon:mark_personality_slump",
+    "MarkJumbo": "cobblemon:mark_jumbo",
+    "MarkMini": "cobblemon:mark_mini",
+    "MarkItemfinder": "cobblemon:mark_itemfinder",
+    "MarkPartner": "cobblemon:mark_partner",
+    "MarkGourmand": "cobblemon:mark_gourmand",
+    "MarkAlpha": "cobblemon:mark_alpha",
+    "MarkMightiest": "cobblemon:mark_mightiest",
+    "MarkTitan": "cobblemon:mark_titan",
+    "MarkRevival": "cobblemon:mark_revival",
+}
+
+# Cobblemon identifier -> PKHeX ribbon name
+COBBLEMON_TO_PKHEX_MAP = {cobblemon_name: pkhex_name for pkhex_name, cobblemon_name in MARK_NAME_MAP.items()}
+
+
+def normalize_stat_name(stat_name):
+    """
+    Normalize stat names to match Cobblemon's expected format.
+    Handles variations like defense/defence, special_defense/special_defence.
+    """
+    if not isinstance(stat_name, str):
+        return None
+    stat_name = stat_name.lower().strip()
+    return _STAT_NAMES.get(stat_name) or _COMPACT_STAT_NAMES.get(stat_name.replace('_', ''))
+
+
+def validate_iv_value(value):
+    """
+    Clamp an IV to 0-31. Returns (iv, issue): issue is None, 'iv_out_of_range' or 'invalid_value' (exported as 0).
+    Nothing is printed; StatValidation reports the problems of a whole selection before export.
+    """
+    try:
+        iv = int(value)
+    except (ValueError, TypeError, OverflowError):
+        return 0, 'invalid_value'
+    if 0 <= iv <= MAX_IV:
+        return iv, None
+    return max(0, min(MAX_IV, iv)), 'iv_out_of_range'
+
+
+def validate_ev_value(value):
+    """Clamp an EV to 0-252. Returns (ev, issue) like validate_iv_value, with 'ev_out_of_range'."""
+    try:
+        ev = int(value)
+    except (ValueError, TypeError, OverflowError):
+        return 0, 'invalid_value'
+    if 0 <= ev <= MAX_EV:
+        return ev, None
+    return max(0, min(MAX_EV, ev)), 'ev_out_of_range'
+
+# Decode callables take (tag value, name table); encode callables take the JSON value and return a tag, or None to leave the
+# compound untouched. A default is used when the tag is missing: REQUIRED fails the Pokémon, a callable is given
+# (info decoded so far, compound).
+REQUIRED = object()
+_MISSING = object()
+
+Field = namedtuple('Field', 'nbt json tag default decode encode')
+
+
+def field(nbt, json, tag, default=None, decode=None, encode=None):
+    return Field(nbt, json, tag, default, decode, encode)
+
+
+def _int(value, names):
+    return int(value)
+
+
+def _str(value, names):
+    return str(value)
+
+
+def _float(value, names):
+    return float(value)
+
+
+def _bool(value, names):
+    return bool(value)
+
+
+def _hyphenate(value, names, kind):
+    if value in names:
+        return names[value].capitalize()
+    hyphenated = reference_display_name(kind, str(value))
+    return hyphenated.capitalize() if hyphenated else str(value)
+
+
+def _decode_ability(value, names):
+    return _hyphenate(value['AbilityName'], names, 'ability')
+
+
+def _decode_species(value, names):
+    species = str(value)
+    if species.startswith('cobblemon:'):
+        species = species[len('cobblemon:'):]
+    return _hyphenate(species, names, 'species')
+
+
+def _decode_moves(value, names):
+    moves = []
+    for move_data in value:
+        move_name = move_data.get('MoveName', 'Unknown')
+        moves.append(names.get(move_name) or reference_display_name('move', str(move_name)) or move_name)
+    return moves
+
+
+def _decode_stats(value, names=None):
+    base = value['Base'] if 'Base' in value else value
+    return {stat: int(base.get(f'cobblemon:{stat}', 0)) for stat in STATS}
+
+
+def _decode_marks(value, names):
+    marks = []
+    for cobblemon_mark in value:
+        pkhex_name = COBBLEMON_TO_PKHEX_MAP.get(str(cobblemon_mark))
+        if pkhex_name:
+            marks.append(pkhex_name)
+        else:
+            print(f"Warning: Unknown Cobblemon mark/ribbon '{cobblemon_mark}' - skipping.")
+    return marks
+
+
+def _encode_moves(value):
+    moves = List[Compound]()
+    for move_name in value:
+        if move_name and isinstance(move_name, str):
+            moves.append(Compound({
+                'RaisedPPStages': Int(0),
+                'MoveName': String(to_cobblemon_name(move_name, 'move')),
+                'MovePP': Int(5),  # Default PP value of 5
+            }))
+    return moves
+
+
+def _encode_stats(value, validate):
+    # Problems (not a dictionary, unknown stats, values out of range) were already reported by StatValidation
+    if not isinstance(value, dict):
+        return None
+    stats = Compound()
+    for stat, stat_value in value.items():
+        normalized_stat = normalize_stat_name(stat)
+        if normalized_stat:
+            stats[f'cobblemon:{normalized_stat}'] = Int(validate(stat_value)[0])
+    return stats
+
+
+def _encode_ivs(value):
+    base = _encode_stats(value, validate_iv_value)
+    return None if base is None else Compound({'Base': base, 'HyperTrained': Compound()})
+
+
+def _encode_evs(value):
+    return _encode_stats(value, validate_ev_value)
+
+
+def _encode_ability(value):
+    # A whole new compound, so tags of the previous ability (Index, Priority) don't stay behind on an update
+    return Compound({'AbilityName': String(to_cobblemon_name(value, 'ability').capitalize())})
+
+
+def _encode_tera_type(value):
+    tera_type = str(value).strip().lower()
+    if not tera_type or tera_type in ('unknown', 'cobblemon:unknown'):
+        return None  # Keep the compound's own (default normal) tera type
+    if not tera_type.startswith("cobblemon:"):
+        tera_type = "cobblemon:" + tera_type
+    return String(tera_type)
+
+
+def _encode_marks(value):
+    converted_marks = []
+    for mark_name in value:
+        mapped_name = MARK_NAME_MAP.get(mark_name)
+        if mapped_name:
+            converted_marks.append(String(mapped_name))
+        else:
+            print(f"Warning: Unknown mark/ribbon '{mark_name}' - skipping.")
+    return List[String](converted_marks) if converted_marks else None
+
+
+FIELDS = (
+    field('Species', 'species', String, REQUIRED, _decode_species,
+          lambda value: String(f"cobblemon:{to_cobblemon_name(value, 'species')}")),
+    field('Nickname', 'nickname', String, lambda info, compound: info['species'].capitalize()),
+    field('Level', 'level', Int, REQUIRED),
+    field('Ability', 'ability', Compound, REQUIRED, _decode_ability, _encode_ability),
+    field('MoveSet', 'moves', List, REQUIRED, _decode_moves, _encode_moves),
+    # Older files keep the stats under Base.IVs / Base.EVs
+    field('IVs', 'ivs', Compound, lambda info, compound: _decode_stats(compound.get('Base', {}).get('IVs', {})),
+          _decode_stats, _encode_ivs),
+    field('EVs', 'evs', Compound, lambda info, compound: _decode_stats(compound.get('Base', {}).get('EVs', {})),
+          _decode_stats, _encode_evs),
+    field('Nature', 'nature', String, REQUIRED, lambda value, names: str(value).split(":")[-1].capitalize(),
+          lambda value: String(f"cobblemon:{to_cobblemon_name(str(value), 'nature')}")),
+    # Filled in from the trainer's username by the importer when missing
+    field('PersistentData.OriginalTrainer', 'original_trainer', String),
+    field('Health', 'health', Int, REQUIRED),
+    field('Experience', 'experience', Int, REQUIRED),
+    field('Shiny', 'shiny', Byte, 0),
+    field('CaughtBall', 'caught_ball', String, 'Unknown', encode=lambda value: String(value.lower())),
+    field('Gender', 'gender', String, 'Unknown'),
+    field('Friendship', 'friendship', Int, 0),
+    field('HealingTimer', 'healing_timer', Int, 0),
+    field('GmaxFactor', 'gmax_factor', Byte, 0),
+    field('DmaxLevel', 'gmax_level', Int, 0),
+    field('TeraType', 'tera_type', String, 'Unknown', encode=_encode_tera_type),
+    field('FormId', 'form_id', String, 'normal'),
+    # The exporter decides whether a Pokémon keeps its UUID (see CobblemonExporter.build_pokemon), so it is only read here
+    field('UUID', 'uuid', List, lambda info, compound: [], lambda value, names: [int(part) for part in value],
+          lambda value: None),
+    field('ScaleModifier', 'scale_modifier', Float, 1.0),
+    field('PersistentData.MetDate', 'met_date', String, lambda info, compound: date.today().strftime('%Y-%m-%d')),
+    field('PersistentData.MetLevel', 'met_level', Int, lambda info, compound: info['level']),
+    field('PersistentData.MetLocation', 'met_location', String, 'a lovely place'),
+    field('PersistentData.OriginGame', 'origin_game', String, 'Cobblemon'),
+    field('PersistentData.Language', 'language', Int, 2),
+    field('PersistentData.TID', 'tid', Long),
+    field('PersistentData.PID', 'pid', Long),
+    field('PersistentData.SID', 'sid', Long),
+    field('PersistentData.HomeTracker', 'home_tracker', Long, 0),
+    field('PersistentData.EncryptionConstant', 'encryption_constant', Long, 0),
+    field('PersistentData.Height', 'height', Int, 0),
+    field('PersistentData.Weight', 'weight', Int, 0),
+    field('PersistentData.Scale', 'scale', Int, 0),
+    field('PersistentData.Ribbons', 'ribbons', List, lambda info, compound: [],
+          lambda value, names: [int(ribbon) for ribbon in value],
+          lambda value: List[Int]([Int(ribbon) for ribbon in value])),
+    field('Marks', 'marks', List, lambda info, compound: [], _decode_marks, _encode_marks),
+    field('PersistentData.RelearnFlags', 'relearn_flags', List, lambda info, compound: [],
+          lambda value, names: [bool(flag) for flag in value],
+          lambda value: List[Byte]([Byte(flag) for flag in value])),
+    field('PersistentData.FatefulEncounter', 'fateful_encounter', Byte, False, _bool),
+    field('PersistentData.Memories.MemoryType', 'memories.memory_type', Int, 0),
+    field('PersistentData.Memories.MemoryIntensity', 'memories.memory_intensity', Int, 0),
+    field('PersistentData.Memories.MemoryFeeling', 'memories.memory_feeling', Int, 0),
+    field('PersistentData.Memories.MemoryVariable', 'memories.memory_variable', Int, 0),
+    field('PersistentData.EggLocation', 'egg_location', String, '0'),
+    field('PersistentData.EggDate', 'egg_date', String, ''),
+    field('PersistentData.IsEgg', 'is_egg', Byte, False, _bool, lambda value: Byte(1 if value else 0)),
+    field('PersistentData.PokerusStrain', 'pokerus_strain', Int, 0),
+    field('PersistentData.PokerusDays', 'pokerus_days', Int, 0),
+    field('PersistentData.CurrentHandler', 'current_handler', Int, 0),
+    field('PersistentData.HandlingTrainerName', 'handling_trainer_name', String, ''),
+    field('PersistentData.HandlingTrainerGender', 'handling_trainer_gender', Int, 0),
+    field('PersistentData.HandlingTrainerFriendship', 'handling_trainer_friendship', Int, 0),
+    field('PersistentData.OriginalTrainerGender', 'original_trainer_gender', Int, 0),
+    field('PersistentData.AbilityNumber', 'ability_number', Int, 1),
+    field('PersistentData.StatNature', 'stat_nature', String, '',
+          encode=lambda value: String(value) if value else None),
+    field('PersistentData.Characteristic', 'characteristic', Int, -1),
+    field('PersistentData.TSV', 'tsv', Int, 0),
+    field('PersistentData.PSV', 'psv', Int, 0),
+    field('PersistentData.HPType', 'hp_type', Int, 0),
+    field('PersistentData.HPPower', 'hp_power', Int, 0),
+    field('PersistentData.IVTotal', 'iv_total', Int, 0),
+    field('PersistentData.PotentialRating', 'potential_rating', Int, 0),
+    field('PersistentData.RelearnMove1', 'relearn_move1', Int, 0),
+    field('PersistentData.RelearnMove2', 'relearn_move2', Int, 0),
+    field('PersistentData.RelearnMove3', 'relearn_move3', Int, 0),
+    field('PersistentData.RelearnMove4', 'relearn_move4', Int, 0),
+)
+
+_DECODE_BY_TAG = {Int: _int, Long: _int, Byte: _int, String: _str, Float: _float}
+
+
+def _compile(fields):
+    """
+    Turn the table into flat tuples once: every NBT parent path is resolved once per Pokémon and
+    shared by all fields under it, so decoding and encoding are a single walk over the table.
+    """
+    parents = []
+    decoders = []
+    encoders = []
+    for entry in fields:
+        *parent, leaf = entry.nbt.split('.')
+        parent = tuple(parent)
+        if parent not in parents:
+            parents.append(parent)
+        json_parent, _, json_key = entry.json.rpartition('.')
+        decode = entry.decode or _DECODE_BY_TAG.get(entry.tag, lambda value, names: value)
+        encode = entry.encode or entry.tag
+        decoders.append((parents.index(parent), leaf, json_parent or None, json_key, entry.default, decode))
+        encoders.append((parent, leaf, json_parent or None, json_key, encode))
+    return tuple(parents), tuple(decoders), tuple(encoders)
+
+
+_PARENTS, _DECODERS, _ENCODERS = _compile(FIELDS)
+
+# Top-level tags the decoder reads (Base is the legacy home of IVs/EVs); NbtStream skips everything else
+DECODED_TAGS = tuple(dict.fromkeys([entry.nbt.split('.')[0] for entry in FIELDS] + ['Base']))
+
+
+def _resolve(compound, path):
+    node = compound
+    for key in path:
+        node = node.get(key) if hasattr(node, 'get') else None
+        if node is None:
+            return None
+    return node if hasattr(node, 'get') else None
+
+
+def decode_pokemon(compound):
+    """Decode a Pokémon compound into the JSON dictionary format. Raises KeyError when a required tag is missing."""
+    names = get_name_table()
+    nodes = [_resolve(compound, path) for path in _PARENTS]
+    info = {}
+    for parent, leaf, json_parent, json_key, default, decode in _DECODERS:
+        node = nodes[parent]
+        value = node.get(leaf, _MISSING) if node is not None else _MISSING
+        if value is _MISSING:
+            if default is REQUIRED:
+                raise KeyError(leaf)
+            value = default(info, compound) if callable(default) else default
+        else:
+            value = decode(value, names)
+        if json_parent:
+            info.setdefault(json_parent, {})[json_key] = value
+        else:
+            info[json_key] = value
+    return info
+
+
+def _container(compound, path, containers):
+    node = containers.get(path)
+    if node is None:
+        node = compound
+        for key in path:
+            if key not in node or not hasattr(node[key], 'keys'):
+                node[key] = Compound()
+            node = node[key]
+        containers[path] = node
+    return node
+
+
+def encode_pokemon(compound, info):
+    """Write every field present in a JSON dictionary into a Pokémon compound, leaving the other tags alone."""
+    containers = {}
+    for parent, leaf, json_parent, json_key, encode in _ENCODERS:
+        source = info.get(json_parent) if json_parent else info
+        if not isinstance(source, dict) or source.get(json_key) is None:
+            continue
+        try:
+            tag = encode(source[json_key])
+        except (TypeError, ValueError, AttributeError) as e:
+            print(f"Warning: Invalid value {source[json_key]!r} for '{json_key}', skipping: {e}")
+            continue
+        if tag is not None:
+            _container(compound, parent, containers)[leaf] = tag
+    return compound
@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import pickle
+import re
+import tempfile
+import threading
+
+# Directories shipped with the tool: cache/ maps names to ids, cache2/ maps ids to names
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+CACHE_DIR = os.path.join(BASE_DIR, 'cache')
+CACHE2_DIR = os.path.join(BASE_DIR, 'cache2')
+STORE_FILE = os.path.join(CACHE_DIR, 'reference.pickle')
+
+KINDS = ('species', 'move', 'ability', 'nature')
+STORE_VERSION = 1
+
+# Offline species/move/ability/nature reference, compiled from the *_cache.json files into one pickle.
+# Loaded lazily once per process; rebuilt on load when any source file has changed since it was compiled.
+_lock = threading.Lock()
+_store = None
+
+
+def normalize_name(name):
+    """PokeAPI style identifier: "Keen Eye" / "keen_eye" -> "keen-eye"."""
+    return re.sub(r'[\s_]+', '-', str(name).strip().lower())
+
+
+def _compact(name):
+    return re.sub(r'[^a-z0-9]', '', name)
+
+
+def _source_files():
+    return [os.path.join(directory, f'{kind}_cache.json') for directory in (CACHE_DIR, CACHE2_DIR) for kind in KINDS]
+
+
+def _source_mtimes():
+    mtimes = {}
+    for path in _source_files():
+        try:
+            mtimes[path] = os.path.getmtime(path)
+        except OSError:
+            pass
+    return mtimes
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not read {path}: {e}")
+        return {}
+
+
+class ReferenceStore:
+    """Name <-> id tables for species, moves, abilities and natures."""
+
+    def __init__(self, tables=None, sources=None):
+        self.tables = tables or {kind: {'by_name': {}, 'by_id': {}} for kind in KINDS}
+        self.sources = sources or {}
+
+    def add(self, kind, name, entry_id):
+        """Merge one entry. The first name seen for an id stays its canonical name."""
+        try:
+            entry_id = int(entry_id)
+        except (TypeError, ValueError):
+            return
+        name = normalize_name(name)
+        if not name:
+            return
+        table = self.tables[kind]
+        table['by_id'].setdefault(entry_id, name)
+        table['by_name'].setdefault(name, entry_id)
+        # Cobblemon identifiers drop the hyphens ("watergun"), so index those too
+        table['by_name'].setdefault(_compact(name), entry_id)
+
+    def merge_sources(self):
+        """Merge every entry of the cache/ and cache2/ JSON files into the store."""
+        for kind in KINDS:
+            for name, entry_id in _read_json(os.path.join(CACHE_DIR, f'{kind}_cache.json')).items():
+                self.add(kind, name, entry_id)
+            for entry_id, name in _read_json(os.path.join(CACHE2_DIR, f'{kind}_cache.json')).items():
+                self.add(kind, name, entry_id)
+        self.sources = _source_mtimes()
+        return self
+
+    def id_of(self, kind, name):
+        """Id for a name in any of the spellings used by the caches, PokeAPI or Cobblemon; None if unknown."""
+        table = self.tables[kind]['by_name']
+        name = normalize_name(name)
+        entry_id = table.get(name)
+        if entry_id is None:
+            entry_id = table.get(_compact(name))
+        return entry_id
+
+    def name_of(self, kind, entry_id):
+        """Canonical (PokeAPI style) name for an id; None if unknown."""
+        try:
+            return self.tables[kind]['by_id'].get(int(entry_id))
+        except (TypeError, ValueError):
+            return None
+
+    def names(self, kind):
+        return sorted(self.tables[kind]['by_id'].values())
+
+    def is_stale(self):
+        return self.sources != _source_mtimes()
+
+    def save(self, path=STORE_FILE):
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.reference-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump({'version': STORE_VERSION, 'tables': self.tables, 'sources': self.sources}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path=STORE_FILE):
+        """Load a compiled store, or None if it is missing, unreadable or from another version."""
+        try:
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get('version') != STORE_VERSION:
+            return None
+        return cls(data['tables'], data['sources'])
+
+
+def _build(path):
+    store = ReferenceStore.load(path) or ReferenceStore()
+    store.merge_sources()
+    try:
+        store.save(path)
+    except OSError as e:
+        print(f"Warning: could not write {path}: {e}")
+    return store
+
+
+def refresh(path=STORE_FILE):
+    """Rebuild the store from the cache files, keeping every entry the existing store already had."""
+    global _store
+    with _lock:
+        _store = _build(path)
+        return _store
+
+
+def get_reference():
+    """Return the shared reference store, compiling it first if it is missing or older than its sources."""
+    global _store
+    store = _store
+    if store is not None:
+        return store
+    with _lock:
+        if _store is None:
+            store = ReferenceStore.load(STORE_FILE)
+            if store is None or store.is_stale():
+                store = _build(STORE_FILE)
+            _store = store
+        return _store
+
+
+def lookup_id(kind, name):
+    return get_reference().id_of(kind, name)
+
+
+def lookup_name(kind, entry_id):
+    return get_reference().name_of(kind, entry_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline species/move/ability/nature reference data')
+    parser.add_argument('--refresh', action='store_true', help='Rebuild the compiled store, merging new cache entries')
+    parser.add_argument('--lookup', nargs=2, metavar=('KIND', 'NAME_OR_ID'), help=f'Look up a name or id ({", ".join(KINDS)})')
+    args = parser.parse_args()
+
+    store = refresh() if args.refresh else get_reference()
+    if args.refresh:
+        counts = ', '.join(f"{len(store.tables[kind]['by_id'])} {kind}" for kind in KINDS)
+        print(f"Reference store written to {STORE_FILE}: {counts}")
+    if args.lookup:
+        kind, value = args.lookup
+        if kind not in KINDS:
+            parser.error(f"KIND must be one of {', '.join(KINDS)}")
+        print(store.name_of(kind, value) if value.isdigit() else store.id_of(kind, value))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+
+from PokemonBundle import is_bundle, read_bundle
+
+# Default PC size used by the importer and the PC viewer
+DEFAULT_TOTAL_BOXES = 40
+DEFAULT_SLOTS_PER_BOX = 30
+
+
+class SlotOccupancy:
+    """
+    Occupancy bitmap of box/slot positions (1-indexed, like the JSON files).
+    Finding the next free slot resumes from a cursor, so filling a PC one Pokémon at a time is O(1) per slot.
+    """
+
+    def __init__(self, total_boxes=DEFAULT_TOTAL_BOXES, slots_per_box=DEFAULT_SLOTS_PER_BOX):
+        self.total_boxes = total_boxes
+        self.slots_per_box = slots_per_box
+        self._bits = bytearray(total_boxes * slots_per_box)
+        self._first_free = 0  # No free slot exists below this index
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_directory(cls, directory, total_boxes=DEFAULT_TOTAL_BOXES, slots_per_box=DEFAULT_SLOTS_PER_BOX):
+        """Build the index by reading the box/slot of every JSON file and bundle in a directory once."""
+        occupancy = cls(total_boxes, slots_per_box)
+        if not os.path.isdir(directory):
+            return occupancy
+        for filename in os.listdir(directory):
+            if is_bundle(filename):
+                try:
+                    pokemon_list = list(read_bundle(os.path.join(directory, filename)))
+                except (OSError, EOFError):
+                    continue
+            elif filename.endswith('.json'):
+                try:
+                    with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+                        pokemon_list = [json.load(f)]
+                except (OSError, ValueError):
+                    # Skip files that can't be parsed
+                    continue
+            else:
+                continue
+            for pokemon_data in pokemon_list:
+                if isinstance(pokemon_data, dict) and 'box_number' in pokemon_data and 'slot_number' in pokemon_data:
+                    occupancy.occupy(pokemon_data['box_number'], pokemon_data['slot_number'])
+        return occupancy
+
+    def __len__(self):
+        return self._count
+
+    def _index(self, box, slot):
+        try:
+            box, slot = int(box), int(slot)
+        except (TypeError, ValueError):
+            return None
+        if 1 <= box <= self.total_boxes and 1 <= slot <= self.slots_per_box:
+            return (box - 1) * self.slots_per_box + (slot - 1)
+        return None
+
+    def _position(self, index):
+        return index // self.slots_per_box + 1, index % self.slots_per_box + 1
+
+    def is_occupied(self, box, slot):
+        index = self._index(box, slot)
+        return index is not None and bool(self._bits[index])
+
+    def occupy(self, box, slot):
+        index = self._index(box, slot)
+        if index is None:
+            return
+        with self._lock:
+            if not self._bits[index]:
+                self._bits[index] = 1
+                self._count += 1
+
+    def release(self, box, slot):
+        index = self._index(box, slot)
+        if index is None:
+            return
+        with self._lock:
+            if self._bits[index]:
+                self._bits[index] = 0
+                self._count -= 1
+                self._first_free = min(self._first_free, index)
+
+    def next_free(self, start_box=1):
+        """
+        Return the first free (box, slot) at or after start_box, wrapping around to box 1.
+        Returns None when every slot is taken.
+        """
+        with self._lock:
+            if self._count >= len(self._bits):
+                return None
+            start = self._index(start_box, 1) or 0
+            if start <= self._first_free:
+                index = self._bits.find(0, self._first_free)
+                if index != -1:
+                    self._first_free = index
+            else:
+                index = self._bits.find(0, start)
+                if index == -1:
+                    index = self._bits.find(0, self._first_free)
+            if index == -1:
+                return None
+            return self._position(index)
+
+    def claim_next_free(self, start_box=1):
+        """Find the next free slot and mark it occupied in one step."""
+        position = self.next_free(start_box)
+        if position is not None:
+            self.occupy(*position)
+        return position
+
+
+# One index per output directory, built on first use and kept up to date by the importer
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_occupancy(directory, total_boxes=DEFAULT_TOTAL_BOXES, slots_per_box=DEFAULT_SLOTS_PER_BOX):
+    key = (os.path.realpath(directory), total_boxes, slots_per_box)
+    with _indexes_lock:
+        occupancy = _indexes.get(key)
+        if occupancy is None:
+            occupancy = SlotOccupancy.from_directory(directory, total_boxes, slots_per_box)
+            _indexes[key] = occupancy
+        return occupancy
+
+
+def forget_occupancy(directory):
+    """Drop cached indexes for a directory, e.g. after files were moved by another tool."""
+    path = os.path.realpath(directory)
+    with _indexes_lock:
+        for key in [key for key in _indexes if key[0] == path]:
+            del _indexes[key]
@@ -0,0 +1,117 @@
+from array import array
+
+from PokemonFields import MAX_EV, MAX_EV_TOTAL, MAX_IV, STATS, normalize_stat_name
+
+# Checks the IVs and EVs of a whole selection before anything is exported, and reports the problems grouped by kind
+# instead of one warning per value. The exporter clamps out-of-range values silently (see validate_iv_value), so this
+# is the only place that says which Pokémon would be changed by it, or rejected by the game.
+PROBLEMS = ('invalid_json', 'invalid_stats', 'unknown_stat', 'invalid_value',
+            'iv_out_of_range', 'ev_out_of_range', 'ev_total_too_high')
+
+_STAT_INDEX = {stat: index for index, stat in enumerate(STATS)}
+_WIDTH = len(STATS)
+# Array range of the stat arrays; INVALID marks a value that isn't a number (reported while loading)
+_INT_MIN, _INT_MAX = -2 ** 31, 2 ** 31 - 1
+INVALID = _INT_MIN
+
+
+def _load_into(values, start, stats, label, name, problems):
+    """Write one Pokémon's IV or EV dictionary into values[start:start + len(STATS)]"""
+    if stats is None:
+        return
+    if not isinstance(stats, dict):
+        problems['invalid_stats'].append({'source': label, 'field': name, 'value': stats})
+        return
+    for stat_name, value in stats.items():
+        stat = normalize_stat_name(stat_name)
+        if stat is None:
+            problems['unknown_stat'].append({'source': label, 'field': name, 'stat': stat_name})
+            continue
+        try:
+            number = int(value)
+        except (ValueError, TypeError, OverflowError):
+            problems['invalid_value'].append({'source': label, 'field': name, 'stat': stat, 'value': value})
+            values[start + _STAT_INDEX[stat]] = INVALID
+            continue
+        values[start + _STAT_INDEX[stat]] = max(_INT_MIN + 1, min(_INT_MAX, number))
+
+
+def load_stats(entries):
+    """
+    Flatten the IVs and EVs of (label, pokemon_info) entries into two int arrays holding len(STATS) values per
+    Pokémon, in STATS order; a stat the JSON leaves out is 0. Returns (ivs, evs, problems), where problems has
+    every PROBLEMS kind and already lists what couldn't go into the arrays.
+    """
+    problems = {problem: [] for problem in PROBLEMS}
+    ivs = array('i', bytes(4 * _WIDTH * len(entries)))
+    evs = array('i', bytes(4 * _WIDTH * len(entries)))
+    for index, (label, pokemon_info) in enumerate(entries):
+        if not isinstance(pokemon_info, dict):
+            problems['invalid_json'].append({'source': label})
+            continue
+        start = index * _WIDTH
+        _load_into(ivs, start, pokemon_info.get('ivs'), label, 'ivs', problems)
+        _load_into(evs, start, pokemon_info.get('evs'), label, 'evs', problems)
+    return ivs, evs, problems
+
+
+def validate_stats(entries):
+    """
+    Check the IV and EV ranges and the EV total of every Pokémon in one pass over the stat arrays.
+    Returns {'checked': number of Pokémon, 'problems': {kind: [record, ...]}} with only the kinds that occurred.
+    The EV total is counted after clamping, as the Pokémon would be exported.
+    """
+    ivs, evs, problems = load_stats(entries)
+    for index, (label, _) in enumerate(entries):
+        start = index * _WIDTH
+        total = 0
+        for offset, stat in enumerate(STATS):
+            iv, ev = ivs[start + offset], evs[start + offset]
+            if iv != INVALID and not 0 <= iv <= MAX_IV:
+                problems['iv_out_of_range'].append({'source': label, 'stat': stat, 'value': iv})
+            if ev != INVALID:
+                if not 0 <= ev <= MAX_EV:
+                    problems['ev_out_of_range'].append({'source': label, 'stat': stat, 'value': ev})
+                total += max(0, min(MAX_EV, ev))
+        if total > MAX_EV_TOTAL:
+            problems['ev_total_too_high'].append({'source': label, 'total': total})
+    return {'checked': len(entries), 'problems': {kind: records for kind, records in problems.items() if records}}
+
+
+def _describe(kind, record):
+    if kind == 'invalid_json':
+        return record['source']
+    if kind == 'invalid_stats':
+        return f"{record['source']}: '{record['field']}' is not a dictionary"
+    if kind == 'unknown_stat':
+        return f"{record['source']}: {record['field']} '{record['stat']}'"
+    if kind == 'ev_total_too_high':
+        return f"{record['source']}: {record['total']}"
+    if kind == 'invalid_value':
+        return f"{record['source']}: {record['field']} {record['stat']} = {record['value']!r}"
+    return f"{record['source']}: {record['stat']} = {record['value']}"
+
+
+_TITLES = {
+    'invalid_json': "Not a Pokémon JSON file",
+    'invalid_stats': "IVs/EVs that are not a dictionary",
+    'unknown_stat': "Unknown stat names (ignored on export)",
+    'invalid_value': "Stat values that are not numbers (exported as 0)",
+    'iv_out_of_range': f"IVs outside 0-{MAX_IV} (clamped on export)",
+    'ev_out_of_range': f"EVs outside 0-{MAX_EV} (clamped on export)",
+    'ev_total_too_high': f"EV totals over {MAX_EV_TOTAL}",
+}
+
+
+def format_report(report, limit=10):
+    """Readable lines for a validate_stats report: one heading per kind of problem and up to `limit` examples each"""
+    problems = report['problems']
+    if not problems:
+        return [f"Checked {report['checked']} Pokémon: no IV/EV problems found"]
+    lines = [f"Checked {report['checked']} Pokémon: {sum(len(records) for records in problems.values())} IV/EV problems found"]
+    for kind, records in problems.items():
+        lines.append(f"{_TITLES[kind]}: {len(records)}")
+        lines.extend(f"    {_describe(kind, record)}" for record in records[:limit])
+        if len(records) > limit:
+            lines.append(f"    ... and {len(records) - limit} more")
+    return lines
@@ -0,0 +1,219 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# Mojang API endpoint to get username from UUID. Point this at a local server to test without the network.
+MOJANG_PROFILE_URL = "https://api.mojang.com/user/profile/{uuid}"
+
+HEADERS = {
+    'Accept': 'application/json',
+    'User-Agent': 'PokemonPC/1.0'
+}
+
+MAX_WORKERS = 8
+MAX_RETRIES = 3
+RETRY_DELAY = 1  # seconds
+REQUEST_TIMEOUT = 10  # seconds
+
+# Cache lifetimes (seconds). Usernames can change, so even good entries are refreshed eventually.
+NAME_TTL = 30 * 24 * 60 * 60
+NOT_FOUND_TTL = 24 * 60 * 60
+FAILURE_TTL = 60 * 60
+
+# Flush the cache to disk after this many new entries or this many seconds, whichever comes first
+FLUSH_EVERY = 25
+FLUSH_INTERVAL = 30
+
+
+class UsernameCache:
+    """
+    Persistent UUID -> username cache.
+    Every entry carries the time it was looked up and its status ('ok', 'not_found' or 'failed'),
+    so failed and unknown UUIDs are remembered for a shorter TTL instead of being retried every run.
+    Writes go to a temp file that is renamed over the cache, so a crash never leaves it half written.
+    """
+
+    def __init__(self, path, offline=False, name_ttl=NAME_TTL, not_found_ttl=NOT_FOUND_TTL,
+                 failure_ttl=FAILURE_TTL, flush_every=FLUSH_EVERY, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.offline = offline
+        self.ttls = {'ok': name_ttl, 'not_found': not_found_ttl, 'failed': failure_ttl}
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._entries = {}
+        self._lock = threading.RLock()
+        self._dirty = 0
+        self._last_flush = time.monotonic()
+
+    def load(self):
+        """Load entries from disk. Old caches that map uuid -> name directly are upgraded on the fly."""
+        if not os.path.exists(self.path):
+            return self
+        try:
+            with open(self.path, 'r', encoding='utf-8') as cache_file:
+                data = json.load(cache_file)
+            legacy_time = os.path.getmtime(self.path)
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not read UUID cache {self.path}: {e}")
+            return self
+
+        with self._lock:
+            for uuid, entry in data.items():
+                if isinstance(entry, str):
+                    entry = {'name': entry, 'status': 'ok', 'time': legacy_time}
+                if isinstance(entry, dict) and 'status' in entry:
+                    self._entries[uuid] = entry
+        return self
+
+    def __contains__(self, uuid):
+        return str(uuid) in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def name(self, uuid, default='Unknown'):
+        """Best known username for a UUID, even if the entry is due for a refresh."""
+        entry = self._entries.get(str(uuid))
+        if entry and entry.get('name'):
+            return entry['name']
+        return default
+
+    def is_fresh(self, uuid, now=None):
+        entry = self._entries.get(str(uuid))
+        if not entry:
+            return False
+        now = time.time() if now is None else now
+        return now - entry.get('time', 0) < self.ttls.get(entry['status'], 0)
+
+    def needs_lookup(self, uuid):
+        """True when the network should be asked about this UUID."""
+        return not self.offline and not self.is_fresh(uuid)
+
+    def record(self, uuid, username, status):
+        uuid = str(uuid)
+        with self._lock:
+            entry = {'status': status, 'time': time.time()}
+            if status == 'ok':
+                entry['name'] = username
+            elif status == 'failed':
+                # Keep serving the last good name while the lookup is failing
+                previous = self._entries.get(uuid)
+                if previous and previous.get('name'):
+                    entry['name'] = previous['name']
+            self._entries[uuid] = entry
+            self._dirty += 1
+            if self._dirty >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def flush(self):
+        """Atomically write the cache to disk if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix='.uuid_cache-', suffix='.tmp', dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as cache_file:
+                    json.dump(self._entries, cache_file)
+                    cache_file.flush()
+                    os.fsync(cache_file.fileno())
+                os.replace(temp_path, self.path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            self._dirty = 0
+            self._last_flush = time.monotonic()
+
+
+class RateLimiter:
+    """Shared 429 backoff: once any worker is rate limited, every worker waits before its next request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def wait(self):
+        while True:
+            with self._lock:
+                delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def back_off(self, seconds):
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+
+def _retry_after(response, attempt):
+    """Seconds to wait after a 429, honouring Retry-After when the server sends it."""
+    header = response.headers.get('Retry-After')
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            pass
+    return RETRY_DELAY * (attempt + 1)
+
+
+def fetch_username(uuid, profile_url=MOJANG_PROFILE_URL, rate_limiter=None):
+    """
+    Look up a single UUID.
+    Returns (username, status) where status is 'ok', 'not_found' or 'failed'.
+    """
+    url = profile_url.format(uuid=uuid)
+    for attempt in range(MAX_RETRIES):
+        if rate_limiter:
+            rate_limiter.wait()
+        try:
+            response = requests.get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+            if response.status_code == 200:
+                data = response.json()
+                return data.get('name', 'Unknown'), 'ok'
+            elif response.status_code in (204, 404):  # Mojang answers unknown UUIDs with 204/404
+                return None, 'not_found'
+            elif response.status_code == 429:  # Rate limit
+                delay = _retry_after(response, attempt)
+                if rate_limiter:
+                    rate_limiter.back_off(delay)
+                elif attempt < MAX_RETRIES - 1:
+                    time.sleep(delay)
+                continue
+            return None, 'failed'
+        except (requests.exceptions.RequestException, ValueError):
+            if attempt < MAX_RETRIES - 1:
+                time.sleep(RETRY_DELAY * (attempt + 1))
+    return None, 'failed'
+
+
+def resolve_usernames(uuids, cache=None, profile_url=MOJANG_PROFILE_URL, max_workers=MAX_WORKERS):
+    """
+    Resolve every distinct UUID that the cache cannot answer using a bounded thread pool.
+    Results are recorded in `cache` as soon as each lookup finishes.
+    Returns {uuid: (username, status)} for the UUIDs that were looked up.
+    """
+    if cache is not None and cache.offline:
+        return {}
+    pending = sorted({str(uuid) for uuid in uuids if uuid})
+    if cache is not None:
+        pending = [uuid for uuid in pending if cache.needs_lookup(uuid)]
+    if not pending:
+        return {}
+
+    rate_limiter = RateLimiter()
+
+    def lookup(uuid):
+        result = fetch_username(uuid, profile_url, rate_limiter)
+        if cache is not None:
+            cache.record(uuid, *result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as pool:
+        return dict(zip(pending, pool.map(lookup, pending)))
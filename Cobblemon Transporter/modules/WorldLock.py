@@ -0,0 +1,169 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Minecraft keeps an OS lock on <world>/session.lock for as long as the world is open. The file itself stays
+# behind after the server stops, so only the lock says whether the server is running.
+SESSION_LOCK = 'session.lock'
+LEVEL_DAT = 'level.dat'
+# A storage .dat written this recently counts as in use: the server may still be saving, or it is one that doesn't
+# lock session.lock (a world on a network share, some hosts)
+RECENT_WRITE_SECONDS = 10
+
+# Size and mtime of the files this tool saved itself, so its own writes aren't mistaken for the server's
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'cache')
+OWN_WRITES_FILE = os.path.join(CACHE_DIR, 'export_writes.json')
+_lock = threading.Lock()
+_own_writes = None
+_own_writes_dirty = False
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+def find_world_dir(dat_path):
+    """The world folder a Cobblemon .dat belongs to (<world>/pokemon/pcstore/<uuid>.dat), or None if there isn't one"""
+    directory = os.path.dirname(os.path.abspath(dat_path))
+    while True:
+        if os.path.isfile(os.path.join(directory, SESSION_LOCK)) or os.path.isfile(os.path.join(directory, LEVEL_DAT)):
+            return directory
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def session_locked(world_dir):
+    """
+    True if another process holds the world's session.lock. The check takes the lock for a moment and
+    releases it straight away; it never writes to the file.
+    """
+    lock_path = os.path.join(world_dir, SESSION_LOCK)
+    try:
+        # A shared lock is enough to collide with the server's exclusive one, and only needs read access
+        lock_file = open(lock_path, 'rb' if fcntl is not None else 'r+b')
+    except FileNotFoundError:
+        return False
+    except PermissionError:
+        if msvcrt is not None:
+            # Windows refuses to open a file another process has open without sharing
+            return True
+        print(f"Warning: cannot read {lock_path} to check whether the server is running")
+        return False
+    with lock_file:
+        try:
+            if fcntl is not None:
+                # Java locks the file with fcntl record locks on POSIX, which lockf also uses
+                fcntl.lockf(lock_file, fcntl.LOCK_SH | fcntl.LOCK_NB)
+                fcntl.lockf(lock_file, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        except OSError:
+            return True
+    return False
+
+
+def _load_own_writes():
+    global _own_writes
+    if _own_writes is None:
+        _own_writes = {}
+        if os.path.exists(OWN_WRITES_FILE):
+            try:
+                with open(OWN_WRITES_FILE, 'r', encoding='utf-8') as f:
+                    _own_writes = {path: tuple(stamp) for path, stamp in json.load(f).items()}
+            except (OSError, ValueError, TypeError) as e:
+                print(f"Warning: could not read {OWN_WRITES_FILE}: {e}")
+    return _own_writes
+
+
+def record_own_write(dat_path):
+    """Remember the mtime and size a save left on dat_path; call flush_own_writes once the run's saves are done."""
+    global _own_writes_dirty
+    stat = os.stat(dat_path)
+    with _lock:
+        _load_own_writes()[os.path.realpath(dat_path)] = (stat.st_mtime_ns, stat.st_size)
+        _own_writes_dirty = True
+
+
+def flush_own_writes():
+    """Atomically write the recorded saves, dropping those too old to matter to recent_writes."""
+    global _own_writes, _own_writes_dirty
+    with _lock:
+        if not _own_writes_dirty:
+            return
+        cutoff = (time.time() - RECENT_WRITE_SECONDS) * 1e9
+        _own_writes = {path: stamp for path, stamp in _own_writes.items() if stamp[0] > cutoff}
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.export_writes-', suffix='.tmp', dir=CACHE_DIR)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(_own_writes, f)
+            os.replace(temp_path, OWN_WRITES_FILE)
+        except OSError as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            print(f"Warning: could not write {OWN_WRITES_FILE}: {e}")
+        _own_writes_dirty = False
+
+
+def recent_writes(dat_path, seconds=RECENT_WRITE_SECONDS):
+    """
+    The .dat files next to dat_path (itself included) modified in the last `seconds` seconds by something other
+    than this tool: a file still exactly as one of our own saves left it doesn't count.
+    """
+    directory = os.path.dirname(os.path.abspath(dat_path))
+    cutoff = time.time() - seconds
+    with _lock:
+        own_writes = dict(_load_own_writes())
+    written = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.dat') or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if stat.st_mtime > cutoff and own_writes.get(os.path.realpath(entry.path)) != (stat.st_mtime_ns, stat.st_size):
+                    written.append(entry.name)
+    except OSError:
+        return []
+    return sorted(written)
+
+
+def server_activity(dat_path):
+    """
+    Why writing to dat_path now is unsafe, or None if it looks safe. A running server keeps the storage in memory
+    and saves it over any change made on disk, so exports must wait until it has stopped.
+    """
+    world_dir = find_world_dir(dat_path)
+    if world_dir is None:
+        # A loose .dat (a copy, a downloaded backup) can't be open in a server
+        return None
+    if session_locked(world_dir):
+        return f"the world {world_dir} is open (its {SESSION_LOCK} is locked); stop the server first"
+    written = recent_writes(dat_path)
+    if written:
+        names = ', '.join(written[:3]) + (f" and {len(written) - 3} more" if len(written) > 3 else "")
+        return f"{names} in {os.path.dirname(os.path.abspath(dat_path))} was written in the last {RECENT_WRITE_SECONDS} seconds; the server may still be saving"
+    return None
+
+
+def busy_targets(dat_paths):
+    """{dat_path: reason} for every target that is unsafe to write now. Each storage folder is only checked once."""
+    activity = {}
+    busy = {}
+    for dat_path in dat_paths:
+        directory = os.path.dirname(os.path.abspath(dat_path))
+        if directory not in activity:
+            activity[directory] = server_activity(dat_path)
+        if activity[directory]:
+            busy[dat_path] = activity[directory]
+    return busy
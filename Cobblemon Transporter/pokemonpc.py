@@ -3,13 +3,22 @@ from tkinter import ttk, messagebox, filedialog, simpledialog
 import json
 import os
 import subprocess
-import hashlib
+import tempfile
 from PIL import Image, ImageTk
 from tkinterdnd2 import TkinterDnD, DND_FILES  # Import tkinterdnd2
 import re
 import sys
 import time
 
+# Shared helpers live next to the importer/exporter scripts in the modules folder
+MODULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "modules")
+if MODULES_DIR not in sys.path:
+    sys.path.insert(0, MODULES_DIR)
+from SlotOccupancy import SlotOccupancy
+from PokemonBundle import is_bundle, read_bundle
+from OutputIndex import identity_filename
+from NameTable import reference_name
+
 # Constants
 GRID_ROWS = 5
 GRID_COLS = 6
@@ -53,6 +62,25 @@ def run_windows_exe(exe_path, args, *, check=True, capture_output=False, text=Tr
         text=text
     )
 
+def get_sprite_path(pokemon):
+    """
+    Sprite file for a Pokémon, with the regional form suffix when it has one. Species spelled without their hyphens
+    ("hooh") or given as a dex number are resolved through the offline reference store.
+    """
+    # Determine the sprite folder based on whether the Pokémon is shiny
+    sprite_folder = SHINY_SPRITES_FOLDER if pokemon['shiny'] else SPRITES_FOLDER
+    suffix = ""
+    if 'form_id' in pokemon and pokemon['form_id'].lower() in ['galar', 'alola', 'hisui', 'dusk', 'midnight', 'dawn']:
+        suffix = f"-{pokemon['form_id'].lower()}"
+
+    species_name = pokemon['species'].lower()
+    sprite_path = os.path.join(sprite_folder, f"{species_name}{suffix}.png")
+    if not os.path.exists(sprite_path):
+        known = reference_name('species', species_name)
+        if known:
+            sprite_path = os.path.join(sprite_folder, f"{known}{suffix}.png")
+    return sprite_path
+
 def create_rounded_rectangle(self, x1, y1, x2, y2, radius=25, **kwargs):
     points = [x1+radius, y1,
               x1+radius, y1,
@@ -102,6 +130,9 @@ class PokemonHomeApp:
         # Track the currently selected Pokémon
         self.selected_pokemon = None
         
+        # Last .dat exported to, so the next export dialog opens in the same folder
+        self.last_dat_file = None
+        
         # Create main container frame
         self.main_frame = tk.Frame(self.root, bg=COLORS["background"])
         self.main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
@@ -456,7 +487,7 @@ class PokemonHomeApp:
             process = subprocess.run(
                 [sys.executable, parser_script, "--cli", "--files", file_path, "--output", self.current_folder], 
                 check=False,
-                capture_output=True,
+                stderr=subprocess.PIPE,  # stdout goes straight to our console instead of being buffered and re-printed
                 text=True
             )
             
@@ -468,9 +499,6 @@ class PokemonHomeApp:
                 print(f"Error output: {process.stderr}")
                 return
                 
-            # Show output in console for debugging
-            print(f"Parser output: {process.stdout}")
-            
             # Get the list of newly created JSON files and update their box/slot
             self.update_json_files_box_slot()
             
@@ -490,20 +518,16 @@ class PokemonHomeApp:
                 return
                 
             # Get all existing Pokémon loaded in the storage to avoid duplicates
-            used_slots = set()
+            occupancy = SlotOccupancy(TOTAL_BOXES, BOX_SIZE)
             for box_idx in range(TOTAL_BOXES):
                 for slot_idx in range(BOX_SIZE):
                     if self.local_storage[box_idx][slot_idx] is not None:
-                        used_slots.add((box_idx + 1, slot_idx + 1))  # 1-indexed for consistency with JSON files
+                        occupancy.occupy(box_idx + 1, slot_idx + 1)  # 1-indexed for consistency with JSON files
             
             # Get list of JSON files in the folder
             json_files = [f for f in os.listdir(self.current_folder) if f.endswith('.json')]
             files_updated = 0
             
-            # Start from the current box for placement
-            current_box = self.current_local_box
-            current_slot = 0
-            
             for json_file in json_files:
                 json_path = os.path.join(self.current_folder, json_file)
                 
@@ -513,32 +537,21 @@ class PokemonHomeApp:
                 
                 # Skip if this Pokémon already has box and slot assigned
                 if 'box_number' in pokemon_data and 'slot_number' in pokemon_data:
-                    box_slot = (pokemon_data['box_number'], pokemon_data['slot_number'])
-                    if box_slot in used_slots:
+                    if occupancy.is_occupied(pokemon_data['box_number'], pokemon_data['slot_number']):
                         continue
                 
-                # Find the next available slot
-                while True:
-                    if (current_box + 1, current_slot + 1) not in used_slots:
-                        # Found an empty slot
-                        pokemon_data['box_number'] = current_box + 1
-                        pokemon_data['slot_number'] = current_slot + 1
-                        
-                        # Add this slot to used slots
-                        used_slots.add((current_box + 1, current_slot + 1))
-                        
-                        # Save the updated JSON
-                        with open(json_path, 'w') as f:
-                            json.dump(pokemon_data, f, indent=4)
-                            
-                        files_updated += 1
-                        break
+                # Find the next available slot, starting from the current box
+                position = occupancy.claim_next_free(self.current_local_box + 1)
+                if position is None:
+                    self.update_status("All boxes are full; some Pokémon could not be placed")
+                    break
+                pokemon_data['box_number'], pokemon_data['slot_number'] = position
+                
+                # Save the updated JSON
+                with open(json_path, 'w') as f:
+                    json.dump(pokemon_data, f, indent=4)
                     
-                    # Move to the next slot
-                    current_slot += 1
-                    if current_slot >= BOX_SIZE:
-                        current_slot = 0
-                        current_box = (current_box + 1) % TOTAL_BOXES
+                files_updated += 1
             
             if files_updated > 0:
                 self.update_status(f"Updated {files_updated} Pokémon to be in the current box and folder")
@@ -740,16 +753,7 @@ class PokemonHomeApp:
         for i, button in enumerate(self.local_buttons):
             pokemon = self.local_storage[self.current_local_box][i]
             if pokemon is not None:
-                # Determine the sprite folder based on whether the Pokémon is shiny
-                sprite_folder = SHINY_SPRITES_FOLDER if pokemon['shiny'] else SPRITES_FOLDER
-            
-                # Check for form_id and append the appropriate suffix
-                species_name = pokemon['species'].lower()
-                if 'form_id' in pokemon:
-                    if pokemon['form_id'].lower() in ['galar', 'alola', 'hisui', 'dusk', 'midnight', 'dawn']:
-                        species_name += f"-{pokemon['form_id'].lower()}"
-            
-                sprite_path = os.path.join(sprite_folder, f"{species_name}.png")
+                sprite_path = get_sprite_path(pokemon)
         
                 if os.path.exists(sprite_path):
                     img = Image.open(sprite_path)
@@ -1161,12 +1165,7 @@ class PokemonHomeApp:
         header_frame.pack(fill=tk.X, pady=(0, 15))
         
         # Try to load the sprite
-        sprite_folder = SHINY_SPRITES_FOLDER if pokemon['shiny'] else SPRITES_FOLDER
-        species_name = pokemon['species'].lower()
-        if 'form_id' in pokemon and pokemon['form_id'].lower() in ['galar', 'alola', 'hisui', 'dusk', 'midnight', 'dawn']:
-            species_name += f"-{pokemon['form_id'].lower()}"
-        
-        sprite_path = os.path.join(sprite_folder, f"{species_name}.png")
+        sprite_path = get_sprite_path(pokemon)
         
         if os.path.exists(sprite_path):
             sprite_img = Image.open(sprite_path)
@@ -1440,6 +1439,7 @@ class PokemonHomeApp:
             return
 
         # Use the file_path directly from the selected_pokemon data
+        self.materialize_pokemon_file(self.selected_pokemon)
         if 'file_path' not in self.selected_pokemon or not os.path.exists(self.selected_pokemon['file_path']):
             messagebox.showerror("Error", f"JSON file for {self.selected_pokemon['species']} not found!")
             self.update_status(f"Error: JSON file not found for {self.selected_pokemon['species']}")
@@ -1491,15 +1491,17 @@ class PokemonHomeApp:
                 self.update_status(f"Created directory: {self.current_folder}")
                 return
                 
-            # Get all JSON files in the directory
+            # Get all JSON files and NDJSON bundles in the directory
             files = [f for f in os.listdir(self.current_folder) if f.endswith(".json")]
+            bundles = [f for f in os.listdir(self.current_folder) if is_bundle(f)]
             
-            if not files:
+            if not files and not bundles:
                 self.update_status(f"No Pokémon data found in {self.current_folder}. Try importing some files.")
                 return
                 
             # Sort files by modification date (oldest first)
             files.sort(key=lambda x: os.path.getmtime(os.path.join(self.current_folder, x)))
+            bundles.sort(key=lambda x: os.path.getmtime(os.path.join(self.current_folder, x)))
             
             # Clear existing storage first
             self.local_storage = [[None] * BOX_SIZE for _ in range(TOTAL_BOXES)]
@@ -1509,37 +1511,34 @@ class PokemonHomeApp:
             
             # Load Pokémon data
             pokemon_data = []
-            for file in files:
-                file_path = os.path.join(self.current_folder, file)
-                with open(file_path, "r") as f:
-                    pokemon = json.load(f)
-                    # Store the file path with the Pokémon data (but don't save to JSON)
-                    pokemon['file_path'] = file_path
+            for pokemon, file_path in self.iter_folder_pokemon(files, bundles):
+                # Store the file path with the Pokémon data (but don't save to JSON)
+                pokemon['file_path'] = file_path
+                
+                # Check if this Pokémon has box and slot info
+                if 'box_number' in pokemon and 'slot_number' in pokemon:
+                    box_num = pokemon['box_number'] - 1  # Convert from 1-indexed to 0-indexed
+                    slot_num = pokemon['slot_number'] - 1
                     
-                    # Check if this Pokémon has box and slot info
-                    if 'box_number' in pokemon and 'slot_number' in pokemon:
-                        box_num = pokemon['box_number'] - 1  # Convert from 1-indexed to 0-indexed
-                        slot_num = pokemon['slot_number'] - 1
+                    # Ensure the box and slot are valid
+                    if 0 <= box_num < TOTAL_BOXES and 0 <= slot_num < BOX_SIZE:
+                        # Create a unique identifier for this slot
+                        slot_id = (box_num, slot_num)
                         
-                        # Ensure the box and slot are valid
-                        if 0 <= box_num < TOTAL_BOXES and 0 <= slot_num < BOX_SIZE:
-                            # Create a unique identifier for this slot
-                            slot_id = (box_num, slot_num)
-                            
-                            # Check if this slot is already used
-                            if slot_id in used_slots:
-                                # Slot conflict - add to the end instead
-                                pokemon_data.append(pokemon)
-                            else:
-                                # Place directly in the right slot
-                                self.local_storage[box_num][slot_num] = pokemon
-                                used_slots.add(slot_id)
-                        else:
-                            # Invalid box/slot - add to the end
+                        # Check if this slot is already used
+                        if slot_id in used_slots:
+                            # Slot conflict - add to the end instead
                             pokemon_data.append(pokemon)
+                        else:
+                            # Place directly in the right slot
+                            self.local_storage[box_num][slot_num] = pokemon
+                            used_slots.add(slot_id)
                     else:
-                        # No box/slot info - add to the end
+                        # Invalid box/slot - add to the end
                         pokemon_data.append(pokemon)
+                else:
+                    # No box/slot info - add to the end
+                    pokemon_data.append(pokemon)
             
             # Place remaining Pokémon in empty slots, starting with the current box
             for pokemon in pokemon_data:
@@ -1579,6 +1578,39 @@ class PokemonHomeApp:
             messagebox.showerror("Error", f"Failed to load Pokémon data: {e}")
             self.update_status(f"Error loading Pokémon data: {str(e)}")
 
+    def iter_folder_pokemon(self, files, bundles):
+        """
+        Yield (pokemon, file_path) for every JSON file and then every bundle entry of the current folder.
+        A bundled Pokémon gets the path of the JSON file it would have had; that file is only written once
+        the Pokémon is edited or moved, and from then on it takes precedence over the bundle entry.
+        """
+        self.bundle_entries = {}
+        for file in files:
+            file_path = os.path.join(self.current_folder, file)
+            with open(file_path, "r") as f:
+                yield json.load(f), file_path
+        
+        existing = set(files)
+        for bundle in bundles:
+            bundle_path = os.path.join(self.current_folder, bundle)
+            for pokemon in read_bundle(bundle_path):
+                filename = identity_filename(pokemon)
+                if filename in existing:
+                    continue
+                existing.add(filename)
+                file_path = os.path.join(self.current_folder, filename)
+                self.bundle_entries[file_path] = bundle_path
+                yield pokemon, file_path
+
+    def materialize_pokemon_file(self, pokemon):
+        """Write a bundled Pokémon out as its own JSON file so it can be edited, moved or exported."""
+        file_path = pokemon.get('file_path')
+        if not file_path or os.path.exists(file_path) or file_path not in getattr(self, 'bundle_entries', {}):
+            return
+        with open(file_path, 'w') as f:
+            pokemon_save = {k: v for k, v in pokemon.items() if k != 'file_path'}
+            json.dump(pokemon_save, f, indent=4)
+
     def run_parser_script(self):
         """Run the CobblemonImporter.py script."""
         try:
@@ -1992,6 +2024,7 @@ class PokemonHomeApp:
             pokemon['slot_number'] = slot_num + 1  # Convert to 1-indexed for user clarity
             
             # Use the file_path stored with the Pokémon data
+            self.materialize_pokemon_file(pokemon)
             if 'file_path' in pokemon and os.path.exists(pokemon['file_path']):
                 with open(pokemon['file_path'], 'w') as f:
                     # Create a copy of the pokemon dict without the file_path key
@@ -2322,6 +2355,7 @@ class PokemonHomeApp:
 
         try:
             # Check if the file exists
+            self.materialize_pokemon_file(self.selected_pokemon)
             if 'file_path' not in self.selected_pokemon or not os.path.exists(self.selected_pokemon['file_path']):
                 messagebox.showerror("Error", f"JSON file for {self.selected_pokemon['species']} not found!")
                 self.update_status(f"Error: JSON file not found for {self.selected_pokemon['species']}")
@@ -2337,30 +2371,50 @@ class PokemonHomeApp:
                 self.update_status("Error: Unparser script not found")
                 return
             
+            # Ask for the target here, so the exporter can run headless from a manifest
+            dat_file = filedialog.askopenfilename(
+                title="Select Cobblemon .dat file",
+                filetypes=[("DAT Files", "*.dat")],
+                initialdir=os.path.dirname(self.last_dat_file) if self.last_dat_file else None
+            )
+            if not dat_file:
+                return
+            self.last_dat_file = dat_file
+            
             # Update status before execution
-            self.update_status(f"Exporting {self.selected_pokemon['species']} to Cobblemon...")
+            species = self.selected_pokemon['species']
+            self.update_status(f"Exporting {species} to Cobblemon...")
             
             # Set up a proper environment for the subprocess with UTF-8 encoding
             env = os.environ.copy()
             env["PYTHONIOENCODING"] = "utf-8"
             
-            # Run CobblemonExporter.py with the CLI argument for the JSON file
-            process = subprocess.run(
-                [sys.executable, unparser_script, "--json", self.selected_pokemon['file_path']],
-                check=False,
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='backslashreplace',
-                env=env
-            )
+            with tempfile.TemporaryDirectory(prefix="cobblemon-export-") as work_dir:
+                # One manifest, one exporter run; the placement report says what happened to each Pokémon
+                manifest_path = os.path.join(work_dir, "manifest.json")
+                report_path = os.path.join(work_dir, "report.json")
+                with open(manifest_path, 'w', encoding='utf-8') as f:
+                    json.dump({os.path.abspath(self.selected_pokemon['file_path']): os.path.abspath(dat_file)}, f)
+                
+                process = subprocess.run(
+                    [sys.executable, unparser_script, "--manifest", manifest_path, "--report", report_path],
+                    check=False,
+                    capture_output=True,
+                    text=True,
+                    encoding='utf-8',
+                    errors='backslashreplace',
+                    env=env
+                )
+                report = []
+                if os.path.exists(report_path):
+                    with open(report_path, 'r', encoding='utf-8') as f:
+                        report = json.load(f)
             
             # Output the result to console for debugging
             print(f"Unparser output: {process.stdout}")
             print(f"Unparser errors: {process.stderr}")
             
-            # Check process return code first
-            if process.returncode != 0:
+            if not report:
                 if process.stderr and "UnicodeEncodeError" in process.stderr:
                     # Specific error handling for encoding issues
                     messagebox.showerror("Error", 
@@ -2370,18 +2424,27 @@ class PokemonHomeApp:
                     self.update_status(f"Error exporting: Encoding issue with special characters")
                 else:
                     # General error handling
-                    messagebox.showerror("Error", f"Export failed with error:\n{process.stderr}")
+                    messagebox.showerror("Error", f"Export failed with error:\n{process.stderr or process.stdout}")
                     self.update_status("Error during Cobblemon export")
                 return
             
-            # Check for success message in the output
-            if "Successfully processed" in process.stdout:
-                messagebox.showinfo("Success", f"Successfully exported {self.selected_pokemon['species']} to Cobblemon!")
-                self.update_status(f"Successfully exported {self.selected_pokemon['species']} to Cobblemon")
+            record = report[0]
+            if 'box_number' in record:
+                location = f"Box {record['box_number']}, Slot {record['slot_number']}"
+            elif record.get('party'):
+                location = f"Party Slot {record['slot_number']}"
+            else:
+                location = None
+            
+            if record.get('error'):
+                messagebox.showerror("Error", f"Could not export {species}: {record['error']}\n\n{process.stdout.strip()}")
+                self.update_status(f"Error exporting {species}: {record['error']}")
+            elif record.get('skipped'):
+                messagebox.showinfo("Information", f"{species} is already in this file ({location}).")
+                self.update_status(f"{species} is already in the .dat file")
             else:
-                # If no explicit success message but process completed, show info
-                messagebox.showinfo("Information", f"Export process completed with message:\n{process.stdout.strip()}")
-                self.update_status("Cobblemon export process completed")
+                messagebox.showinfo("Success", f"Successfully exported {species} to Cobblemon ({location})!")
+                self.update_status(f"Successfully exported {species} to Cobblemon")
             
         except Exception as e:
             error_msg = f"Failed to export to Cobblemon: {str(e)}"
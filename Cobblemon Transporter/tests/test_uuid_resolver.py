@@ -0,0 +1,104 @@
+import json
+import os
+import sys
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+MODULES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'modules')
+if MODULES_DIR not in sys.path:
+    sys.path.insert(0, MODULES_DIR)
+
+from UuidResolver import UsernameCache, resolve_usernames  # noqa: E402
+
+KNOWN = '069a79f4-44e9-4726-a5be-fca90e38aaf5'
+UNKNOWN = '00000000-0000-0000-0000-000000000000'
+RATE_LIMITED = '853c80ef-3c37-49fd-aa49-938b674adae6'
+
+
+class ProfileServer(ThreadingHTTPServer):
+    """A stand-in for Mojang's profile API: one known player, one rate-limited player, everyone else unknown"""
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), ProfileHandler)
+        self.requests = Counter()
+        self.limited_once = False
+        self.lock = threading.Lock()
+
+    @property
+    def profile_url(self):
+        return f"http://127.0.0.1:{self.server_port}/user/profile/{{uuid}}"
+
+
+class ProfileHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        uuid = self.path.rsplit('/', 1)[-1]
+        with self.server.lock:
+            self.server.requests[uuid] += 1
+            rate_limit = uuid == RATE_LIMITED and not self.server.limited_once
+            if rate_limit:
+                self.server.limited_once = True
+        if rate_limit:
+            self.send_response(429)
+            self.send_header('Retry-After', '0')
+            self.end_headers()
+        elif uuid in (KNOWN, RATE_LIMITED):
+            body = json.dumps({'id': uuid.replace('-', ''), 'name': 'Notch' if uuid == KNOWN else 'jeb_'}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_response(204)
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ProfileServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return UsernameCache(str(tmp_path / 'uuid_cache.json')).load()
+
+
+def test_hit(server, cache):
+    assert resolve_usernames([KNOWN], cache, server.profile_url) == {KNOWN: ('Notch', 'ok')}
+    assert cache.name(KNOWN) == 'Notch'
+    assert not cache.needs_lookup(KNOWN)
+
+
+def test_miss_is_remembered(server, cache):
+    assert resolve_usernames([UNKNOWN], cache, server.profile_url) == {UNKNOWN: (None, 'not_found')}
+    assert cache.name(UNKNOWN) == 'Unknown'
+    # The negative entry answers the next run without asking the server again
+    assert resolve_usernames([UNKNOWN], cache, server.profile_url) == {}
+    assert server.requests[UNKNOWN] == 1
+
+
+def test_rate_limit_is_retried(server, cache):
+    assert resolve_usernames([RATE_LIMITED], cache, server.profile_url) == {RATE_LIMITED: ('jeb_', 'ok')}
+    assert server.requests[RATE_LIMITED] == 2
+
+
+def test_cache_persists(server, cache):
+    resolve_usernames([KNOWN, UNKNOWN], cache, server.profile_url)
+    cache.flush()
+
+    reloaded = UsernameCache(cache.path).load()
+    assert reloaded.name(KNOWN) == 'Notch'
+    assert UNKNOWN in reloaded
+    assert resolve_usernames([KNOWN, UNKNOWN], reloaded, server.profile_url) == {}
+    assert server.requests == Counter({KNOWN: 1, UNKNOWN: 1})